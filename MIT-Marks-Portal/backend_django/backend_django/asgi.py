@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend_django.settings')
+os.environ.setdefault('DJANGO_SERVER', 'asgi')  # see ASGI_MODE in settings.py
 
 application = get_asgi_application()
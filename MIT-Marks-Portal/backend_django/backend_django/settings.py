@@ -31,9 +31,10 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # ------------------------
 MIDDLEWARE = [
+    'core.metrics.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,13 +67,124 @@ WSGI_APPLICATION = 'backend_django.wsgi.application'
 # ------------------------
 # DATABASE
 # ------------------------
+# core.sqlite_backend is the stock sqlite3 backend with BEGIN IMMEDIATE for
+# atomic blocks; SQLITE_PRAGMAS are applied to every new connection
+# (core/sqlite.py). SQLITE_TUNING=0 falls back to plain sqlite3 behaviour.
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') == '1'
+DATABASE_PATH = os.environ.get('DATABASE_PATH', BASE_DIR / 'db.sqlite3')
+
+# asgi.py sets DJANGO_SERVER=asgi. Under ASGI every request runs in its own
+# context and gets its own connection, so persistent connections would only
+# pile up: they are closed at the end of each request instead.
+ASGI_MODE = os.environ.get('DJANGO_SERVER') == 'asgi'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'core.sqlite_backend',
+        'NAME': DATABASE_PATH,
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', '60')) if SQLITE_TUNING and not ASGI_MODE else 0,
+        'CONN_HEALTH_CHECKS': SQLITE_TUNING,
     }
 }
 
+# Student and reporting views read through a second, read-only connection
+# (core/routers.py). By default it is the live file opened with mode=ro; set
+# READ_DATABASE_SNAPSHOT to serve those reads from an immutable copy made by
+# the snapshot_database command instead. READ_DATABASE=0 turns routing off.
+READ_DATABASE_ALIAS = 'readonly' if os.environ.get('READ_DATABASE', '1') == '1' else None
+READ_DATABASE_SNAPSHOT = os.environ.get('READ_DATABASE_SNAPSHOT')
+if READ_DATABASE_ALIAS:
+    DATABASES[READ_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': (f'file:{READ_DATABASE_SNAPSHOT}?mode=ro&immutable=1' if READ_DATABASE_SNAPSHOT
+                 else f'file:{DATABASE_PATH}?mode=ro'),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.routers.ReadOnlyRouter']
+
+SQLITE_IMMEDIATE_TRANSACTIONS = SQLITE_TUNING
+# The journal mode is stored in the database file, so WAL is only switched on
+# for a database given with DATABASE_PATH (or by SQLITE_JOURNAL_MODE): the
+# db.sqlite3 committed with the repo keeps its rollback journal.
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL' if 'DATABASE_PATH' in os.environ else '')
+SQLITE_PRAGMAS = {
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    **({'journal_mode': SQLITE_JOURNAL_MODE} if SQLITE_JOURNAL_MODE else {}),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', '32000')),  # negative = KiB
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_BYTES', str(256 * 1024 * 1024))),
+} if SQLITE_TUNING else {}
+
+
+# ------------------------
+# CACHE
+# ------------------------
+# Local memory per worker by default; set CACHE_DIR to share one file cache
+# between gunicorn workers. Keys are versioned, so no external service is needed.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'marks-portal',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+
+# ------------------------
+# UPLOAD JOBS
+# ------------------------
+# Marks uploads are queued and processed by a local thread pool (core/jobs.py).
+# UPLOAD_JOB_WORKERS=0 processes each upload inline, inside the request.
+UPLOAD_JOB_WORKERS = int(os.environ.get('UPLOAD_JOB_WORKERS', '2'))
+UPLOAD_JOB_DIR = BASE_DIR / 'upload_jobs'
+# jobs whose worker process can't be checked (see core/jobs.py) are failed
+# when still queued/running after this long
+UPLOAD_JOB_TIMEOUT_SECONDS = int(os.environ.get('UPLOAD_JOB_TIMEOUT_SECONDS', '900'))
+
+
+# ------------------------
+# REQUEST METRICS
+# ------------------------
+# Per-view latency / SQL counters (core/metrics.py), shared by all workers
+# through METRICS_DB and served at /metrics/ in Prometheus format.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_DB = os.environ.get('METRICS_DB', BASE_DIR / 'metrics.sqlite3')  # gitignored
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', '5'))
+METRICS_SLOW_MS = float(os.environ.get('METRICS_SLOW_MS', '500'))
+# points METRICS_DB at a temporary file while the tests run
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+
+# ------------------------
+# STUDENT RESULT CACHE
+# ------------------------
+# Per-USN LRU used by the student endpoints (core/student_cache.py).
+# STUDENT_CACHE_SIZE=0 turns it off.
+STUDENT_CACHE_SIZE = int(os.environ.get('STUDENT_CACHE_SIZE', '20000'))
+STUDENT_CACHE_TTL = float(os.environ.get('STUDENT_CACHE_TTL', '600'))
+STUDENT_CACHE_VERSION_SECONDS = float(os.environ.get('STUDENT_CACHE_VERSION_SECONDS', '2'))
+
+
+# ------------------------
+# PUBLISHED RESULTS
+# ------------------------
+# Per-student result documents written by publish_results (core/publish.py)
+# and served from PUBLISH_URL without touching the database. The Django view
+# (django.views.static.serve) is for development; in production the web server
+# or CDN in front must serve PUBLISH_DIR directly under the same URL.
+PUBLISH_DIR = Path(os.environ.get('PUBLISH_DIR', BASE_DIR / 'published'))
+PUBLISH_URL = '/results/'
+PUBLISH_POINTER_MAX_AGE = int(os.environ.get('PUBLISH_POINTER_MAX_AGE', '60'))
+
 
 # ------------------------
 # STATIC FILES SETTINGS
@@ -0,0 +1,80 @@
+# core/analytics.py
+"""
+Rank lists, percentiles, z-scores and distributions of CIE totals.
+
+Ranking is done by SQLite window functions in the query itself: RANK() for
+the position (ties share a rank, the next rank skips) and PERCENT_RANK() over
+ascending totals for the percentile, i.e. the share of ranked students who
+scored strictly lower. Mean, standard deviation and the histogram are then
+computed in one pass over the fetched values_list rows.
+
+A course is ranked on its totals; a class is ranked on each student's mean
+total over the class's courses, which keeps it on the same 0-50 scale.
+Students without a total are not ranked and are only counted.
+"""
+from math import sqrt
+
+from django.db.models import Avg, F, Window
+from django.db.models.functions import PercentRank, Rank
+
+from .models import Marks, Student
+from .stats import BUCKET_WIDTH, BUCKETS, PASS_MARK, bucket
+
+
+def _summarise(rows, unranked):
+    """rows: (sl_no, usn, name, score, rank, percent_rank) in rank order."""
+    n = len(rows)
+    mean = sum(r[3] for r in rows) / n if n else None
+    std = sqrt(max(sum(r[3] * r[3] for r in rows) / n - mean * mean, 0.0)) if n else None
+
+    hist = [0] * BUCKETS
+    ranking = []
+    for sl_no, usn, name, score, rank, pct in rows:
+        hist[bucket(score)] += 1
+        ranking.append({
+            "rank": rank,
+            "sl_no": sl_no,
+            "usn": usn,
+            "name": name,
+            "score": round(score, 2),
+            "percentile": round(pct * 100, 1),
+            "z_score": round((score - mean) / std, 2) if std else 0.0,
+        })
+
+    return {
+        "count": n,
+        "unranked": unranked,
+        "mean": round(mean, 2) if mean is not None else None,
+        "std": round(std, 2) if std is not None else None,
+        "pass_count": sum(hist[PASS_MARK // BUCKET_WIDTH:]),
+        "histogram": [
+            {"from": i * BUCKET_WIDTH, "to": (i + 1) * BUCKET_WIDTH, "count": c}
+            for i, c in enumerate(hist)
+        ],
+        "ranking": ranking,
+    }
+
+
+def _ranked_rows(qs, score, fields):
+    """values_list of fields + (score, rank, percent_rank), best score first."""
+    return list(
+        qs.filter(**{f"{score}__isnull": False})
+        .annotate(
+            rank=Window(Rank(), order_by=F(score).desc()),
+            pct=Window(PercentRank(), order_by=F(score).asc()),
+        )
+        .order_by("rank", *fields)
+        .values_list(*fields, score, "rank", "pct")
+    )
+
+
+def course_analytics(course):
+    marks = Marks.objects.filter(course=course)
+    rows = _ranked_rows(marks, "total", ["student__sl_no", "student__usn", "student__name"])
+    return _summarise(rows, marks.filter(total__isnull=True).count())
+
+
+def class_analytics(class_obj):
+    students = Student.objects.filter(class_info=class_obj)
+    rows = _ranked_rows(students.annotate(score=Avg("marks__total")), "score", ["sl_no", "usn", "name"])
+    return _summarise(rows, students.count() - len(rows))
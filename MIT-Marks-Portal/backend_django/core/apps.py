@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .metrics import install_query_recorder
+        from .sqlite import configure_connection
+
+        connection_created.connect(configure_connection, dispatch_uid="core.sqlite.configure_connection")
+        connection_created.connect(install_query_recorder, dispatch_uid="core.metrics.install_query_recorder")
@@ -0,0 +1,248 @@
+# core/benchmark.py
+"""
+API benchmark runner.
+
+Calls every API in core/urls.py (the /api/ views, /metrics/ and the published
+/results/ files) through the Django test client against the current database
+(normally a seeded scratch database, see the bench_api command) and reports p50/p95 latency, the largest number of SQL queries seen
+for one call and the peak Python memory of one call. Each endpoint carries a
+query budget; endpoints that exceed it are listed under "over_budget".
+
+Endpoints that only add or delete data (create_subject, import_roster,
+delete_uploaded_marks) are left out so every repeat sees the same department,
+and so is upload_status, which _upload calls. Results are published to a
+temporary PUBLISH_DIR.
+
+run_async_benchmark() drives the async student and class listing views with
+AsyncClient at increasing concurrency, all in one thread and event loop, and
+reports throughput, latency, peak in-flight requests, thread count and peak
+Python memory per level. Memory is traced in a separate, shorter pass
+(tracemalloc slows every allocation down too much to time under it).
+"""
+import asyncio
+import json
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from io import BytesIO
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+
+from .models import ClassInfo, Course, Marks, Student, Subject
+from .publish import file_key
+from .student_cache import student_cache
+
+
+def _fixtures():
+    """Ids and keys of one seeded class, course and student used as request parameters."""
+    course = Course.objects.select_related("class_info").filter(marks__isnull=False).order_by("id").first()
+    if course is None:
+        raise ValueError("no marks in the database; seed a department first")
+    class_obj = course.class_info
+    subject = Subject.objects.filter(class_info=class_obj, subject=course.course_name).first()
+    roster = list(Student.objects.filter(class_info=class_obj).order_by("sl_no").values("sl_no", "usn", "name"))
+    return {
+        "cls": {"branch": class_obj.branch, "semester": class_obj.semester, "section": class_obj.section},
+        "course_id": course.id,
+        "subject_id": subject.id if subject else None,
+        "roster": roster,
+        "usn": roster[0]["usn"],
+    }
+
+
+def _marks_sheet(roster):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Marks")
+    ws.append(["SL No", "USN", "Name", "IA1", "IA2", "IA3", "ASG1", "ASG2", "Total CIE (50)"])
+    for i, s in enumerate(roster):
+        ws.append([s["sl_no"], s["usn"], s["name"], 20 + i % 20, 25, 30, 20, 15, None])
+    out = BytesIO()
+    wb.save(out)
+    out.name = "marks.xlsx"
+    out.seek(0)
+    return out
+
+
+def _result_pointer(client, f):
+    return client.get(f"{settings.PUBLISH_URL}students/{file_key(f['usn'])}.json")
+
+
+def _upload(client, f):
+    queued = client.post("/api/upload_marks_subject/", {"subject_id": f["subject_id"], "file": _marks_sheet(f["roster"])})
+    return client.get("/api/upload_status/", {"job_id": queued.json()["job_id"]})
+
+
+# name -> (request(client, fixtures), query budget)
+ENDPOINTS = {
+    "list_subjects": (lambda c, f: c.get("/api/list_subjects/", f["cls"]), 3),
+    "download_subject_template": (lambda c, f: c.get("/api/download_subject_template/", {"subject_id": f["subject_id"]}), 3),
+    "get_students": (lambda c, f: c.get("/api/get_students/", f["cls"]), 3),
+    "get_uploaded_marks": (lambda c, f: c.get("/api/get_uploaded_marks/", f["cls"]), 2),
+    "department_uploads": (lambda c, f: c.get("/api/department_uploads/"), 1),
+    "get_course_marks": (lambda c, f: c.get("/api/get_course_marks/", {"course_id": f["course_id"]}), 2),
+    "course_stats": (lambda c, f: c.get("/api/course_stats/", {"course_id": f["course_id"]}), 1),
+    "course_analytics": (lambda c, f: c.get("/api/course_analytics/", {"course_id": f["course_id"]}), 3),
+    "class_results": (lambda c, f: c.get("/api/class_results/", f["cls"]), 3),
+    "class_results_export": (lambda c, f: c.get("/api/class_results/export/", f["cls"]), 3),
+    "class_analytics": (lambda c, f: c.get("/api/class_analytics/", f["cls"]), 3),
+    "sgpa": (lambda c, f: c.get("/api/sgpa/", {"branch": f["cls"]["branch"], "semester": f["cls"]["semester"]}), 2),
+    "export_marks": (lambda c, f: c.get("/api/export_marks/", f["cls"]), 1),
+    "student_check": (lambda c, f: c.post("/api/student_check/", json.dumps({"usn": f["usn"]}),
+                                          content_type="application/json"), 2),
+    "student_subjects": (lambda c, f: c.get("/api/student_subjects/", {"usn": f["usn"]}), 2),
+    "student_summary": (lambda c, f: c.get("/api/student/summary/", {"usn": f["usn"], "subject_id": f["course_id"]}), 2),
+    "student_transcript": (lambda c, f: c.get("/api/student/transcript/", {"usn": f["usn"]}), 2),
+    "cache_stats": (lambda c, f: c.get("/api/cache_stats/"), 0),
+    "upload_marks_subject": (_upload, 40),
+    "upload_students": (lambda c, f: c.post("/api/upload_students/", json.dumps({**f["cls"], "students": [
+        {"sl": s["sl_no"], "usn": s["usn"], "name": s["name"]} for s in f["roster"]]}),
+        content_type="application/json"), 4),
+    "recompute_totals": (lambda c, f: c.post("/api/recompute_totals/", json.dumps({"course_id": f["course_id"]}),
+                                             content_type="application/json"), 12),
+    "publish_results": (lambda c, f: c.post("/api/publish_results/", json.dumps(f["cls"]),
+                                            content_type="application/json"), 4),
+    "results": (_result_pointer, 0),  # after publish_results
+    "metrics": (lambda c, f: c.get("/metrics/"), 0),
+}
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def _call(request, client, f):
+    response = request(client, f)
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response
+
+
+def run_benchmark(repeat=20, names=None):
+    """Benchmark the endpoints (all by default); returns the report dict."""
+    client = Client()
+    f = _fixtures()
+    results = []
+
+    with tempfile.TemporaryDirectory() as publish_dir, override_settings(
+            UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir(), PUBLISH_DIR=publish_dir):
+        for name, (request, budget) in ENDPOINTS.items():
+            if names and name not in names:
+                continue
+            latencies = []
+            queries = 0
+            status = None
+            for _ in range(repeat):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    status = _call(request, client, f).status_code
+                    latencies.append((time.perf_counter() - start) * 1000)
+                queries = max(queries, len(ctx.captured_queries))
+
+            tracemalloc.start()
+            _call(request, client, f)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            results.append({
+                "name": name,
+                "status": status,
+                "p50_ms": round(_percentile(latencies, 0.50), 2),
+                "p95_ms": round(_percentile(latencies, 0.95), 2),
+                "queries": queries,
+                "query_budget": budget,
+                "peak_kb": round(peak / 1024, 1),
+            })
+
+    return {
+        "repeat": repeat,
+        "classes": ClassInfo.objects.count(),
+        "students": Student.objects.count(),
+        "endpoints": results,
+        "over_budget": [r["name"] for r in results if r["queries"] > r["query_budget"]],
+        "failed": [r["name"] for r in results if r["status"] >= 400],
+    }
+
+
+# one student visit: the calls a result-day page load makes
+ASYNC_VISIT = [
+    lambda c, v: c.post("/api/student_check/", {"usn": v["usn"]}, content_type="application/json"),
+    lambda c, v: c.get("/api/student_subjects/", {"usn": v["usn"]}),
+    lambda c, v: c.get("/api/student/summary/", {"usn": v["usn"], "subject_id": v["course_id"]}),
+    lambda c, v: c.get("/api/list_subjects/", v["cls"]),
+    lambda c, v: c.get("/api/get_students/", v["cls"]),
+]
+
+
+async def _async_burst(calls, concurrency):
+    client = AsyncClient()
+    gate = asyncio.Semaphore(concurrency)
+    state = {"in_flight": 0, "peak_in_flight": 0, "threads": threading.active_count(), "failed": 0}
+    latencies = []
+
+    async def one(call, visit):
+        async with gate:
+            state["in_flight"] += 1
+            state["peak_in_flight"] = max(state["peak_in_flight"], state["in_flight"])
+            start = time.perf_counter()
+            response = await call(client, visit)
+            latencies.append((time.perf_counter() - start) * 1000)
+            state["in_flight"] -= 1
+            state["threads"] = max(state["threads"], threading.active_count())
+            if response.status_code >= 400:
+                state["failed"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(call, visit) for call, visit in calls))
+    state["seconds"] = time.perf_counter() - start
+    state["latencies"] = latencies
+    return state
+
+
+def run_async_benchmark(concurrency=(1, 10, 100), visits=400, seed=0):
+    """Benchmark the async views at each concurrency level; returns the report dict."""
+    students = {}
+    for usn, course_id, branch, semester, section in Marks.objects.filter(course__isnull=False).values_list(
+            "student__usn", "course_id", "class_info__branch", "class_info__semester", "class_info__section"):
+        students.setdefault(usn, {"usn": usn, "course_id": course_id,
+                                  "cls": {"branch": branch, "semester": semester, "section": section}})
+    if not students:
+        raise ValueError("no marks in the database; seed a department first")
+    students = list(students.values())
+    rng = random.Random(seed)
+    calls = [(call, visit) for visit in rng.choices(students, k=visits) for call in ASYNC_VISIT]
+
+    levels = []
+    with override_settings(METRICS_ENABLED=False):
+        for level in concurrency:
+            cache.clear()
+            student_cache.clear()
+            state = async_to_sync(_async_burst)(calls, level)
+
+            cache.clear()
+            student_cache.clear()
+            tracemalloc.start()
+            async_to_sync(_async_burst)(calls[:level * len(ASYNC_VISIT)], level)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            levels.append({
+                "concurrency": level,
+                "requests": len(calls),
+                "req_per_s": round(len(calls) / state["seconds"], 1),
+                "p50_ms": round(_percentile(state["latencies"], 0.50), 2),
+                "p95_ms": round(_percentile(state["latencies"], 0.95), 2),
+                "peak_in_flight": state["peak_in_flight"],
+                "threads": state["threads"],
+                "peak_kb": round(peak / 1024, 1),
+                "failed": state["failed"],
+            })
+
+    return {"visits": visits, "levels": levels}
@@ -0,0 +1,78 @@
+# core/export.py
+"""
+Department-wide marks export.
+
+Rows come from one values_list query over Marks joined to Student, ClassInfo
+and Course, read with a server-side .iterator(chunk_size=...), so memory stays
+flat however many classes are exported. CSV is written row by row into a
+StreamingHttpResponse; xlsx is built with openpyxl's write-only mode into a
+temp file (a zip can't be sent before it is finished) and then streamed.
+"""
+import csv
+import tempfile
+
+from openpyxl import Workbook
+
+from .models import Marks
+from .routers import read_alias
+
+READ_CHUNK = 2000
+
+HEADERS = ["Branch", "Semester", "Section", "Subject", "Sub Code", "Credits", "Faculty",
+           "SL No", "USN", "Name", "IA1", "IA2", "IA3", "ASG1", "ASG2", "Lab CIE", "Lab Test", "Total"]
+
+_FIELDS = [
+    "class_info__branch", "class_info__semester", "class_info__section",
+    "course__course_name", "course__sub_code", "course__credits", "course__faculty",
+    "student__sl_no", "student__usn", "student__name",
+    "ia1", "ia2", "ia3", "asg1", "asg2", "lab_cie", "lab_test", "total",
+]
+
+
+def export_rows(branch=None, semester=None, section=None):
+    """Yield one tuple per Marks row, in class / course / sl_no order."""
+    # pinned now: the rows are read after the view returns, outside @read_only_database
+    qs = Marks.objects.using(read_alias()).filter(course__isnull=False)
+    if branch:
+        qs = qs.filter(class_info__branch=branch)
+    if semester:
+        qs = qs.filter(class_info__semester=semester)
+    if section:
+        qs = qs.filter(class_info__section=section)
+    qs = qs.order_by(
+        "class_info__branch", "class_info__semester", "class_info__section",
+        "course__course_name", "course_id", "student__sl_no", "student__usn",
+    )
+    return qs.values_list(*_FIELDS).iterator(chunk_size=READ_CHUNK)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADERS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows, fileobj):
+    """Write rows to fileobj as a write-only workbook."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Marks")
+    ws.append(HEADERS)
+    for row in rows:
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_tempfile(rows):
+    """Build the xlsx in an anonymous temp file and return it rewound."""
+    out = tempfile.TemporaryFile()
+    write_xlsx(rows, out)
+    out.seek(0)
+    return out
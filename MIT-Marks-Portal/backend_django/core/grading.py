@@ -0,0 +1,132 @@
+# core/grading.py
+"""
+CIE grading engine.
+
+Computes "Total CIE (50)" for a whole course at once from columnar marks
+(one sequence per component, None for a blank cell). The same scheme drives
+the upload path, the Excel template formulas and the bulk recompute.
+
+  - credits == 4: best-two IA avg (40) -> 15, assignments avg (25) -> 10,
+                  lab_cie (15) + lab_test (10) added as is
+  - otherwise:    best-two IA avg (40) -> 25, asg1 + asg2 (out of 50) -> 25
+Totals are rounded up to the next whole mark.
+"""
+from array import array
+from math import ceil
+
+COMPONENTS = ["ia1", "ia2", "ia3", "asg1", "asg2", "lab_cie", "lab_test"]
+
+IA_MAX = 40.0
+ASG_MAX = 25.0
+
+# credits == 4
+IA_WEIGHT_4 = 15.0
+ASG_WEIGHT_4 = 10.0
+# 3/2/1 credits
+IA_WEIGHT_3 = 25.0
+ASG_WEIGHT_3 = 25.0
+
+
+def is_lab_scheme(credits):
+    return int(credits or 0) == 4
+
+
+def _column(values, n):
+    """Float column with blanks as 0.0, plus a presence mask."""
+    if values is None:
+        return array("d", bytes(8 * n)), bytes(n)
+    present = bytes(v is not None for v in values)
+    return array("d", [0.0 if v is None else v for v in values]), present
+
+
+def best_two_avg(ia1, ia2, ia3):
+    """Average of the two highest internals per row; blanks count as 0."""
+    out = array("d")
+    for a, b, c in zip(ia1, ia2, ia3):
+        hi, lo = (a, b) if a >= b else (b, a)
+        if c > hi:
+            out.append((c + hi) / 2.0)
+        elif c > lo:
+            out.append((hi + c) / 2.0)
+        else:
+            out.append((hi + lo) / 2.0)
+    return out
+
+
+def compute_totals(columns, credits):
+    """
+    Totals for every row of a course.
+
+    columns maps component name -> sequence of floats/None (all the same
+    length; missing components are treated as blank). Returns array('d').
+    """
+    n = max((len(v) for v in columns.values() if v is not None), default=0)
+    cols = {key: _column(columns.get(key), n) for key in COMPONENTS}
+
+    best2 = best_two_avg(cols["ia1"][0], cols["ia2"][0], cols["ia3"][0])
+    asg1, has1 = cols["asg1"]
+    asg2, has2 = cols["asg2"]
+
+    if is_lab_scheme(credits):
+        lab_cie = cols["lab_cie"][0]
+        lab_test = cols["lab_test"][0]
+        out = array("d")
+        for b, a1, a2, h1, h2, lc, lt in zip(best2, asg1, asg2, has1, has2, lab_cie, lab_test):
+            # average of the assignments that were given
+            asg_avg = (a1 + a2) / 2.0 if (h1 and h2) else a1 + a2
+            out.append(ceil(b / IA_MAX * IA_WEIGHT_4 + asg_avg / ASG_MAX * ASG_WEIGHT_4 + (lc + lt)))
+        return out
+
+    return array("d", [
+        ceil(b / IA_MAX * IA_WEIGHT_3 + (a1 + a2) / (2 * ASG_MAX) * ASG_WEIGHT_3)
+        for b, a1, a2 in zip(best2, asg1, asg2)
+    ])
+
+
+def compute_total(ia1, ia2, ia3, asg1, asg2, lab_cie, lab_test, credits):
+    """Scalar form of compute_totals for a single row (reference implementation)."""
+    # best two of the available internals, missing ones count as 0
+    internals = [x for x in (ia1, ia2, ia3) if x is not None]
+    while len(internals) < 2:
+        internals.append(0.0)
+    internals_sorted = sorted(internals, reverse=True)
+    best2_avg = (internals_sorted[0] + internals_sorted[1]) / 2.0
+
+    if asg1 is not None and asg2 is not None:
+        asg_avg = (asg1 + asg2) / 2.0
+    elif asg1 is not None:
+        asg_avg = asg1
+    elif asg2 is not None:
+        asg_avg = asg2
+    else:
+        asg_avg = 0.0
+
+    if is_lab_scheme(credits):
+        # 4-credit: IA(15) + Asg(10) + Lab(25) = 50
+        internal15 = (best2_avg / 40.0) * 15.0
+        assign10 = (asg_avg / 25.0) * 10.0
+        lab_total = (lab_cie or 0) + (lab_test or 0)
+        return ceil(internal15 + assign10 + lab_total)
+
+    # 3/2/1-credit: IA(25) + Asg(25) = 50
+    internal25 = (best2_avg / 40.0) * 25.0
+    assign_sum = (asg1 or 0) + (asg2 or 0)
+    assign25 = (assign_sum / 50.0) * 25.0  # Scale from 50 to 25
+    return ceil(internal25 + assign25)
+
+
+def excel_total_formula(credits, r):
+    """Excel formula for the template's Total CIE (50) cell on sheet row r."""
+    best2 = f"( (LARGE(D{r}:F{r},1)+LARGE(D{r}:F{r},2))/2 )"
+    if is_lab_scheme(credits):
+        # 4-credit: IA(15) + Asg(10) + Lab(25) = 50 (columns D-J, total in K)
+        return (
+            f"=CEILING( {best2}/{IA_MAX:g}*{IA_WEIGHT_4:g}"
+            f" + ( (G{r}+H{r})/2 )/{ASG_MAX:g}*{ASG_WEIGHT_4:g}"
+            f" + (I{r}+J{r}), 1)"
+        )
+    # 3/2/1-credit: IA(25) + Asg(25) = 50 (columns D-H, total in I)
+    return (
+        f"=CEILING( {best2}/{IA_MAX:g}*{IA_WEIGHT_3:g}"
+        f" + (G{r}+H{r})/{2 * ASG_MAX:g}*{ASG_WEIGHT_3:g}, 1)"
+    )
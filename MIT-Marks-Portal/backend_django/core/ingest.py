@@ -0,0 +1,180 @@
+# core/ingest.py
+"""
+Bulk marks ingestion.
+
+Turns the rows of an uploaded marks sheet into Marks records for one course
+using a bounded number of queries: the class roster is loaded once and every
+row is upserted on the (student, course) unique constraint with
+INSERT ... ON CONFLICT DO UPDATE, in a single transaction per sheet.
+"""
+from django.db import transaction
+
+from .grading import COMPONENTS, compute_totals
+from .models import Student, Marks
+from .response_cache import bump_class_version
+from .stats import StatsDelta
+from .workbook import iter_chunks
+
+
+
+class IngestError(Exception):
+    """Saving failed and the whole sheet was rolled back; errors are the messages to report."""
+
+    def __init__(self, errors):
+        super().__init__(errors[-1])
+        self.errors = errors
+
+
+# header aliases accepted for each column (lower-cased, stripped)
+COLUMN_ALIASES = {
+    "usn": ["usn", "u s n", "usn "],
+    "ia1": ["ia1 (40)", "ia1", "ia 1", "ia1 ( 40 )"],
+    "ia2": ["ia2 (40)", "ia2", "ia 2"],
+    "ia3": ["ia3 (40)", "ia3", "ia 3"],
+    "asg1": ["asg1 (25)", "asg1 (20)", "asg1", "asg 1"],
+    "asg2": ["asg2 (25)", "asg2 (20)", "asg2", "asg 2"],
+    "lab_cie": ["lab cie", "lab cie (15)", "lab_cie"],
+    "lab_test": ["lab test", "lab test (10)", "lab_test"],
+    "total": ["total cie", "total cie (50)", "total", "total cie ( 50 )"],
+}
+
+MARK_FIELDS = ["ia1", "ia2", "ia3", "asg1", "asg2", "lab_cie", "lab_test", "total"]
+
+BATCH_SIZE = 500
+
+
+def build_column_index(header_row):
+    """Map each known column to its position in the header row (or None)."""
+    headers = [str(h).lower().strip() if h is not None else "" for h in header_row]
+
+    def get_index(names):
+        for name in names:
+            if name in headers:
+                return headers.index(name)
+        return None
+
+    return {key: get_index(names) for key, names in COLUMN_ALIASES.items()}
+
+
+def _cell_float(row, i):
+    try:
+        if i is None:
+            return None
+        if i >= len(row):
+            return None
+        v = row[i]
+        if v in ("", None):
+            return None
+        return float(v)
+    except Exception:
+        return None
+
+
+def parse_marks_row(row, index):
+    """
+    Read one sheet row into (usn, values) where values holds every Marks field.
+    values["total"] is None when the sheet has no usable total.
+    Returns (None, None) for rows without a USN.
+    """
+    usn = None
+    i_usn = index.get("usn")
+    if i_usn is not None and i_usn < len(row):
+        usn = row[i_usn]
+    # if usn not provided, try column 2 as fallback
+    if not usn and len(row) >= 2:
+        usn = row[1]
+    if not usn:
+        return None, None
+
+    values = {key: _cell_float(row, index.get(key)) for key in MARK_FIELDS}
+    values["lab_cie"] = values["lab_cie"] or 0
+    values["lab_test"] = values["lab_test"] or 0
+
+    return str(usn).strip(), values
+
+
+def fill_missing_totals(rows, credits):
+    """Compute totals in one grading-engine batch for rows whose sheet total was blank."""
+    missing = [values for values in rows if values["total"] is None]
+    if not missing:
+        return
+    columns = {key: [values[key] for values in missing] for key in COMPONENTS}
+    for values, total in zip(missing, compute_totals(columns, credits)):
+        values["total"] = total
+
+
+def ingest_marks(class_obj, course_obj, rows, credits, progress=None):
+    """
+    Save parsed sheet rows as Marks for course_obj.
+
+    rows is an iterable of raw sheet rows (tuples) whose first element is the
+    header row. Rows are consumed in chunks of CHUNK_ROWS, and each chunk is
+    upserted with bulk_create(update_conflicts=True) inside one transaction.
+    progress, if given, is called as progress(rows_parsed, rows_saved) after
+    every chunk.
+    Returns (saved_rows, errors) with the same meaning as the upload API.
+    Raises IngestError if the save fails; nothing of the sheet is kept then.
+    """
+    rows = iter(rows)
+    index = build_column_index(next(rows, ()))
+
+    delta = StatsDelta()
+
+    parsed = 0
+    saved = 0
+    errors = []
+    try:
+        with transaction.atomic():
+            # one query for the roster, one for the totals the upsert may replace (CourseStats);
+            # read under the write lock (BEGIN IMMEDIATE) so a concurrent upload can't make them stale
+            roster = {s.usn: s for s in Student.objects.filter(class_info=class_obj)}
+            old_totals = dict(Marks.objects.filter(course=course_obj).values_list("student_id", "total"))
+            for chunk in iter_chunks(rows):
+                pending = {}
+                parsed += len(chunk)
+                for row in chunk:
+                    usn, values = parse_marks_row(row, index)
+                    if usn is None:
+                        continue
+
+                    student = roster.get(usn)
+                    if student is None:
+                        errors.append(f"Student with USN {usn} not found in class {class_obj}.")
+                        continue
+
+                    # a USN repeated in the sheet keeps its last row, as update_or_create did
+                    pending[student.id] = (student, values)
+                    saved += 1
+
+                fill_missing_totals([values for _, values in pending.values()], credits)
+                _write_chunk(class_obj, course_obj, pending)
+                for student_id, (_, values) in pending.items():
+                    if student_id in old_totals:
+                        delta.replace(old_totals[student_id], values["total"])
+                    else:
+                        delta.add(values["total"])
+                    old_totals[student_id] = values["total"]
+                if progress is not None:
+                    progress(parsed, saved)
+
+            delta.apply(course_obj.id)
+            bump_class_version(class_obj.id)
+    except Exception as e:
+        raise IngestError(errors + [f"Failed saving marks: {str(e)}"]) from e
+
+    return saved, errors
+
+
+def _write_chunk(class_obj, course_obj, pending):
+    objs = [
+        Marks(student=student, class_info=class_obj, course=course_obj, **values)
+        for student, values in pending.values()
+    ]
+    if objs:
+        Marks.objects.bulk_create(
+            objs,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["student", "course"],
+            update_fields=["class_info"] + MARK_FIELDS,
+        )
@@ -0,0 +1,199 @@
+# core/jobs.py
+"""
+Background processing of marks uploads.
+
+The upload view stores the file under UPLOAD_JOB_DIR, creates an UploadJob and
+hands its id to a thread pool that lives in the web worker process (no external
+broker). While a job runs, its ingest transaction holds the SQLite write lock,
+so live row counts are kept in memory and written to the UploadJob row when the
+job finishes; the status endpoint merges both.
+
+A pool dies with its worker process. Each job records the process that runs it
+(UploadJob.worker, "host:pid"), so any process can tell whether it is still
+alive; expire_stale_jobs() fails the jobs of processes that are gone, at
+startup (the expire_upload_jobs command) and whenever their status is polled.
+A worker that can't be checked from here (another host, or no process probe
+on this platform) is given UPLOAD_JOB_TIMEOUT_SECONDS. A job only moves from
+queued to running and from running to its result if nobody failed it meanwhile.
+"""
+import csv
+import logging
+import os
+import socket
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .ingest import IngestError, ingest_marks
+from .models import UploadJob
+from .workbook import open_sheet_rows
+
+# what opening or reading a bad upload raises
+READ_ERRORS = (InvalidFileException, zipfile.BadZipFile, csv.Error, UnicodeDecodeError, OSError)
+
+log = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# job id -> {"rows_parsed": .., "rows_saved": ..} for jobs running in this process
+_live_progress = {}
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.UPLOAD_JOB_WORKERS,
+                thread_name_prefix="upload-job",
+            )
+        return _executor
+
+
+def current_worker():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _worker_alive(worker):
+    """True/False if the worker process is known to be running or gone, None if it can't be checked."""
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    if int(pid) == os.getpid():
+        return True
+    if os.name != "posix":
+        return None  # os.kill(pid, 0) would terminate the process on Windows
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by another user
+    return True
+
+
+def submit_upload_job(job):
+    """
+    Queue a job on the worker pool, or run it inline when UPLOAD_JOB_WORKERS is 0.
+    The job must have been created with worker=current_worker().
+    """
+    if settings.UPLOAD_JOB_WORKERS <= 0:
+        run_upload_job(job.id)
+    else:
+        _get_executor().submit(_run_in_thread, job.id)
+
+
+def _run_in_thread(job_id):
+    try:
+        run_upload_job(job_id)
+    finally:
+        # pool threads are long lived, don't keep their DB connections open
+        connections.close_all()
+
+
+def run_upload_job(job_id):
+    # expire_stale_jobs() may have failed it while it waited
+    if not UploadJob.objects.filter(id=job_id, status="queued").update(status="running", started_at=timezone.now()):
+        return UploadJob.objects.get(id=job_id)
+    job = UploadJob.objects.select_related("class_info", "course").get(id=job_id)
+
+    live = _live_progress[job.id] = {"rows_parsed": 0, "rows_saved": 0}
+
+    def progress(parsed, saved):
+        live["rows_parsed"] = parsed
+        live["rows_saved"] = saved
+
+    try:
+        with open_sheet_rows(job.file_path) as rows:
+            saved, errors = ingest_marks(job.class_info, job.course, rows, job.credits, progress=progress)
+        job.status = "saved"
+        job.rows_saved = saved
+        job.errors = errors
+    except IngestError as e:
+        job.status = "failed"
+        job.errors = e.errors
+    except READ_ERRORS as e:
+        job.status = "failed"
+        job.errors = [f"Failed to read Excel file: {str(e)}"]
+    except Exception as e:
+        log.exception("upload job %s failed", job.id)
+        job.status = "failed"
+        job.errors = [f"Upload failed: {str(e)}"]
+    finally:
+        _live_progress.pop(job.id, None)
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+
+    job.rows_parsed = live["rows_parsed"]
+    job.finished_at = timezone.now()
+    # a job failed meanwhile by expire_stale_jobs() stays failed
+    UploadJob.objects.filter(id=job.id, status="running").update(
+        status=job.status, rows_parsed=job.rows_parsed, rows_saved=job.rows_saved,
+        errors=job.errors, finished_at=job.finished_at,
+    )
+    return job
+
+
+STALE_ERROR = "Upload was interrupted (server restart). Please upload the file again."
+
+
+def _is_stale(job, cutoff):
+    alive = _worker_alive(job.worker)
+    if alive is not None:
+        return not alive
+    return (job.started_at or job.created_at) < cutoff
+
+
+def expire_stale_jobs(jobs=None):
+    """Fail queued/running jobs whose worker process is gone; returns how many."""
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_TIMEOUT_SECONDS)
+    pending = (jobs if jobs is not None else UploadJob.objects.all()).filter(status__in=["queued", "running"])
+
+    expired = 0
+    for job in pending:
+        if not _is_stale(job, cutoff):
+            continue
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+        # only if no worker picked it up meanwhile
+        expired += UploadJob.objects.filter(id=job.id, status=job.status).update(
+            status="failed", errors=[STALE_ERROR], finished_at=timezone.now())
+    return expired
+
+
+def job_status(job):
+    """JSON-ready progress report for an UploadJob."""
+    rows_parsed = job.rows_parsed
+    rows_saved = job.rows_saved
+    live = _live_progress.get(job.id)
+    if live is not None:
+        rows_parsed = live["rows_parsed"]
+        rows_saved = live["rows_saved"]
+
+    elapsed = None
+    if job.started_at:
+        end = job.finished_at or timezone.now()
+        elapsed = round((end - job.started_at).total_seconds(), 3)
+
+    result = {
+        "status": job.status,
+        "job_id": job.id,
+        "rows_parsed": rows_parsed,
+        "saved_rows": rows_saved,
+        "elapsed": elapsed,
+    }
+    if job.errors:
+        result["errors"] = job.errors[:20]  # don't return too big list
+        result["error_count"] = len(job.errors)
+    return result
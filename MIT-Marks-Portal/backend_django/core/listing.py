@@ -0,0 +1,131 @@
+# core/listing.py
+"""
+Field projection, keyset pagination and streaming for list endpoints.
+
+get_students and get_course_marks accept:
+  fields=a,b,c   only these keys per row; the query selects only the matching
+                 columns with values_list(), no model instances are built
+  limit=N        page size (at most MAX_LIMIT); the response carries
+                 next_cursor, passed back as cursor= for the next page
+  stream=1       unpaginated: the JSON body is written out one keyset page of
+                 STREAM_CHUNK rows at a time instead of being built in memory
+
+Pages are keyed on (sl_no, id) rather than offsets, so a page costs the same
+wherever it starts and rows added meanwhile do not shift later pages. A NULL
+sl_no sorts first on every backend.
+"""
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+MAX_LIMIT = 1000
+STREAM_CHUNK = 500
+
+
+def parse_listing(request, available):
+    """(fields, limit, cursor) from the query string; raises ValueError on bad input."""
+    keys = [k.strip() for k in request.GET.get("fields", "").split(",") if k.strip()]
+    if keys:
+        unknown = [k for k in keys if k not in available]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        fields = {k: available[k] for k in keys}
+    else:
+        fields = dict(available)
+
+    limit = request.GET.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be a number")
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            sl_no, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            cursor = (None if sl_no is None else int(sl_no), int(pk))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+    return fields, limit, cursor or None
+
+
+def _encode_cursor(sl_no, pk):
+    return base64.urlsafe_b64encode(json.dumps([sl_no, pk]).encode()).decode()
+
+
+def _keyset(qs, sl_field, id_field, cursor):
+    qs = qs.order_by(F(sl_field).asc(nulls_first=True), id_field)
+    if cursor is None:
+        return qs
+    sl_no, pk = cursor
+    if sl_no is None:
+        return qs.filter(Q(**{f"{sl_field}__isnull": False}) | Q(**{f"{sl_field}__isnull": True, f"{id_field}__gt": pk}))
+    return qs.filter(Q(**{f"{sl_field}__gt": sl_no}) | Q(**{sl_field: sl_no, f"{id_field}__gt": pk}))
+
+
+def _rows(qs, fields, sl_field, id_field, cursor=None):
+    return _keyset(qs, sl_field, id_field, cursor).values_list(sl_field, id_field, *fields.values())
+
+
+def _page(rows, fields, limit):
+    more = limit is not None and len(rows) > limit
+    if more:
+        rows = rows[:limit]
+    out = [dict(zip(fields, r[2:])) for r in rows]
+    return out, _encode_cursor(rows[-1][0], rows[-1][1]) if more else None
+
+
+def page(qs, fields, sl_field, id_field, cursor=None, limit=None):
+    """(rows, next cursor or None) for one page, or every row when limit is None."""
+    rows = _rows(qs, fields, sl_field, id_field, cursor)
+    return _page(list(rows if limit is None else rows[:limit + 1]), fields, limit)
+
+
+async def apage(qs, fields, sl_field, id_field, cursor=None, limit=None):
+    """page() with the async ORM."""
+    rows = _rows(qs, fields, sl_field, id_field, cursor)
+    return _page([r async for r in (rows if limit is None else rows[:limit + 1])], fields, limit)
+
+
+def _head(head, key):
+    return json.dumps(head, cls=DjangoJSONEncoder)[:-1] + (", " if head else "") + json.dumps(key) + ": ["
+
+
+def _chunk(rows, fields, first):
+    body = ",".join(json.dumps(dict(zip(fields, r[2:])), cls=DjangoJSONEncoder) for r in rows)
+    return body if first else "," + body
+
+
+def iter_json(head, key, qs, fields, sl_field, id_field):
+    """Yield {**head, key: [rows...]} as JSON text, one keyset page of STREAM_CHUNK rows at a time."""
+    yield _head(head, key)
+    cursor, first = None, True
+    while True:
+        rows = list(_rows(qs, fields, sl_field, id_field, cursor)[:STREAM_CHUNK])
+        if rows:
+            yield _chunk(rows, fields, first)
+            first = False
+        if len(rows) < STREAM_CHUNK:
+            break
+        cursor = rows[-1][:2]
+    yield "]}"
+
+
+async def aiter_json(head, key, qs, fields, sl_field, id_field):
+    """iter_json() with the async ORM (QuerySet.aiterator() can't run values_list() on Django 4.2)."""
+    yield _head(head, key)
+    cursor, first = None, True
+    while True:
+        rows = [r async for r in _rows(qs, fields, sl_field, id_field, cursor)[:STREAM_CHUNK]]
+        if rows:
+            yield _chunk(rows, fields, first)
+            first = False
+        if len(rows) < STREAM_CHUNK:
+            break
+        cursor = rows[-1][:2]
+    yield "]}"
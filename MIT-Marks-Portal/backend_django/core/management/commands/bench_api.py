@@ -0,0 +1,46 @@
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import run_benchmark
+from core.seeding import scratch_database, seed_department
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic department into a throwaway test database and benchmark every API "
+        "(p50/p95 latency, query count, peak memory). Fails if an endpoint exceeds its query budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--semesters", type=int, default=2)
+        parser.add_argument("--sections", type=int, default=4)
+        parser.add_argument("--students", type=int, default=60)
+        parser.add_argument("--courses", type=int, default=6)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--endpoint", action="append", dest="endpoints", help="Only these endpoints")
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **opts):
+        with scratch_database():
+            cache.clear()
+            seed_department(semesters=opts["semesters"], sections=opts["sections"],
+                            students=opts["students"], courses=opts["courses"])
+            report = run_benchmark(repeat=opts["repeat"], names=opts["endpoints"])
+
+        self.stdout.write(f"{'endpoint':28} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'budget':>7} {'peak KB':>9}")
+        for r in report["endpoints"]:
+            self.stdout.write(
+                f"{r['name']:28} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['queries']:8d} "
+                f"{r['query_budget']:7d} {r['peak_kb']:9.1f}"
+            )
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"report written to {opts['output']}")
+
+        if report["failed"]:
+            raise CommandError(f"failed endpoints: {', '.join(report['failed'])}")
+        if report["over_budget"]:
+            raise CommandError(f"over query budget: {', '.join(report['over_budget'])}")
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import run_async_benchmark
+from core.seeding import scratch_database, seed_department
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and drive the async student / class listing views with AsyncClient "
+        "at increasing concurrency (one thread, one event loop)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sections", type=int, default=8)
+        parser.add_argument("--students", type=int, default=60)
+        parser.add_argument("--visits", type=int, default=400, help="Student visits (5 requests each)")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+        parser.add_argument("--output", help="Write the JSON report here")
+
+    def handle(self, *args, **opts):
+        with scratch_database():
+            seed_department(sections=opts["sections"], students=opts["students"], courses=6)
+            report = run_async_benchmark(concurrency=opts["concurrency"], visits=opts["visits"])
+
+        self.stdout.write(f"{'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'in flight':>9} "
+                          f"{'threads':>7} {'peak KB':>9}")
+        for r in report["levels"]:
+            self.stdout.write(
+                f"{r['concurrency']:11d} {r['req_per_s']:8.0f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} "
+                f"{r['peak_in_flight']:9d} {r['threads']:7d} {r['peak_kb']:9.1f}"
+            )
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"report written to {opts['output']}")
+
+        failed = sum(r["failed"] for r in report["levels"])
+        if failed:
+            raise CommandError(f"{failed} requests failed")
@@ -0,0 +1,34 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.grading import COMPONENTS, compute_total, compute_totals
+
+
+class Command(BaseCommand):
+    help = "Rows/second of the batch grading engine against the per-row scalar logic."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200000)
+
+    def handle(self, *args, **opts):
+        n = opts["rows"]
+        rng = random.Random(0)
+        columns = {key: [rng.choice([None, rng.uniform(0, 25)]) for _ in range(n)] for key in COMPONENTS}
+        rows = [dict(zip(COMPONENTS, values)) for values in zip(*(columns[key] for key in COMPONENTS))]
+
+        for credits in (3, 4):
+            start = time.perf_counter()
+            compute_totals(columns, credits)
+            batch = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for row in rows:
+                compute_total(credits=credits, **row)
+            scalar = time.perf_counter() - start
+
+            self.stdout.write(
+                f"credits={credits}  engine: {n / batch:12,.0f} rows/s"
+                f"  scalar: {n / scalar:12,.0f} rows/s"
+            )
@@ -0,0 +1,41 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.sgpa import grade_rows, semester_results
+
+
+class Command(BaseCommand):
+    help = "Time the SGPA engine on a synthetic semester, or on a real one with --branch/--semester."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1200)
+        parser.add_argument("--courses", type=int, default=8)
+        parser.add_argument("--branch")
+        parser.add_argument("--semester")
+
+    def handle(self, *args, **opts):
+        if opts["branch"] and opts["semester"]:
+            start = time.perf_counter()
+            result = semester_results(opts["branch"], opts["semester"])
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{len(result['students'])} students graded (query + grading) in {elapsed:.3f}s")
+            return
+
+        rng = random.Random(0)
+        credits = [rng.choice([1, 2, 3, 4]) for _ in range(opts["courses"])]
+        rows = [
+            (s, f"1MS{s:05d}", f"Student {s}", "ABCDEF"[s % 6], c, f"CS{c}", f"Course {c}", credits[c],
+             rng.choice([None] + [rng.uniform(0, 50)] * 20))
+            for s in range(opts["students"])
+            for c in range(opts["courses"])
+        ]
+
+        start = time.perf_counter()
+        students = grade_rows(rows)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{len(rows)} marks / {len(students)} students graded in {elapsed:.3f}s"
+            f" ({len(rows) / elapsed:,.0f} rows/s)"
+        )
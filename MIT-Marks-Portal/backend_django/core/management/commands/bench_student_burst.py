@@ -0,0 +1,93 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from core.models import Marks
+from core.seeding import scratch_database, seed_department
+from core.student_cache import student_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a result-release burst (student_check, student_subjects, summary, transcript from many "
+        "threads) against a seeded throwaway database, with the per-USN student cache off and on."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sections", type=int, default=8)
+        parser.add_argument("--students", type=int, default=60)
+        parser.add_argument("--visits", type=int, default=4000, help="Student visits (4 requests each)")
+        parser.add_argument("--threads", type=int, default=16)
+
+    def handle(self, *args, **opts):
+        with scratch_database():
+            seed_department(sections=opts["sections"], students=opts["students"], courses=6)
+            visits = list(Marks.objects.values_list("student__usn", "course_id").order_by("student_id"))
+            first_course = dict(reversed(visits))
+            rng = random.Random(0)
+            usns = list(first_course)
+            # a few students refresh a lot, most come once or twice
+            burst = [usns[min(int(rng.paretovariate(1.2)) - 1, len(usns) - 1) if rng.random() < 0.3
+                          else rng.randrange(len(usns))] for _ in range(opts["visits"])]
+
+            for size in (0, 20000):
+                with override_settings(STUDENT_CACHE_SIZE=size, METRICS_ENABLED=False):
+                    student_cache.clear()
+                    result = self.run_burst(burst, first_course, opts["threads"])
+                label = "cache off" if size == 0 else "cache on"
+                self.stdout.write(
+                    f"{label:10} {result['requests']} requests in {result['seconds']:.2f}s "
+                    f"({result['requests'] / result['seconds']:,.0f} req/s)  p50 {result['p50_ms']:.2f} ms  "
+                    f"p95 {result['p95_ms']:.2f} ms  {result['queries']} SQL queries"
+                )
+                if size:
+                    self.stdout.write(json.dumps(student_cache.stats()))
+
+    def run_burst(self, burst, first_course, threads):
+        latencies = []
+        queries = [0]
+        lock = threading.Lock()
+        local = threading.local()
+
+        def count(execute, sql, params, many, context):
+            with lock:
+                queries[0] += 1
+            return execute(sql, params, many, context)
+
+        def visit(usn):
+            if not hasattr(local, "client"):
+                local.client = Client()
+                connection.execute_wrappers.append(count)
+            client = local.client
+            timings = []
+            for call in (
+                lambda: client.post("/api/student_check/", {"usn": usn}, content_type="application/json"),
+                lambda: client.get("/api/student_subjects/", {"usn": usn}),
+                lambda: client.get("/api/student/summary/", {"usn": usn, "subject_id": first_course[usn]}),
+                lambda: client.get("/api/student/transcript/", {"usn": usn}),
+            ):
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+            with lock:
+                latencies.extend(timings)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(visit, burst))
+        seconds = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "seconds": seconds,
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[int(len(latencies) * 0.95)],
+            "queries": queries[0],
+        }
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from openpyxl import Workbook
+
+from core.workbook import open_sheet_rows, iter_chunks
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory of the full workbook loader with the streaming reader."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 40000])
+
+    def handle(self, *args, **opts):
+        for n in opts["rows"]:
+            path = self.make_workbook(n)
+            try:
+                full = self.measure(self.read_full, path)
+                stream = self.measure(self.read_streaming, path)
+            finally:
+                os.remove(path)
+            self.stdout.write(
+                f"rows={n:>6}  full: {full[0] / 1e6:8.1f} MB {full[1]:6.2f}s"
+                f"  streaming: {stream[0] / 1e6:8.1f} MB {stream[1]:6.2f}s"
+            )
+
+    def make_workbook(self, n):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Template")
+        ws.append(["SL No", "USN", "Name", "IA1", "IA2", "IA3", "ASG1", "ASG2", "Total CIE (50)"])
+        for i in range(1, n + 1):
+            ws.append([i, f"1MS{i:06d}", f"Student {i}", 30, 35, 20, 20, 22,
+                       f"=CEILING(((LARGE(D{i + 1}:F{i + 1},1)+LARGE(D{i + 1}:F{i + 1},2))/2)/40*25"
+                       f"+(G{i + 1}+H{i + 1})/50*25,1)"])
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        wb.save(path)
+        return path
+
+    def measure(self, fn, path):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, elapsed
+
+    def read_full(self, path):
+        # the loader upload_marks_for_subject used before the streaming reader
+        wb = openpyxl.load_workbook(path, data_only=False)
+        for row in wb.active.iter_rows(min_row=2, values_only=True):
+            pass
+
+    def read_streaming(self, path):
+        with open_sheet_rows(path) as rows:
+            for chunk in iter_chunks(rows):
+                pass
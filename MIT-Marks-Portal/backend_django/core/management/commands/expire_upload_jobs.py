@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from core.jobs import expire_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Fail marks upload jobs left queued or running by a worker that stopped (run at startup)."
+
+    def handle(self, *args, **opts):
+        self.stdout.write(f"Expired {expire_stale_jobs()} stale upload jobs")
@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import export_rows, iter_csv, write_xlsx
+
+
+class Command(BaseCommand):
+    help = "Export marks of all classes (optionally one branch/semester/section) to .csv or .xlsx."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Output path ending in .csv or .xlsx, or - for CSV on stdout.")
+        parser.add_argument("--branch")
+        parser.add_argument("--semester")
+        parser.add_argument("--section")
+
+    def handle(self, *args, **opts):
+        output = opts["output"]
+        if output != "-" and not output.lower().endswith((".csv", ".xlsx")):
+            raise CommandError("output must end in .csv or .xlsx")
+
+        start = time.perf_counter()
+        n = 0
+
+        def counting(source):
+            nonlocal n
+            for row in source:
+                n += 1
+                yield row
+
+        source = counting(export_rows(opts["branch"], opts["semester"], opts["section"]))
+        try:
+            if output == "-":
+                sys.stdout.writelines(iter_csv(source))
+                return
+            if output.lower().endswith(".xlsx"):
+                with open(output, "wb") as f:
+                    write_xlsx(source, f)
+            else:
+                with open(output, "w", newline="", encoding="utf-8") as f:
+                    f.writelines(iter_csv(source))
+        except OSError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{n} rows written to {output} in {time.perf_counter() - start:.2f}s")
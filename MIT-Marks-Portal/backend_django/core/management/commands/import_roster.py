@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.roster import import_rosters
+from core.workbook import open_sheet_rows
+
+
+class Command(BaseCommand):
+    help = "Import a department roster (.xlsx or .csv with branch, semester, section, sl, usn, name)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        try:
+            with open_sheet_rows(opts["path"]) as rows:
+                result = import_rosters(rows)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for c in result["classes"]:
+            self.stdout.write(
+                f"{c['branch']} Sem {c['semester']} Sec {c['section']}: "
+                f"{c['added']} added, {c['updated']} updated, {c['unchanged']} unchanged"
+            )
+        for r in result["rejects"]:
+            self.stdout.write(f"row {r['row']} rejected ({r['usn'] or '-'}): {r['reason']}")
+        self.stdout.write(
+            f"{result['rows']} rows, {result['reject_count']} rejected, "
+            f"{len(result['classes'])} classes in {time.perf_counter() - start:.2f}s"
+        )
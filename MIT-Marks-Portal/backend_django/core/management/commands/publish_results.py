@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ClassInfo
+from core.publish import publish_classes, unpublish_classes
+
+
+class Command(BaseCommand):
+    help = "Publish (or with --unpublish remove) per-student result documents for a branch/semester or one class."
+
+    def add_arguments(self, parser):
+        parser.add_argument("branch")
+        parser.add_argument("semester")
+        parser.add_argument("--section")
+        parser.add_argument("--force", action="store_true", help="Rebuild classes whose data has not changed")
+        parser.add_argument("--unpublish", action="store_true")
+
+    def handle(self, *args, **opts):
+        classes = ClassInfo.objects.filter(branch=opts["branch"], semester=opts["semester"])
+        if opts["section"]:
+            classes = classes.filter(section=opts["section"])
+        if not classes:
+            raise CommandError("No such class")
+
+        start = time.perf_counter()
+        if opts["unpublish"]:
+            removed = unpublish_classes(classes)
+            self.stdout.write(f"Removed {removed} published students")
+            return
+
+        s = publish_classes(classes, force=opts["force"])
+        self.stdout.write(
+            f"{s['classes']} classes ({s['skipped_classes']} unchanged): {s['written']} written, "
+            f"{s['unchanged']} unchanged, {s['removed']} removed in {time.perf_counter() - start:.2f}s"
+        )
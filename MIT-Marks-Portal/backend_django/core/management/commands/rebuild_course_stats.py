@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Course
+from core.stats import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute CourseStats from Marks (all courses, or one class/course)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, help="Course id")
+        parser.add_argument("--class", dest="class_", nargs=3, metavar=("BRANCH", "SEMESTER", "SECTION"))
+
+    def handle(self, *args, **opts):
+        courses = Course.objects.all()
+        if opts["course"] is not None:
+            courses = courses.filter(id=opts["course"])
+        if opts["class_"]:
+            branch, semester, section = opts["class_"]
+            courses = courses.filter(
+                class_info__branch=branch, class_info__semester=semester, class_info__section=section
+            )
+
+        n = rebuild_course_stats(courses)
+        self.stdout.write(f"Rebuilt stats for {n} courses")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ClassInfo, Course
+from core.recompute import recompute_totals, marks_in_scope
+
+
+class Command(BaseCommand):
+    help = "Rebuild Marks.total for a course, a class or the whole department."
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group(required=True)
+        scope.add_argument("--course", type=int, help="Course id")
+        scope.add_argument("--class", dest="class_", nargs=3, metavar=("BRANCH", "SEMESTER", "SECTION"))
+        scope.add_argument("--all", action="store_true", help="Every course in the department")
+
+    def handle(self, *args, **opts):
+        if opts["course"] is not None:
+            if not Course.objects.filter(id=opts["course"]).exists():
+                raise CommandError("Course not found")
+            qs = marks_in_scope(course_id=opts["course"])
+        elif opts["class_"]:
+            branch, semester, section = opts["class_"]
+            try:
+                class_obj = ClassInfo.objects.get(branch=branch, semester=semester, section=section)
+            except ClassInfo.DoesNotExist:
+                raise CommandError("Class not found")
+            qs = marks_in_scope(class_info=class_obj)
+        else:
+            qs = marks_in_scope()
+
+        result = recompute_totals(qs)
+        self.stdout.write(
+            f"{result['rows']} rows in {result['courses']} courses, "
+            f"{result['updated']} totals changed in {result['seconds']}s"
+        )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import seed_department
+
+
+class Command(BaseCommand):
+    help = "Seed a synthetic department: semesters x sections classes with students, courses and marks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", default="CSE")
+        parser.add_argument("--semesters", type=int, default=1)
+        parser.add_argument("--sections", type=int, default=4)
+        parser.add_argument("--students", type=int, default=60, help="Students per class")
+        parser.add_argument("--courses", type=int, default=6, help="Courses per class")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        start = time.perf_counter()
+        try:
+            counts = seed_department(
+                branch=opts["branch"],
+                semesters=opts["semesters"],
+                sections=opts["sections"],
+                students=opts["students"],
+                courses=opts["courses"],
+                seed=opts["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{counts['classes']} classes, {counts['students']} students, {counts['courses']} courses, "
+            f"{counts['marks']} marks in {time.perf_counter() - start:.2f}s"
+        )
@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sqlite import snapshot_database
+
+
+class Command(BaseCommand):
+    help = "Copy the live database to READ_DATABASE_SNAPSHOT (or the given path) for immutable read-only serving."
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", nargs="?")
+
+    def handle(self, *args, **opts):
+        target = opts["target"] or settings.READ_DATABASE_SNAPSHOT
+        if not target:
+            raise CommandError("Give a target path or set READ_DATABASE_SNAPSHOT")
+
+        start = time.perf_counter()
+        snapshot_database(settings.DATABASES["default"]["NAME"], target)
+        self.stdout.write(f"Snapshot written to {target} in {time.perf_counter() - start:.2f}s")
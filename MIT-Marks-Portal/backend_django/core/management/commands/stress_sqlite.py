@@ -0,0 +1,134 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from core.models import ClassInfo, Course, Marks, Student
+from core.sqlite import pragma_values
+from core.transcript import build_transcript
+
+STUDENTS = 300
+COURSES = 6
+
+
+class Command(BaseCommand):
+    help = (
+        "Multi-process SQLite stress test: mixed transcript reads and marks updates against a "
+        "scratch database, once with plain sqlite3 settings and once with the tuned connection setup. "
+        "Reports ops, 'database is locked' errors and p50/p99 latency per profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument("--profiles", default="plain,tuned")
+        # internal: run as one worker process of a profile
+        parser.add_argument("--worker", choices=["seed", "run"], help="internal")
+        parser.add_argument("--worker-seed", type=int, default=0, help="internal")
+
+    def handle(self, *args, **opts):
+        if opts["worker"] == "seed":
+            return self.seed()
+        if opts["worker"] == "run":
+            return self.run(opts)
+
+        results = {}
+        for profile in opts["profiles"].split(","):
+            results[profile] = self.run_profile(profile, opts)
+
+        self.stdout.write(f"{'profile':8} {'ops':>8} {'locked':>8} {'locked %':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for profile, r in results.items():
+            self.stdout.write(
+                f"{profile:8} {r['ops']:8d} {r['locked']:8d} {r['locked_pct']:9.2f} "
+                f"{r['p50_ms']:8.1f} {r['p99_ms']:8.1f}"
+            )
+
+    def run_profile(self, profile, opts):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "DATABASE_PATH": os.path.join(tmp, "stress.sqlite3"),
+                "SQLITE_TUNING": "1" if profile == "tuned" else "0",
+            }
+            manage = [sys.executable, sys.argv[0]]
+            subprocess.run(manage + ["migrate", "-v", "0"], env=env, check=True)
+            seeded = subprocess.run(manage + ["stress_sqlite", "--worker", "seed"],
+                                    env=env, check=True, stdout=subprocess.PIPE, text=True)
+            self.stdout.write(f"{profile}: {seeded.stdout.strip()}")
+
+            procs = [
+                subprocess.Popen(
+                    manage + ["stress_sqlite", "--worker", "run", "--worker-seed", str(i),
+                              "--seconds", str(opts["seconds"]), "--write-ratio", str(opts["write_ratio"])],
+                    env=env, stdout=subprocess.PIPE, text=True,
+                )
+                for i in range(opts["processes"])
+            ]
+            outputs = [json.loads(p.communicate()[0]) for p in procs]
+
+        latencies = sorted(ms for out in outputs for ms in out["latencies"])
+        locked = sum(out["locked"] for out in outputs)
+        ops = len(latencies) + locked
+
+        def pct(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] if latencies else 0.0
+
+        return {
+            "ops": ops,
+            "locked": locked,
+            "locked_pct": 100.0 * locked / ops if ops else 0.0,
+            "p50_ms": pct(0.50),
+            "p99_ms": pct(0.99),
+        }
+
+    def seed(self):
+        class_obj = ClassInfo.objects.create(branch="CSE", semester="5", section="A")
+        Student.objects.bulk_create([
+            Student(class_info=class_obj, sl_no=i, usn=f"1MS{i:05d}", name=f"Student {i}")
+            for i in range(1, STUDENTS + 1)
+        ])
+        students = list(Student.objects.filter(class_info=class_obj))
+        rng = random.Random(0)
+        for c in range(COURSES):
+            course = Course.objects.create(class_info=class_obj, course_name=f"Course {c}", credits=3)
+            Marks.objects.bulk_create([
+                Marks(student=s, class_info=class_obj, course=course, ia1=rng.randint(0, 40), total=rng.randint(0, 50))
+                for s in students
+            ])
+        self.stdout.write(json.dumps(pragma_values(connection)))
+
+    def run(self, opts):
+        rng = random.Random(opts["worker_seed"])
+        course_ids = list(Course.objects.values_list("id", flat=True))
+        usns = list(Student.objects.values_list("usn", flat=True))
+
+        latencies = []
+        locked = 0
+        deadline = time.perf_counter() + opts["seconds"]
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < opts["write_ratio"]:
+                    # read-then-write, like an upload or a recompute
+                    with transaction.atomic():
+                        course_id = rng.choice(course_ids)
+                        list(Marks.objects.filter(course_id=course_id).values_list("id", "total"))
+                        Marks.objects.filter(course_id=course_id).update(ia1=F("ia1") + 0)
+                else:
+                    build_transcript(rng.choice(usns))
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(json.dumps({"latencies": latencies, "locked": locked}))
@@ -0,0 +1,140 @@
+# core/matrix.py
+"""
+Class result matrix: every student of a class against every course.
+
+The matrix is loaded with one query over the roster LEFT JOINed to Marks
+(plus one for the course headings) into a flat array('d') of
+students x courses x MARK_FIELDS, NaN marking a missing value. Built
+matrices are kept in a small per-process cache keyed on the class's
+data_version, so any write to the class makes the next read rebuild it.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from io import BytesIO
+from math import isnan
+
+from openpyxl import Workbook
+
+from .ingest import MARK_FIELDS
+from .models import Course, Student
+
+NAN = float("nan")
+TOTAL = MARK_FIELDS.index("total")
+MAX_CACHED = 64
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class ResultMatrix:
+    """students x courses x MARK_FIELDS values in one flat array."""
+
+    def __init__(self, students, courses, values):
+        self.students = students  # [(student_id, sl_no, usn, name)]
+        self.courses = courses    # [(course_id, course_name, sub_code, credits)]
+        self.values = values
+
+    def value(self, s, c, f=TOTAL):
+        v = self.values[(s * len(self.courses) + c) * len(MARK_FIELDS) + f]
+        return None if isnan(v) else v
+
+    def row(self, s, components=False):
+        """Totals of student s per course, or every field per course."""
+        width = len(MARK_FIELDS)
+        start = s * len(self.courses) * width
+        cells = [None if isnan(v) else v for v in self.values[start:start + len(self.courses) * width]]
+        if components:
+            return [cells[i:i + width] for i in range(0, len(cells), width)]
+        return cells[TOTAL::width]
+
+    def to_dict(self, components=False):
+        return {
+            "courses": [
+                {"course_id": cid, "subject": name, "subcode": code or "", "credits": credits}
+                for cid, name, code, credits in self.courses
+            ],
+            "fields": MARK_FIELDS if components else ["total"],
+            "students": [
+                {"sl_no": sl_no, "usn": usn, "name": name, "marks": self.row(s, components)}
+                for s, (_, sl_no, usn, name) in enumerate(self.students)
+            ],
+        }
+
+
+def build_matrix(class_obj):
+    courses = list(
+        Course.objects.filter(class_info=class_obj)
+        .order_by("id")
+        .values_list("id", "course_name", "sub_code", "credits")
+    )
+    column = {c[0]: i for i, c in enumerate(courses)}
+    width = len(MARK_FIELDS)
+    row_width = len(courses) * width
+
+    students = []
+    values = array("d")
+    rows = (
+        Student.objects.filter(class_info=class_obj)
+        .order_by("sl_no", "usn", "id")
+        .values_list("id", "sl_no", "usn", "name", "marks__course_id", *("marks__" + f for f in MARK_FIELDS))
+    )
+    for student_id, sl_no, usn, name, course_id, *marks in rows:
+        if not students or students[-1][0] != student_id:
+            students.append((student_id, sl_no, usn, name))
+            values.extend([NAN] * row_width)
+        c = column.get(course_id)
+        if c is not None:
+            base = (len(students) - 1) * row_width + c * width
+            for f, v in enumerate(marks):
+                if v is not None:
+                    values[base + f] = v
+    return ResultMatrix(students, courses, values)
+
+
+def get_matrix(class_obj):
+    """Matrix for the class at its current data_version (built on a miss)."""
+    key = class_obj.id
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and hit[0] == class_obj.data_version:
+            _cache.move_to_end(key)
+            return hit[1]
+
+    matrix = build_matrix(class_obj)
+    with _cache_lock:
+        _cache[key] = (class_obj.data_version, matrix)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return matrix
+
+
+def clear_matrix_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def matrix_workbook(class_obj, matrix, components=False):
+    """The matrix as xlsx bytes, one row per student."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(f"{class_obj.branch} {class_obj.semester}{class_obj.section}")
+
+    header = ["SL No", "USN", "Name"]
+    for _, name, code, _ in matrix.courses:
+        label = code or name
+        if components:
+            header += [f"{label} {f.replace('_', ' ').upper()}" for f in MARK_FIELDS]
+        else:
+            header.append(label)
+    ws.append(header)
+
+    for s, (_, sl_no, usn, name) in enumerate(matrix.students):
+        cells = matrix.row(s, components)
+        if components:
+            cells = [v for course in cells for v in course]
+        ws.append([sl_no, usn, name] + cells)
+
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
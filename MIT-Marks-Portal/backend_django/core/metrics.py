@@ -0,0 +1,225 @@
+# core/metrics.py
+"""
+Per-request latency and SQL metrics in Prometheus text format.
+
+RequestMetricsMiddleware times every request and counts its SQL queries and
+their duration (no DEBUG needed). record_queries() is installed as an
+execute_wrapper on every connection when it is opened and reports to the
+recorder of the current request, found through a contextvar: async views run
+their ORM calls on sync_to_async threads with their own connections, and the
+context travels there with the call. Samples are
+added to in-process counters keyed by (metric, labels). Every
+METRICS_FLUSH_SECONDS a worker adds its pending counts to a small SQLite file
+(METRICS_DB) with one UPSERT batch, so the totals are shared by all gunicorn
+workers. The /metrics/ view flushes its own worker and renders the file.
+
+Requests slower than METRICS_SLOW_MS are logged to "core.slow_requests" with
+their queries. Streaming responses are timed up to the first byte and their
+size is not counted. The middleware is async-capable, so under ASGI it does
+not push async views back onto a thread.
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PREFIX = "marks_portal_"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_LOG_QUERIES = 50
+
+# family -> (type, help)
+FAMILIES = {
+    "request_duration_seconds": ("histogram", "Request wall time per view."),
+    "requests_total": ("counter", "Requests per view and status class."),
+    "sql_queries_total": ("counter", "SQL queries executed per view."),
+    "sql_duration_seconds_total": ("counter", "Time spent in SQL per view."),
+    "response_bytes_total": ("counter", "Response body bytes per view (non-streaming)."),
+}
+
+slow_log = logging.getLogger("core.slow_requests")
+
+_pending = defaultdict(float)
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+class _QueryRecorder:
+    """execute_wrapper that counts queries and, for the slow log, keeps their SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < SLOW_LOG_QUERIES:
+                self.queries.append((round(elapsed * 1000, 2), sql))
+
+
+_recorder = ContextVar("request_metrics_recorder", default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver: add record_queries to the connection's wrappers once."""
+    if record_queries not in connection.execute_wrappers:
+        # first, so the push/pop of execute_wrapper() blocks around it is unaffected
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+def _labels(**labels):
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def observe(view, status, seconds, queries, sql_seconds, size):
+    """Add one request to this worker's pending counters."""
+    view_label = _labels(view=view)
+    with _pending_lock:
+        for le in BUCKETS:
+            if seconds <= le:
+                _pending[("request_duration_seconds_bucket", _labels(view=view, le=le))] += 1
+        _pending[("request_duration_seconds_bucket", _labels(view=view, le="+Inf"))] += 1
+        _pending[("request_duration_seconds_sum", view_label)] += seconds
+        _pending[("request_duration_seconds_count", view_label)] += 1
+        _pending[("requests_total", _labels(view=view, status=f"{status // 100}xx"))] += 1
+        _pending[("sql_queries_total", view_label)] += queries
+        _pending[("sql_duration_seconds_total", view_label)] += sql_seconds
+        if size is not None:
+            _pending[("response_bytes_total", view_label)] += size
+
+
+def _store():
+    db = sqlite3.connect(str(settings.METRICS_DB), timeout=5)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS metrics ("
+        " name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,"
+        " PRIMARY KEY (name, labels))"
+    )
+    return db
+
+
+def flush():
+    """Add this worker's pending counters to the shared store."""
+    global _last_flush
+    with _pending_lock:
+        rows = [(name, labels, value) for (name, labels), value in _pending.items()]
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not rows:
+        return
+    db = _store()
+    try:
+        with db:
+            db.executemany(
+                "INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?)"
+                " ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                rows,
+            )
+    finally:
+        db.close()
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_SECONDS:
+        flush()
+
+
+atexit.register(flush)
+
+
+def render():
+    """All workers' metrics as Prometheus text exposition."""
+    flush()
+    db = _store()
+    try:
+        rows = db.execute("SELECT name, labels, value FROM metrics ORDER BY name, labels").fetchall()
+    finally:
+        db.close()
+
+    by_family = defaultdict(list)
+    for name, labels, value in rows:
+        family = next((f for f in FAMILIES if name == f or name.startswith(f + "_")), name)
+        by_family[family].append((name, labels, value))
+
+    lines = []
+    for family, samples in by_family.items():
+        kind, help_text = FAMILIES.get(family, ("untyped", ""))
+        lines.append(f"# HELP {PREFIX}{family} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{family} {kind}")
+        for name, labels, value in samples:
+            lines.append(f"{PREFIX}{name}{{{labels}}} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self._finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        recorder = _QueryRecorder()
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self._finish(request, response, recorder, time.perf_counter() - start)
+
+    def _finish(self, request, response, recorder, seconds):
+        match = request.resolver_match
+        view = (match.url_name or match.func.__name__) if match else "unmatched"
+        size = None if response.streaming else len(response.content)
+        observe(view, response.status_code, seconds, recorder.count, recorder.seconds, size)
+
+        if seconds * 1000 >= settings.METRICS_SLOW_MS:
+            slow_log.warning(
+                "slow request %s %s (%s): %.0f ms, %d queries, %.0f ms SQL\n%s",
+                request.method, request.path, view, seconds * 1000, recorder.count, recorder.seconds * 1000,
+                "\n".join(f"  {ms:8.2f} ms  {sql}" for ms, sql in recorder.queries),
+            )
+
+        maybe_flush()
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_delete_subjectinfo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('credits', models.IntegerField(default=3)),
+                ('file_path', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('saved', 'Saved'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('rows_parsed', models.IntegerField(default=0)),
+                ('rows_saved', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('class_info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to='core.classinfo')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to='core.course')),
+            ],
+        ),
+    ]
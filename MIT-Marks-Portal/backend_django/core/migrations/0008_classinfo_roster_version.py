@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_uploadjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classinfo',
+            name='roster_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
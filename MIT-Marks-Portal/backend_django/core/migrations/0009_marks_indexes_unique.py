@@ -0,0 +1,44 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:50
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def dedupe_marks(apps, schema_editor):
+    # keep the newest row for each (student, course) before adding the unique constraint
+    Marks = apps.get_model('core', 'Marks')
+    dupes = (
+        Marks.objects.filter(course__isnull=False)
+        .values('student_id', 'course_id')
+        .annotate(n=Count('id'), keep=Max('id'))
+        .filter(n__gt=1)
+    )
+    for d in dupes:
+        Marks.objects.filter(student_id=d['student_id'], course_id=d['course_id']).exclude(id=d['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_classinfo_roster_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_marks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='marks',
+            index=models.Index(fields=['course', 'class_info'], name='marks_course_class_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['usn'], name='student_usn_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['class_info', 'usn'], name='student_class_usn_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='marks',
+            constraint=models.UniqueConstraint(fields=('student', 'course'), name='unique_marks_student_course'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_stats(apps, schema_editor):
+    # stats for the marks saved before this table existed, as rebuild_course_stats
+    # computed them at this point (5-mark histogram buckets, 10 of them)
+    Marks = apps.get_model('core', 'Marks')
+    CourseStats = apps.get_model('core', 'CourseStats')
+    stats = {}
+    rows = Marks.objects.filter(course__isnull=False, total__isnull=False).values_list('course_id', 'total')
+    for course_id, total in rows.iterator(chunk_size=2000):
+        s = stats.get(course_id)
+        if s is None:
+            s = stats[course_id] = CourseStats(course_id=course_id, count=0, total_sum=0.0, total_sumsq=0.0,
+                                               min_total=total, max_total=total, histogram=[0] * 10)
+        s.count += 1
+        s.total_sum += total
+        s.total_sumsq += total * total
+        s.min_total = min(s.min_total, total)
+        s.max_total = max(s.max_total, total)
+        s.histogram[min(max(int(total // 5), 0), 9)] += 1
+    CourseStats.objects.bulk_create(stats.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_marks_indexes_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='core.course')),
+                ('count', models.IntegerField(default=0)),
+                ('total_sum', models.FloatField(default=0)),
+                ('total_sumsq', models.FloatField(default=0)),
+                ('min_total', models.FloatField(blank=True, null=True)),
+                ('max_total', models.FloatField(blank=True, null=True)),
+                ('histogram', models.JSONField(blank=True, default=list)),
+            ],
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
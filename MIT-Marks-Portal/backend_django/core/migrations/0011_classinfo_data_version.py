@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_coursestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classinfo',
+            name='data_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
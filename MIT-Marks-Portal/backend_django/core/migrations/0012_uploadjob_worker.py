@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_classinfo_data_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='worker',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -5,6 +5,10 @@ class ClassInfo(models.Model):
     branch = models.CharField(max_length=20)
     semester = models.CharField(max_length=5)
     section = models.CharField(max_length=5)
+    # bumped when the roster or subjects change; part of the marks template cache key
+    roster_version = models.IntegerField(default=0)
+    # bumped by every write to the class; part of the read-endpoint cache keys (core/response_cache.py)
+    data_version = models.IntegerField(default=0)
 
     class Meta:
         unique_together = ('branch', 'semester', 'section')
@@ -18,6 +22,12 @@ class Student(models.Model):
     usn = models.CharField(max_length=40)
     name = models.CharField(max_length=200)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["usn"], name="student_usn_idx"),
+            models.Index(fields=["class_info", "usn"], name="student_class_usn_idx"),
+        ]
+
     def __str__(self):
         return f"{self.usn} - {self.name}"
 
@@ -55,6 +65,14 @@ class Marks(models.Model):
     lab_test = models.FloatField(null=True, blank=True)
     total = models.FloatField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["student", "course"], name="unique_marks_student_course"),
+        ]
+        indexes = [
+            models.Index(fields=["course", "class_info"], name="marks_course_class_idx"),
+        ]
+
     def __str__(self):
         return f"{self.student.usn} - {self.course.course_name} - Marks"
     
@@ -66,3 +84,45 @@ class Subject(models.Model):
     credits = models.IntegerField(default=0)
     faculty = models.CharField(max_length=200, blank=True)
 
+
+
+class CourseStats(models.Model):
+    # Running aggregates of Marks.total for a course, kept in step by core/stats.py
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    count = models.IntegerField(default=0)
+    total_sum = models.FloatField(default=0)
+    total_sumsq = models.FloatField(default=0)
+    min_total = models.FloatField(null=True, blank=True)
+    max_total = models.FloatField(null=True, blank=True)
+    histogram = models.JSONField(default=list, blank=True)  # counts per 5-mark bucket, 0-50
+
+    def __str__(self):
+        return f"Stats - {self.course.course_name} ({self.count})"
+
+class UploadJob(models.Model):
+    # A marks upload accepted by the API and processed by the local worker pool (core/jobs.py)
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("saved", "Saved"),
+        ("failed", "Failed"),
+    ]
+
+    class_info = models.ForeignKey(ClassInfo, on_delete=models.CASCADE, related_name="upload_jobs")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="upload_jobs")
+    credits = models.IntegerField(default=3)
+    file_path = models.CharField(max_length=500)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    rows_parsed = models.IntegerField(default=0)
+    rows_saved = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    worker = models.CharField(max_length=100, blank=True, default="")  # "host:pid" of the process running it
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Upload {self.id} - {self.course.course_name} ({self.status})"
+
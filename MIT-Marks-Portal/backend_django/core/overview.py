@@ -0,0 +1,77 @@
+# core/overview.py
+"""
+Per-course upload overview.
+
+One annotated query over Course returns, for every course with uploaded marks,
+the number of students with marks, min/max/mean total and how many students
+of the class roster have no marks yet.
+"""
+from django.db.models import Avg, Count, F, IntegerField, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Course, Student
+
+
+def _overview_rows(courses):
+    """Annotate a Course queryset; yields (class_info, upload row) pairs."""
+    in_class = Q(marks__class_info=F("class_info"))
+    roster = (
+        Student.objects.filter(class_info=OuterRef("class_info"))
+        .order_by()
+        .values("class_info")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    qs = (
+        courses.annotate(
+            student_count=Count("marks", filter=in_class),
+            min_total=Min("marks__total", filter=in_class),
+            max_total=Max("marks__total", filter=in_class),
+            avg_total=Avg("marks__total", filter=in_class),
+            roster_size=Coalesce(Subquery(roster, output_field=IntegerField()), Value(0)),
+        )
+        .filter(student_count__gt=0)
+        .select_related("class_info")
+        .order_by("class_info__branch", "class_info__semester", "class_info__section", "id")
+    )
+
+    for course in qs:
+        yield course.class_info, {
+            "course_id": course.id,
+            "subject": course.course_name,
+            "subcode": course.sub_code or "",
+            "credits": course.credits,
+            "faculty": course.faculty or "",
+            "student_count": course.student_count,
+            "min_total": course.min_total,
+            "max_total": course.max_total,
+            "avg_total": round(course.avg_total, 2) if course.avg_total is not None else None,
+            "roster_size": course.roster_size,
+            "missing_count": max(course.roster_size - course.student_count, 0),
+        }
+
+
+def upload_overview(courses):
+    """Upload rows (dicts) for the courses in a queryset that have marks."""
+    return [row for _, row in _overview_rows(courses)]
+
+
+def department_overview(branch=None, semester=None):
+    """Upload overview for every class (optionally one branch/semester), grouped by class."""
+    courses = Course.objects.all()
+    if branch:
+        courses = courses.filter(class_info__branch=branch)
+    if semester:
+        courses = courses.filter(class_info__semester=semester)
+
+    classes = {}
+    for c, row in _overview_rows(courses):
+        if c.id not in classes:
+            classes[c.id] = {
+                "branch": c.branch,
+                "semester": c.semester,
+                "section": c.section,
+                "uploads": [],
+            }
+        classes[c.id]["uploads"].append(row)
+    return list(classes.values())
@@ -0,0 +1,205 @@
+# core/publish.py
+"""
+Publish mode: precomputed per-student result documents on disk.
+
+publish_classes() writes, for every student of the given classes, the same
+transcript the student API returns as
+    PUBLISH_DIR/students/<doc_key>.<content hash>.json   (immutable)
+plus a small pointer PUBLISH_DIR/students/<file_key>.json naming the current
+document. The dashboard reads the pointer, then the document, and only falls
+back to the API when a student has not been published. On result day those
+reads are plain file responses: no ORM, no SQLite.
+
+A USN is only unique within a class, so documents are named per class and
+student; the pointer for a USN names the document of the first Student row
+with that USN, the one the student API serves.
+
+The /results/ view is Django's static serve(), which is fine for development
+and small deployments but not meant for production: put PUBLISH_DIR behind
+the front web server or CDN under PUBLISH_URL (see DEPLOYMENT_GUIDE.md).
+
+Republishing is incremental. A per-class manifest records the data_version
+it was built from and each student's document hash. An unchanged class is
+skipped without reading its marks, and only documents whose content changed
+are rewritten. The previous document is kept for one more publish so a
+client holding a slightly old pointer still gets a response.
+"""
+import hashlib
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Student
+from .transcript import class_transcripts
+
+STUDENTS_DIR = "students"
+MANIFEST_DIR = "manifests"
+
+# <usn>.<12 hex>.json: safe to cache forever
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.json$")
+
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+def _key(usn, salt):
+    # readable prefix, and a hash of the raw value so "AB.1" and "AB_1" differ
+    return f"{_UNSAFE.sub('_', usn)}-{hashlib.sha1(salt.encode()).hexdigest()[:10]}"
+
+
+def file_key(usn):
+    """Pointer name for a USN (the dashboard applies the same rule)."""
+    return _key(usn, usn)
+
+
+def doc_key(class_id, usn):
+    """Document name prefix for the student with this USN in this class."""
+    return _key(usn, f"{class_id}:{usn}")
+
+
+def _root():
+    return str(settings.PUBLISH_DIR)
+
+
+def _write(path, data):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _manifest_path(class_id):
+    return os.path.join(_root(), MANIFEST_DIR, f"class-{class_id}.json")
+
+
+def _load_manifest(class_id):
+    try:
+        with open(_manifest_path(class_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"data_version": None, "students": {}}
+
+
+def _doc_name(key, digest):
+    return f"{key}.{digest}.json"
+
+
+def _entry(manifest, key):
+    """[current hash, previous hash, pointer key or None] of a manifest entry."""
+    entry = manifest["students"].get(key)
+    if entry is None:
+        return [None, None, None]
+    return entry if len(entry) > 2 else entry + [key]  # older manifests: pointer named like the docs
+
+
+def _remove_pointer(pointer, key):
+    """Remove a USN's pointer unless it now names another class's document."""
+    path = os.path.join(_root(), STUDENTS_DIR, f"{pointer}.json")
+    try:
+        with open(path) as f:
+            doc = json.load(f)["doc"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return
+    if doc.rsplit("/", 1)[-1].startswith(f"{key}."):
+        _remove(path)
+
+
+def _drop_student(key, entry):
+    students_dir = os.path.join(_root(), STUDENTS_DIR)
+    current, previous, pointer = entry
+    if pointer:
+        _remove_pointer(pointer, key)
+    for digest in (current, previous):
+        if digest:
+            _remove(os.path.join(students_dir, _doc_name(key, digest)))
+
+
+def _pointer_classes(class_ids):
+    """{usn: class id of the first Student row with it} for the USNs of the classes."""
+    usns = Student.objects.filter(class_info_id__in=class_ids).values("usn")
+    rows = Student.objects.filter(usn__in=usns).order_by("-id").values_list("usn", "class_info_id")
+    return dict(rows)  # descending ids: the lowest id is written last and wins
+
+
+def publish_classes(classes, force=False):
+    """
+    Publish (or refresh) every student of the ClassInfo objects.
+    Returns {"classes", "written", "unchanged", "removed", "skipped_classes"}.
+    """
+    students_dir = os.path.join(_root(), STUDENTS_DIR)
+    os.makedirs(students_dir, exist_ok=True)
+    os.makedirs(os.path.join(_root(), MANIFEST_DIR), exist_ok=True)
+
+    summary = {"classes": 0, "written": 0, "unchanged": 0, "removed": 0, "skipped_classes": 0}
+    manifests = {}
+    to_build = []
+    for c in classes:
+        summary["classes"] += 1
+        manifest = _load_manifest(c.id)
+        if not force and manifest["data_version"] == c.data_version:
+            summary["skipped_classes"] += 1
+            summary["unchanged"] += len(manifest["students"])
+            continue
+        manifests[c.id] = (c, manifest, {})
+        to_build.append(c.id)
+
+    published_at = timezone.now().isoformat()
+    owners = _pointer_classes(to_build) if to_build else {}
+    for class_id, usn, transcript in class_transcripts(to_build) if to_build else ():
+        _, manifest, seen = manifests[class_id]
+        key = doc_key(class_id, usn)
+        pointer = file_key(usn) if owners.get(usn) == class_id else None
+        body = json.dumps({"status": "success", **transcript}, cls=DjangoJSONEncoder, sort_keys=True).encode()
+        digest = hashlib.sha1(body).hexdigest()[:12]
+        current, previous, old_pointer = _entry(manifest, key)
+        seen[key] = [current, previous, pointer]
+
+        if digest == current and pointer == old_pointer:
+            summary["unchanged"] += 1
+            continue
+
+        if digest != current:
+            _write(os.path.join(students_dir, _doc_name(key, digest)), body)
+        if pointer:
+            doc = {"usn": usn, "doc": f"{settings.PUBLISH_URL}{STUDENTS_DIR}/{_doc_name(key, digest)}",
+                   "published_at": published_at}
+            _write(os.path.join(students_dir, f"{pointer}.json"), json.dumps(doc).encode())
+        elif old_pointer:
+            _remove_pointer(old_pointer, key)  # another class now holds the USN
+        if digest != current:
+            if previous and previous != digest:
+                _remove(os.path.join(students_dir, _doc_name(key, previous)))
+            seen[key] = [digest, current, pointer]
+        summary["written"] += 1
+
+    for c, manifest, seen in manifests.values():
+        for key in manifest["students"]:
+            if key not in seen:
+                _drop_student(key, _entry(manifest, key))  # no longer on the roster
+                summary["removed"] += 1
+        _write(_manifest_path(c.id), json.dumps({"data_version": c.data_version, "students": seen}).encode())
+
+    return summary
+
+
+def unpublish_classes(classes):
+    """Remove every published document of the classes; returns the number of students removed."""
+    removed = 0
+    for c in classes:
+        manifest = _load_manifest(c.id)
+        for key in manifest["students"]:
+            _drop_student(key, _entry(manifest, key))
+            removed += 1
+        _remove(_manifest_path(c.id))
+    return removed
@@ -0,0 +1,97 @@
+# core/recompute.py
+"""
+Bulk recompute of stored Marks.total.
+
+Marks are read in batches with one values query (joined to Course for the
+credits), totals are re-derived with the grading engine and written back with
+bulk_update, all inside one transaction together with the CourseStats delta. Rows with no IA or
+assignment marks keep their stored total, since it can only have come from the
+sheet (ingest stores blank lab columns as 0, so those don't tell).
+"""
+import time
+from itertools import groupby
+
+from django.db import transaction
+
+from .grading import COMPONENTS, compute_totals
+from .models import Course, Marks
+from .response_cache import bump_class_version
+from .stats import StatsDelta
+
+READ_CHUNK = 2000
+BATCH_SIZE = 500
+# positions in COMPONENTS of the IA and assignment marks
+SCORED = [COMPONENTS.index(key) for key in ("ia1", "ia2", "ia3", "asg1", "asg2")]
+
+
+def recompute_totals(marks_qs):
+    """
+    Re-derive total for every row of marks_qs using each course's current credits.
+    Returns {"rows": rows_read, "updated": rows_changed, "courses": n, "seconds": t}.
+    """
+    start = time.perf_counter()
+    rows_read = 0
+    updated = 0
+    courses = 0
+    changed = []
+    deltas = {}
+
+    fields = ["id", "course_id", "course__credits", "total"] + COMPONENTS
+    rows = (
+        marks_qs.filter(course__isnull=False)
+        .order_by("course_id", "id")
+        .values_list(*fields)
+        .iterator(chunk_size=READ_CHUNK)
+    )
+
+    with transaction.atomic():
+        for (course_id, credits), group in groupby(rows, key=lambda r: (r[1], r[2])):
+            courses += 1
+            group = list(group)
+            rows_read += len(group)
+            group = [r for r in group if any(r[4 + i] is not None for i in SCORED)]
+            if not group:
+                continue
+
+            columns = {key: [r[4 + i] for r in group] for i, key in enumerate(COMPONENTS)}
+            totals = compute_totals(columns, credits)
+            delta = deltas[course_id] = StatsDelta()
+            for r, total in zip(group, totals):
+                if r[3] != total:
+                    changed.append(Marks(id=r[0], total=total))
+                    delta.replace(r[3], total)
+
+            if len(changed) >= BATCH_SIZE:
+                updated += _flush(changed)
+                changed = []
+
+        updated += _flush(changed)
+        for course_id, delta in deltas.items():
+            delta.apply(course_id)
+        if updated:
+            class_ids = Course.objects.filter(id__in=deltas).values_list("class_info_id", flat=True)
+            bump_class_version(*set(class_ids))
+
+    return {
+        "rows": rows_read,
+        "updated": updated,
+        "courses": courses,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def _flush(changed):
+    if changed:
+        Marks.objects.bulk_update(changed, ["total"], batch_size=BATCH_SIZE)
+    return len(changed)
+
+
+def marks_in_scope(course_id=None, class_info=None):
+    """Marks queryset for one course, one class, or the whole department."""
+    qs = Marks.objects.all()
+    if course_id is not None:
+        qs = qs.filter(course_id=course_id)
+    if class_info is not None:
+        qs = qs.filter(class_info=class_info)
+    return qs
+
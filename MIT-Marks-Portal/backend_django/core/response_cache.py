@@ -0,0 +1,99 @@
+# core/response_cache.py
+"""
+Versioned per-class response cache for read endpoints.
+
+Every write that changes what a class's read endpoints return bumps
+ClassInfo.data_version in the database. Cached bodies are keyed on
+(endpoint, class id, data_version, query string), so invalidation is a single
+UPDATE and a stale entry can never be served; old versions just age out of
+the cache. The key also yields the ETag, letting a browser revalidate with
+If-None-Match and get a 304 without the body being built or fetched.
+"""
+import hashlib
+import json
+import threading
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import HttpResponse
+
+from .models import ClassInfo
+
+CACHE_TIMEOUT = 24 * 3600
+
+_counters = {"hits": 0, "misses": 0, "not_modified": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def cache_counters():
+    """Hit/miss/304 counters of this process."""
+    with _counters_lock:
+        counters = dict(_counters)
+    lookups = counters["hits"] + counters["misses"]
+    counters["hit_ratio"] = round(counters["hits"] / lookups, 3) if lookups else None
+    return counters
+
+
+def bump_class_version(*class_ids):
+    """Invalidate every cached read response of the given classes."""
+    ClassInfo.objects.filter(id__in=class_ids).update(data_version=F("data_version") + 1)
+
+    from .student_cache import student_cache
+    student_cache.versions_changed()
+
+
+def _key_and_etag(request, class_obj, name):
+    key = f"resp:{name}:{class_obj.id}:{class_obj.data_version}:{request.GET.urlencode()}"
+    return key, '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+
+
+def _response(body, etag):
+    response = HttpResponse(status=304) if body is None else HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def cached_json_response(request, class_obj, name, build):
+    """
+    JSON response for a read endpoint of class_obj, served from cache when the
+    class has not changed. build() returns the response dict on a miss.
+    """
+    key, etag = _key_and_etag(request, class_obj, name)
+
+    if request.headers.get("If-None-Match") == etag:
+        _count("not_modified")
+        return _response(None, etag)
+
+    body = cache.get(key)
+    if body is None:
+        _count("misses")
+        body = json.dumps(build(), cls=DjangoJSONEncoder).encode()
+        cache.set(key, body, CACHE_TIMEOUT)
+    else:
+        _count("hits")
+    return _response(body, etag)
+
+
+async def acached_json_response(request, class_obj, name, abuild):
+    """cached_json_response() for async views; abuild() is awaited on a miss."""
+    key, etag = _key_and_etag(request, class_obj, name)
+
+    if request.headers.get("If-None-Match") == etag:
+        _count("not_modified")
+        return _response(None, etag)
+
+    body = await cache.aget(key)
+    if body is None:
+        _count("misses")
+        body = json.dumps(await abuild(), cls=DjangoJSONEncoder).encode()
+        await cache.aset(key, body, CACHE_TIMEOUT)
+    else:
+        _count("hits")
+    return _response(body, etag)
@@ -0,0 +1,207 @@
+# core/roster.py
+"""
+Roster sync keyed by USN.
+
+The submitted roster is diffed against the class's current students: new USNs
+are bulk inserted, changed names / serial numbers are bulk updated and USNs no
+longer listed are removed with one filtered delete. Existing Student ids, and
+therefore their marks, are kept.
+
+import_rosters() loads a department-wide sheet (every branch/semester/section
+at once): missing classes are created in one pass and students are added or
+updated with batched writes in a single transaction. It never removes anyone.
+"""
+from django.db import transaction
+
+from .models import ClassInfo, Course, Student
+from .response_cache import bump_class_version
+from .sheet_template import bump_roster_version
+from .stats import rebuild_course_stats
+
+BATCH_SIZE = 500
+
+
+def _sl_no(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def sync_roster(class_obj, students):
+    """
+    Make the class roster equal to `students` (dicts with sl, usn, name).
+    Returns a change summary: added / updated / removed / unchanged counts.
+    """
+    # a USN listed twice keeps its last row
+    wanted = {}
+    for s in students:
+        usn = str(s["usn"]).strip()
+        if usn:
+            wanted[usn] = (_sl_no(s.get("sl")), s.get("name") or "")
+
+    with transaction.atomic():
+        current = {}
+        duplicates = []
+        for stu in Student.objects.filter(class_info=class_obj).order_by("id"):
+            if stu.usn in current:
+                duplicates.append(stu.id)  # left over from the old delete-and-recreate flow
+            else:
+                current[stu.usn] = stu
+
+        to_create = []
+        to_update = []
+        for usn, (sl_no, name) in wanted.items():
+            stu = current.get(usn)
+            if stu is None:
+                to_create.append(Student(class_info=class_obj, sl_no=sl_no, usn=usn, name=name))
+            elif stu.sl_no != sl_no or stu.name != name:
+                stu.sl_no = sl_no
+                stu.name = name
+                to_update.append(stu)
+
+        removed_ids = [stu.id for usn, stu in current.items() if usn not in wanted] + duplicates
+
+        if to_create:
+            Student.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            Student.objects.bulk_update(to_update, ["sl_no", "name"], batch_size=BATCH_SIZE)
+        if removed_ids:
+            Student.objects.filter(id__in=removed_ids).delete()
+
+        changed = bool(to_create or to_update or removed_ids)
+        if changed:
+            bump_roster_version(class_obj.id)
+            bump_class_version(class_obj.id)
+        if removed_ids:
+            # removed students take their marks with them
+            rebuild_course_stats(Course.objects.filter(class_info=class_obj))
+
+    return {
+        "added": len(to_create),
+        "updated": len(to_update),
+        "removed": len(removed_ids),
+        "unchanged": len(wanted) - len(to_create) - len(to_update),
+    }
+
+
+# header aliases for department roster sheets (lower-cased, stripped)
+ROSTER_COLUMNS = {
+    "branch": ["branch", "dept", "department"],
+    "semester": ["semester", "sem"],
+    "section": ["section", "sec"],
+    "sl": ["sl", "sl no", "sl_no", "sl. no", "slno"],
+    "usn": ["usn", "u s n"],
+    "name": ["name", "student name", "student_name"],
+}
+REQUIRED = ["branch", "semester", "section", "usn"]
+MAX_REJECTS = 100
+
+
+def _roster_index(header_row):
+    headers = [str(h).lower().strip() if h is not None else "" for h in header_row]
+    index = {}
+    for key, names in ROSTER_COLUMNS.items():
+        index[key] = next((headers.index(n) for n in names if n in headers), None)
+    return index
+
+
+def _cell(row, i):
+    if i is None or i >= len(row) or row[i] is None:
+        return ""
+    v = row[i]
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    return str(v).strip()
+
+
+def import_rosters(rows):
+    """
+    Import students from an iterable of sheet rows (first row = header).
+    Returns {"classes": [{branch, semester, section, added, updated, unchanged}],
+             "rejects": [...], "reject_count": n, "rows": n}.
+    """
+    rows = iter(rows)
+    index = _roster_index(next(rows, ()))
+    missing = [key for key in REQUIRED if index[key] is None]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    # stream-parse and group by class; a USN may appear only once in the file
+    by_class = {}
+    seen = {}
+    rejects = []
+    reject_count = 0
+    n_rows = 0
+    for line, row in enumerate(rows, start=2):
+        if not any(v not in (None, "") for v in row):
+            continue
+        n_rows += 1
+        values = {key: _cell(row, i) for key, i in index.items()}
+        reason = None
+        if not all(values[key] for key in REQUIRED):
+            reason = "missing branch/semester/section/usn"
+        elif len(values["semester"]) > 5 or len(values["section"]) > 5 or len(values["branch"]) > 20:
+            reason = "branch/semester/section too long"
+        elif values["usn"] in seen:
+            reason = f"duplicate USN (also on row {seen[values['usn']]})"
+        if reason:
+            reject_count += 1
+            if len(rejects) < MAX_REJECTS:
+                rejects.append({"row": line, "usn": values["usn"], "reason": reason})
+            continue
+
+        seen[values["usn"]] = line
+        key = (values["branch"], values["semester"], values["section"])
+        by_class.setdefault(key, {})[values["usn"]] = (_sl_no(values["sl"]), values["name"])
+
+    summary = []
+    with transaction.atomic():
+        # missing classes in one pass, then one query for all their ids
+        ClassInfo.objects.bulk_create(
+            [ClassInfo(branch=b, semester=sem, section=sec) for b, sem, sec in by_class],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        classes = {}
+        for c in ClassInfo.objects.filter(branch__in={k[0] for k in by_class},
+                                          semester__in={k[1] for k in by_class}):
+            key = (c.branch, c.semester, c.section)
+            if key in by_class:
+                classes[key] = c
+
+        existing = {}
+        for stu in Student.objects.filter(class_info__in=classes.values()).order_by("id"):
+            existing.setdefault((stu.class_info_id, stu.usn), stu)
+
+        to_create = []
+        to_update = []
+        touched = []
+        for key, students in by_class.items():
+            class_obj = classes[key]
+            counts = {"added": 0, "updated": 0, "unchanged": 0}
+            for usn, (sl_no, name) in students.items():
+                stu = existing.get((class_obj.id, usn))
+                if stu is None:
+                    to_create.append(Student(class_info=class_obj, sl_no=sl_no, usn=usn, name=name))
+                    counts["added"] += 1
+                elif stu.sl_no != sl_no or stu.name != name:
+                    stu.sl_no = sl_no
+                    stu.name = name
+                    to_update.append(stu)
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+            if counts["added"] or counts["updated"]:
+                touched.append(class_obj.id)
+            summary.append({"branch": key[0], "semester": key[1], "section": key[2], **counts})
+
+        if to_create:
+            Student.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        if to_update:
+            Student.objects.bulk_update(to_update, ["sl_no", "name"], batch_size=BATCH_SIZE)
+        if touched:
+            bump_roster_version(*touched)
+            bump_class_version(*touched)
+
+    return {"classes": summary, "rows": n_rows, "rejects": rejects, "reject_count": reject_count}
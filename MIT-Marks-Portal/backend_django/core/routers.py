@@ -0,0 +1,79 @@
+# core/routers.py
+"""
+Read/write database routing.
+
+Student-facing and reporting views are wrapped in @read_only_database. Inside
+them, ORM reads go to settings.READ_DATABASE_ALIAS: the same SQLite file opened
+with mode=ro and PRAGMA query_only (or an immutable snapshot of it, see the
+snapshot_database command), so result-day traffic never takes a write lock
+and never competes with a teacher's upload transaction. Everything else,
+and every write, uses "default". That includes the teacher pages' reads
+(subjects, roster, templates, uploaded marks): they must show a teacher's own
+upload at once, not whenever a snapshot is next refreshed.
+
+Reads fall back to "default" when:
+  - the read alias is not configured (any backend, any deployment),
+  - "default" is inside an atomic block (read your own uncommitted writes),
+  - the read alias points at the same database as "default" (test mirror).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_read_only = ContextVar("read_only_database", default=False)
+
+
+@contextmanager
+def read_only_context():
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only_database(view):
+    """Route the view's ORM reads to the read-only alias (sync or async views)."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            with read_only_context():
+                return await view(*args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with read_only_context():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def read_alias():
+    """The alias reads should use right now."""
+    alias = getattr(settings, "READ_DATABASE_ALIAS", None)
+    if not _read_only.get() or not alias or alias not in settings.DATABASES:
+        return DEFAULT_DB_ALIAS
+    default = connections[DEFAULT_DB_ALIAS]
+    if default.in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    if connections[alias].settings_dict["NAME"] == default.settings_dict["NAME"]:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+class ReadOnlyRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # both aliases are the same data
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
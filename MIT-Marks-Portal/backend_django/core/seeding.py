@@ -0,0 +1,107 @@
+# core/seeding.py
+"""
+Synthetic department data for benchmarks and load tests.
+
+seed_department() creates semesters x sections classes of one branch, each
+with a roster, the same set of subjects/courses and a Marks row per student
+and course. Components are random; totals go through the grading engine so
+they match what an upload would store. Everything is written with bulk
+inserts in one transaction and CourseStats are rebuilt at the end.
+
+scratch_database() gives the benchmark commands a throwaway test database,
+with the read-only alias mirrored onto it so routed reads see the seed data.
+"""
+import random
+import string
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+
+from .grading import COMPONENTS, compute_totals
+from .models import ClassInfo, Course, Marks, Student, Subject
+from .stats import rebuild_course_stats
+
+BATCH_SIZE = 500
+
+
+@contextmanager
+def scratch_database():
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    mirrored = {}
+    for alias in connections:
+        if alias != DEFAULT_DB_ALIAS:
+            connections[alias].close()
+            mirrored[alias] = connections[alias].settings_dict["NAME"]
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        yield
+    finally:
+        for alias, name in mirrored.items():
+            connections[alias].close()
+            connections[alias].settings_dict["NAME"] = name
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def _section_names(n):
+    letters = string.ascii_uppercase
+    return [letters[i] if i < len(letters) else f"S{i + 1}" for i in range(n)]
+
+
+def _component(rng, key, credits):
+    if rng.random() < 0.05:
+        return None  # absent / not entered
+    if key.startswith("ia"):
+        return float(rng.randint(5, 40))
+    if key.startswith("asg"):
+        return float(rng.randint(5, 25))
+    if credits != 4:
+        return None
+    return float(rng.randint(3, 15 if key == "lab_cie" else 10))
+
+
+def seed_department(branch="CSE", semesters=1, sections=4, students=60, courses=6, seed=0):
+    """
+    Create the department and return {"classes", "students", "courses", "marks"} counts.
+    Raises ValueError if any of the classes already exists.
+    """
+    rng = random.Random(seed)
+    keys = [(branch, str(sem), sec) for sem in range(1, semesters + 1) for sec in _section_names(sections)]
+    if ClassInfo.objects.filter(branch=branch, semester__in={k[1] for k in keys},
+                                section__in={k[2] for k in keys}).exists():
+        raise ValueError(f"{branch} already has classes for these semesters/sections")
+
+    counts = {"classes": 0, "students": 0, "courses": 0, "marks": 0}
+    with transaction.atomic():
+        classes = ClassInfo.objects.bulk_create([ClassInfo(branch=b, semester=sem, section=sec) for b, sem, sec in keys])
+        counts["classes"] = len(classes)
+
+        for class_obj in classes:
+            roster = Student.objects.bulk_create([
+                Student(class_info=class_obj, sl_no=i, name=f"Student {i}",
+                        usn=f"1{branch[:2]}{class_obj.semester}{class_obj.section}{i:04d}")
+                for i in range(1, students + 1)
+            ], batch_size=BATCH_SIZE)
+            counts["students"] += len(roster)
+
+            for c in range(courses):
+                credits = 4 if c % 3 == 0 else 3
+                name = f"{branch} Course {class_obj.semester}.{c + 1}"
+                code = f"{branch[:2]}{class_obj.semester}{c + 1:02d}"
+                Subject.objects.create(class_info=class_obj, subject=name, subcode=code,
+                                       credits=credits, faculty=f"Faculty {c + 1}")
+                course = Course.objects.create(class_info=class_obj, course_name=name, sub_code=code,
+                                               credits=credits, faculty=f"Faculty {c + 1}")
+                counts["courses"] += 1
+
+                columns = {key: [_component(rng, key, credits) for _ in roster] for key in COMPONENTS}
+                totals = compute_totals(columns, credits)
+                Marks.objects.bulk_create([
+                    Marks(student=s, class_info=class_obj, course=course, total=totals[i],
+                          **{key: columns[key][i] for key in COMPONENTS})
+                    for i, s in enumerate(roster)
+                ], batch_size=BATCH_SIZE)
+                counts["marks"] += len(roster)
+
+        rebuild_course_stats(Course.objects.filter(class_info__in=classes))
+
+    return counts
@@ -0,0 +1,157 @@
+# core/sgpa.py
+"""
+Letter grades and credit-weighted SGPA for a class or a whole semester.
+
+All Marks of the scope are read with one query joined to Student and Course
+and graded in a single pass: each total is turned into a percentage of
+TOTAL_MAX, looked up in the grade scale with bisect, and folded into its
+student's credit-weighted sum. A course with no total is left ungraded and
+marks the student incomplete; an F still counts towards the credits attempted.
+
+Results are cached under the data_version of every class in the scope plus
+the grade scale, so any marks or course change regrades on the next read.
+"""
+import hashlib
+from bisect import bisect_right
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from openpyxl import Workbook
+
+from .models import ClassInfo, Marks
+
+TOTAL_MAX = 50.0
+CACHE_TIMEOUT = 24 * 3600
+
+# (minimum percentage, grade, grade points); settings.GRADE_SCALE overrides
+DEFAULT_GRADE_SCALE = [
+    (90, "O", 10),
+    (80, "A+", 9),
+    (70, "A", 8),
+    (60, "B+", 7),
+    (55, "B", 6),
+    (50, "C", 5),
+    (40, "P", 4),
+    (0, "F", 0),
+]
+
+
+def grade_scale():
+    """The configured scale, lowest boundary first."""
+    return sorted(getattr(settings, "GRADE_SCALE", DEFAULT_GRADE_SCALE), key=lambda g: g[0])
+
+
+def grade_rows(rows, scale=None):
+    """
+    Grade marks rows of the form
+        (student_id, usn, name, section, course_id, sub_code, course_name, credits, total)
+    sorted so each student's rows are adjacent. Returns one dict per student.
+    """
+    scale = scale or grade_scale()
+    bounds = [g[0] for g in scale]
+    letters = [g[1] for g in scale]
+    points = [g[2] for g in scale]
+    to_pct = 100.0 / TOTAL_MAX
+
+    students = []
+    current = None
+    for student_id, usn, name, section, course_id, sub_code, course_name, credits, total in rows:
+        if current is None or current["student_id"] != student_id:
+            current = {
+                "student_id": student_id,
+                "usn": usn,
+                "name": name,
+                "section": section,
+                "credits": 0,
+                "credits_earned": 0,
+                "weighted": 0.0,
+                "incomplete": False,
+                "grades": [],
+            }
+            students.append(current)
+
+        credits = credits or 0
+        if total is None:
+            current["incomplete"] = True
+            grade = gp = None
+        else:
+            i = max(bisect_right(bounds, total * to_pct) - 1, 0)
+            grade, gp = letters[i], points[i]
+            current["credits"] += credits
+            current["weighted"] += gp * credits
+            if gp > 0:
+                current["credits_earned"] += credits
+        current["grades"].append({
+            "course_id": course_id,
+            "subcode": sub_code or "",
+            "subject": course_name,
+            "credits": credits,
+            "total": total,
+            "grade": grade,
+            "points": gp,
+        })
+
+    for s in students:
+        weighted = s.pop("weighted")
+        del s["student_id"]
+        s["sgpa"] = round(weighted / s["credits"], 2) if s["credits"] else None
+    return students
+
+
+def _marks_rows(classes):
+    return (
+        Marks.objects.filter(class_info__in=classes, course__isnull=False)
+        .order_by("class_info__section", "student__sl_no", "student_id", "course_id")
+        .values_list(
+            "student_id", "student__usn", "student__name", "class_info__section",
+            "course_id", "course__sub_code", "course__course_name", "course__credits", "total",
+        )
+        .iterator(chunk_size=2000)
+    )
+
+
+def semester_results(branch, semester, section=None):
+    """
+    Graded students of a branch/semester (optionally one section):
+    {"branch", "semester", "section", "students": [...]}.
+    """
+    classes = ClassInfo.objects.filter(branch=branch, semester=semester)
+    if section:
+        classes = classes.filter(section=section)
+    versions = sorted(classes.values_list("id", "data_version"))
+
+    scale = grade_scale()
+    digest = hashlib.sha1(repr((versions, scale)).encode()).hexdigest()
+    key = f"sgpa:{branch}:{semester}:{section or ''}:{digest}"
+    result = cache.get(key)
+    if result is None:
+        ids = [class_id for class_id, _ in versions]
+        result = {
+            "branch": branch,
+            "semester": semester,
+            "section": section or "",
+            "students": grade_rows(_marks_rows(ids), scale) if ids else [],
+        }
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+def results_workbook(result):
+    """SGPA sheet (one row per student) plus a long-format Grades sheet, as xlsx bytes."""
+    wb = Workbook(write_only=True)
+    summary = wb.create_sheet("SGPA")
+    summary.append(["Section", "USN", "Name", "Credits", "Credits Earned", "SGPA", "Incomplete"])
+    grades = wb.create_sheet("Grades")
+    grades.append(["Section", "USN", "Sub Code", "Subject", "Credits", "Total", "Grade", "Points"])
+
+    for s in result["students"]:
+        summary.append([s["section"], s["usn"], s["name"], s["credits"], s["credits_earned"],
+                        s["sgpa"], "Yes" if s["incomplete"] else ""])
+        for g in s["grades"]:
+            grades.append([s["section"], s["usn"], g["subcode"], g["subject"], g["credits"],
+                           g["total"], g["grade"], g["points"]])
+
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
@@ -0,0 +1,95 @@
+# core/sheet_template.py
+"""
+Marks template workbooks.
+
+Templates are generated with openpyxl's write-only mode and the finished bytes
+are cached under (subject id, credits, roster version). ClassInfo.roster_version
+is bumped whenever a class's roster or subjects change, so a stale template is
+never served and repeat downloads skip generation entirely.
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.cache import cache
+from django.db.models import F
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+
+from .grading import excel_total_formula, is_lab_scheme
+from .models import ClassInfo, Student
+
+CACHE_TIMEOUT = 7 * 24 * 3600
+
+HEADERS_LAB = ["SL No", "USN", "Name", "IA1", "IA2", "IA3",
+               "ASG1", "ASG2", "Lab CIE", "Lab Test", "Total CIE (50)"]
+HEADERS = ["SL No", "USN", "Name", "IA1", "IA2", "IA3",
+           "ASG1", "ASG2", "Total CIE (50)"]
+
+# column widths (wider for name)
+WIDTHS_LAB = [6, 12, 28, 8, 8, 8, 8, 8, 10, 10, 12]
+WIDTHS = [6, 12, 28, 8, 8, 8, 8, 8, 12]
+
+
+def bump_roster_version(*class_ids):
+    """Invalidate every cached template of the given classes."""
+    ClassInfo.objects.filter(id__in=class_ids).update(roster_version=F("roster_version") + 1)
+
+
+def template_key(sub):
+    """Cache key for a subject's template; the ETag is derived from it."""
+    return f"marks-template:{sub.id}:{int(sub.credits or 0)}:{sub.class_info.roster_version}"
+
+
+def template_etag(sub):
+    return '"%s"' % hashlib.sha1(template_key(sub).encode()).hexdigest()
+
+
+def build_template(sub):
+    """Generate the template workbook for a subject and return the .xlsx bytes."""
+    lab = is_lab_scheme(sub.credits)
+    headers = HEADERS_LAB if lab else HEADERS
+    widths = WIDTHS_LAB if lab else WIDTHS
+    n_marks = len(headers) - 4  # blank mark columns between Name and Total
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Template")
+    for col_idx, width in enumerate(widths, start=1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    # style header
+    header_font = Font(bold=True)
+    header_align = Alignment(horizontal="center", vertical="center")
+    header_row = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = header_font
+        cell.alignment = header_align
+        header_row.append(cell)
+    ws.append(header_row)
+
+    wrap = Alignment(wrap_text=True)
+    students = (
+        Student.objects.filter(class_info_id=sub.class_info_id)
+        .order_by("sl_no")
+        .values_list("sl_no", "usn", "name")
+    )
+    for r, (sl_no, usn, name) in enumerate(students, start=2):
+        name_cell = WriteOnlyCell(ws, value=name)
+        name_cell.alignment = wrap
+        ws.append([sl_no, usn, name_cell] + [None] * n_marks + [excel_total_formula(sub.credits, r)])
+
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def get_template(sub):
+    """Cached template bytes for a subject (generated on a miss)."""
+    key = template_key(sub)
+    data = cache.get(key)
+    if data is None:
+        data = build_template(sub)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
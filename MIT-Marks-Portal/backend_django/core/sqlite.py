@@ -0,0 +1,61 @@
+# core/sqlite.py
+"""
+SQLite connection setup.
+
+configure_connection() runs on connection_created and applies
+settings.SQLITE_PRAGMAS to every new connection: busy_timeout first (so the
+WAL switch itself waits for other processes), then WAL journaling,
+synchronous=NORMAL (safe with WAL, one fsync per checkpoint instead of per
+commit), a larger page cache and memory-mapped reads. With WAL, readers no
+longer block behind a writer and a writer no longer waits for readers.
+
+The read-only alias (settings.READ_DATABASE_ALIAS, see core/routers.py) is
+opened with mode=ro and cannot switch the journal mode, so it skips that
+PRAGMA and sets query_only instead.
+"""
+import os
+import sqlite3
+
+from django.conf import settings
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    read_only = connection.alias == getattr(settings, "READ_DATABASE_ALIAS", None)
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+            if read_only and name == "journal_mode":
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+
+
+def pragma_values(connection, names=("journal_mode", "busy_timeout", "synchronous", "cache_size", "mmap_size")):
+    """Current values of the tuned PRAGMAs on a connection (for checks and the stress harness)."""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f"PRAGMA {name}")
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None  # e.g. mmap_size on :memory:
+        return values
+
+
+def snapshot_database(source, target):
+    """
+    Consistent copy of the SQLite file at source, written to target atomically
+    (sqlite3 backup API, so writers can keep going). Used for the immutable
+    read snapshot (settings.READ_DATABASE_SNAPSHOT).
+    """
+    tmp = f"{target}.tmp{os.getpid()}"
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(tmp)
+    try:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode = DELETE")  # immutable readers must not look for a -wal
+    finally:
+        dst.close()
+        src.close()
+    os.replace(tmp, target)
@@ -0,0 +1,19 @@
+"""
+The stock sqlite3 backend, except that atomic blocks start with
+BEGIN IMMEDIATE when settings.SQLITE_IMMEDIATE_TRANSACTIONS is on.
+
+A deferred BEGIN takes the write lock only at the first write. If another
+connection wrote in between, the upgrade fails with "database is locked" at
+once, without waiting for busy_timeout. Taking the lock up front makes a
+writer queue on busy_timeout instead.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def _start_transaction_under_autocommit(self):
+        if getattr(settings, "SQLITE_IMMEDIATE_TRANSACTIONS", False):
+            self.cursor().execute("BEGIN IMMEDIATE")
+        else:
+            super()._start_transaction_under_autocommit()
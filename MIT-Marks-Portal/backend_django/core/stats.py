@@ -0,0 +1,167 @@
+# core/stats.py
+"""
+Incrementally maintained course statistics (CourseStats).
+
+Write paths collect the totals they add and remove in a StatsDelta and apply
+it inside their own transaction, so reads of count/mean/std/min/max/histogram
+never scan Marks. Count, sums and histogram are exact under add/remove; min
+and max are re-derived with one aggregate only when a removed total was the
+current extreme. rebuild_course_stats() recomputes everything from Marks; a
+course that has no CourseStats row yet (marks saved before the table existed)
+is rebuilt that way on its first write instead of starting from zero.
+"""
+from collections import defaultdict
+from math import sqrt
+
+from django.db.models import Max, Min
+
+from .models import Course, CourseStats, Marks
+
+BUCKET_WIDTH = 5
+BUCKETS = 10  # 0-4.x, 5-9.x, ... 45-50
+PASS_MARK = 20
+
+
+def bucket(total):
+    return min(max(int(total // BUCKET_WIDTH), 0), BUCKETS - 1)
+
+
+class StatsDelta:
+    """Totals added to / removed from a course's marks during one write."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_sum = 0.0
+        self.total_sumsq = 0.0
+        self.histogram = [0] * BUCKETS
+        self.added = []
+        self.removed = []
+
+    def add(self, total):
+        if total is None:
+            return
+        self.count += 1
+        self.total_sum += total
+        self.total_sumsq += total * total
+        self.histogram[bucket(total)] += 1
+        self.added.append(total)
+
+    def remove(self, total):
+        if total is None:
+            return
+        self.count -= 1
+        self.total_sum -= total
+        self.total_sumsq -= total * total
+        self.histogram[bucket(total)] -= 1
+        self.removed.append(total)
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def apply(self, course_id):
+        """Fold the delta into CourseStats; call inside the writer's transaction."""
+        if not self.added and not self.removed:
+            return
+        stats = CourseStats.objects.select_for_update().filter(course_id=course_id).first()
+        if stats is None:
+            # Marks already holds this write, and whatever came before it
+            rebuild_course_stats(Course.objects.filter(id=course_id))
+            return
+        hist = stats.histogram or [0] * BUCKETS
+
+        stats.count += self.count
+        stats.total_sum += self.total_sum
+        stats.total_sumsq += self.total_sumsq
+        stats.histogram = [a + b for a, b in zip(hist, self.histogram)]
+
+        if stats.count <= 0:
+            _reset(stats)
+        elif any(t in (stats.min_total, stats.max_total) for t in self.removed):
+            # a removed total may have been the extreme; ask the table
+            agg = Marks.objects.filter(course_id=course_id).aggregate(lo=Min("total"), hi=Max("total"))
+            stats.min_total, stats.max_total = agg["lo"], agg["hi"]
+        elif self.added:
+            lo, hi = min(self.added), max(self.added)
+            stats.min_total = lo if stats.min_total is None else min(stats.min_total, lo)
+            stats.max_total = hi if stats.max_total is None else max(stats.max_total, hi)
+        stats.save()
+
+
+def _reset(stats):
+    stats.count = 0
+    stats.total_sum = 0.0
+    stats.total_sumsq = 0.0
+    stats.min_total = None
+    stats.max_total = None
+    stats.histogram = [0] * BUCKETS
+
+
+def clear_course_stats(course_id):
+    """Zero the stats of a course whose marks were all deleted."""
+    CourseStats.objects.filter(course_id=course_id).update(
+        count=0, total_sum=0.0, total_sumsq=0.0, min_total=None, max_total=None, histogram=[0] * BUCKETS
+    )
+
+
+def compute_course_stats(course_ids=None):
+    """Full recompute from Marks: {course_id: StatsDelta} in one pass."""
+    rows = Marks.objects.filter(course__isnull=False, total__isnull=False)
+    if course_ids is not None:
+        rows = rows.filter(course_id__in=course_ids)
+    deltas = defaultdict(StatsDelta)
+    for course_id, total in rows.values_list("course_id", "total").iterator(chunk_size=2000):
+        deltas[course_id].add(total)
+    return deltas
+
+
+def rebuild_course_stats(courses=None):
+    """Replace CourseStats for the given Course queryset (all courses by default)."""
+    if courses is None:
+        courses = Course.objects.all()
+    course_ids = list(courses.values_list("id", flat=True))
+    deltas = compute_course_stats(course_ids)
+
+    objs = []
+    for course_id in course_ids:
+        d = deltas.get(course_id) or StatsDelta()
+        objs.append(CourseStats(
+            course_id=course_id,
+            count=d.count,
+            total_sum=d.total_sum,
+            total_sumsq=d.total_sumsq,
+            min_total=min(d.added) if d.added else None,
+            max_total=max(d.added) if d.added else None,
+            histogram=d.histogram,
+        ))
+    CourseStats.objects.bulk_create(
+        objs,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["course"],
+        update_fields=["count", "total_sum", "total_sumsq", "min_total", "max_total", "histogram"],
+    )
+    return len(objs)
+
+
+def stats_summary(stats):
+    """JSON-ready view of a CourseStats row."""
+    n = stats.count
+    mean = stats.total_sum / n if n else None
+    std = None
+    if n:
+        std = sqrt(max(stats.total_sumsq / n - mean * mean, 0.0))
+    hist = stats.histogram or [0] * BUCKETS
+    return {
+        "course_id": stats.course_id,
+        "count": n,
+        "mean": round(mean, 2) if mean is not None else None,
+        "std": round(std, 2) if std is not None else None,
+        "min_total": stats.min_total,
+        "max_total": stats.max_total,
+        "pass_count": sum(hist[PASS_MARK // BUCKET_WIDTH:]),
+        "histogram": [
+            {"from": i * BUCKET_WIDTH, "to": (i + 1) * BUCKET_WIDTH, "count": c}
+            for i, c in enumerate(hist)
+        ],
+    }
@@ -0,0 +1,217 @@
+# core/student_cache.py
+"""
+In-process read-through cache of per-USN student data for result day.
+
+student_check, student_subjects, student/summary and student/transcript all
+read the same transcript (core/transcript.py), so one cached entry per USN
+serves all of them. Entries live in a bounded LRU and are dropped when:
+  - they are older than STUDENT_CACHE_TTL seconds, or
+  - the student's class data_version moved on (marks upload, roster change,
+    credits change, delete). Class versions are read with one small query at
+    most every STUDENT_CACHE_VERSION_SECONDS, and immediately in the process
+    that made the write, so other workers see a change within that interval.
+Unknown USNs are cached too, until any class version changes.
+
+Concurrent misses for the same USN are single-flighted: the first thread
+loads, the others wait on its future. stats() reports hits, misses, coalesced
+waits, evictions and load latency.
+
+aget() is the same lookup for async views: misses and version reads go
+through the async ORM and coalesced callers await the leader's future, so
+sync and async callers share one set of entries and in-flight loads.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .models import ClassInfo
+from .transcript import aload_student, load_student
+
+_MISS = object()
+
+
+def _class_versions():
+    return dict(ClassInfo.objects.values_list("id", "data_version"))
+
+
+async def _aclass_versions():
+    return {class_id: version async for class_id, version in ClassInfo.objects.values_list("id", "data_version")}
+
+
+class StudentCache:
+    def __init__(self, loader=load_student, versions=_class_versions,
+                 aloader=aload_student, aversions=_aclass_versions):
+        self.loader = loader
+        self.versions = versions
+        self.aloader = aloader
+        self.aversions = aversions
+        self._entries = OrderedDict()  # usn -> (loaded_at, version key, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._version_map = None
+        self._version_read_at = 0.0
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0,
+                          "expired": 0, "invalidated": 0, "load_errors": 0}
+        self._load_seconds = 0.0
+        self._load_max = 0.0
+
+    def _versions_stale(self, now):
+        return self._version_map is None or now - self._version_read_at >= settings.STUDENT_CACHE_VERSION_SECONDS
+
+    def _current_versions(self):
+        with self._version_lock:
+            now = time.monotonic()
+            if self._versions_stale(now):
+                self._version_map = self.versions()
+                self._version_read_at = now
+            return self._version_map
+
+    async def _acurrent_versions(self):
+        # the lock can't be held across an await; concurrent refreshes just read twice
+        now = time.monotonic()
+        with self._version_lock:
+            if not self._versions_stale(now):
+                return self._version_map
+        versions = await self.aversions()
+        with self._version_lock:
+            self._version_map = versions
+            self._version_read_at = now
+        return versions
+
+    def versions_changed(self):
+        """Re-read class versions on the next lookup (called after a local write)."""
+        with self._version_lock:
+            self._version_map = None
+
+    @staticmethod
+    def _version_key(versions, loaded):
+        if loaded is None:
+            return ("none", hash(frozenset(versions.items())))
+        class_id = loaded[0]
+        return (class_id, versions.get(class_id))
+
+    def _lookup(self, usn, versions):
+        """(value, None, False) on a hit, else (_MISS, in-flight future, whether this caller loads)."""
+        with self._lock:
+            entry = self._entries.get(usn)
+            if entry is not None:
+                loaded_at, key, value = entry
+                if time.monotonic() - loaded_at > settings.STUDENT_CACHE_TTL:
+                    self._counters["expired"] += 1
+                    del self._entries[usn]
+                elif key != self._version_key(versions, value):
+                    self._counters["invalidated"] += 1
+                    del self._entries[usn]
+                else:
+                    self._counters["hits"] += 1
+                    self._entries.move_to_end(usn)
+                    return value, None, False
+
+            flight = self._inflight.get(usn)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[usn] = Future()
+                self._counters["misses"] += 1
+            else:
+                self._counters["coalesced"] += 1
+            return _MISS, flight, leader
+
+    def _failed(self, usn, flight, error):
+        with self._lock:
+            self._counters["load_errors"] += 1
+            del self._inflight[usn]
+        flight.set_exception(error)
+
+    def _store(self, usn, versions, flight, value, elapsed):
+        with self._lock:
+            self._load_seconds += elapsed
+            self._load_max = max(self._load_max, elapsed)
+            self._entries[usn] = (time.monotonic(), self._version_key(versions, value), value)
+            self._entries.move_to_end(usn)
+            while len(self._entries) > settings.STUDENT_CACHE_SIZE:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+            del self._inflight[usn]
+        flight.set_result(value)
+
+    def get(self, usn):
+        """(class id, transcript) for a USN, or None; loaded on a miss."""
+        if settings.STUDENT_CACHE_SIZE <= 0:
+            return self.loader(usn)
+
+        versions = self._current_versions()
+        value, flight, leader = self._lookup(usn, versions)
+        if value is not _MISS:
+            return value
+        if not leader:
+            return flight.result()
+
+        start = time.perf_counter()
+        try:
+            value = self.loader(usn)
+        except Exception as e:
+            self._failed(usn, flight, e)
+            raise
+        self._store(usn, versions, flight, value, time.perf_counter() - start)
+        return value
+
+    async def aget(self, usn):
+        """get() for async callers."""
+        if settings.STUDENT_CACHE_SIZE <= 0:
+            return await self.aloader(usn)
+
+        versions = await self._acurrent_versions()
+        value, flight, leader = self._lookup(usn, versions)
+        if value is not _MISS:
+            return value
+        if not leader:
+            return await asyncio.wrap_future(flight)
+
+        start = time.perf_counter()
+        try:
+            value = await self.aloader(usn)
+        except Exception as e:
+            self._failed(usn, flight, e)
+            raise
+        self._store(usn, versions, flight, value, time.perf_counter() - start)
+        return value
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._counters = dict.fromkeys(self._counters, 0)
+            self._load_seconds = 0.0
+            self._load_max = 0.0
+        self.versions_changed()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            loads = stats["misses"] - stats["load_errors"]
+            stats["avg_load_ms"] = round(self._load_seconds / loads * 1000, 2) if loads else None
+            stats["max_load_ms"] = round(self._load_max * 1000, 2)
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else None
+        return stats
+
+
+student_cache = StudentCache()
+
+
+def get_student(usn):
+    """Cached transcript dict for a USN, or None if no such student."""
+    loaded = student_cache.get(usn)
+    return loaded[1] if loaded else None
+
+
+async def aget_student(usn):
+    """get_student() for async views."""
+    loaded = await student_cache.aget(usn)
+    return loaded[1] if loaded else None
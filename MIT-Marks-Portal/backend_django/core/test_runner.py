@@ -0,0 +1,28 @@
+# core/test_runner.py
+"""
+Test runner that keeps the suite's request metrics out of BASE_DIR.
+
+Every test request passes through RequestMetricsMiddleware, which flushes its
+counters to METRICS_DB; for the run that is a file in a temporary directory.
+"""
+import os
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import metrics
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._metrics_dir = tempfile.TemporaryDirectory()
+        self._metrics_db = override_settings(METRICS_DB=os.path.join(self._metrics_dir.name, "metrics.sqlite3"))
+        self._metrics_db.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        metrics.flush()  # now, into the temporary file, rather than at exit into BASE_DIR
+        self._metrics_db.disable()
+        self._metrics_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
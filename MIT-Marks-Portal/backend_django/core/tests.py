@@ -1,3 +1,1141 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.db import OperationalError, connection, connections, router, transaction
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from core.sqlite_backend.base import DatabaseWrapper
+from openpyxl import Workbook, load_workbook
+
+from .benchmark import ENDPOINTS, run_async_benchmark, run_benchmark
+from .seeding import seed_department
+from .student_cache import StudentCache, student_cache
+from .stats import compute_course_stats, rebuild_course_stats
+from .ingest import ingest_marks
+from .jobs import STALE_ERROR, expire_stale_jobs, run_upload_job
+from .grading import COMPONENTS, compute_total, compute_totals, excel_total_formula
+from . import metrics
+from .matrix import clear_matrix_cache
+from . import routers
+from .routers import read_only_context
+from .sqlite import pragma_values, snapshot_database
+from .publish import file_key
+from .response_cache import bump_class_version
+from .models import ClassInfo, Student, Subject, Course, CourseStats, Marks, UploadJob
+
+
+HEADERS_3 = ["SL No", "USN", "Name", "IA1", "IA2", "IA3", "ASG1", "ASG2", "Total CIE (50)"]
+
+
+def make_sheet(rows, headers=HEADERS_3):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for row in rows:
+        ws.append(row)
+    buf = BytesIO()
+    wb.save(buf)
+    return SimpleUploadedFile(
+        "marks.xlsx", buf.getvalue(),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def make_class(n_students, branch="CSE", semester="5", section="A"):
+    class_obj = ClassInfo.objects.create(branch=branch, semester=semester, section=section)
+    Student.objects.bulk_create([
+        Student(class_info=class_obj, sl_no=i, usn=f"1MS{section}{i:04d}", name=f"Student {i}")
+        for i in range(1, n_students + 1)
+    ])
+    return class_obj
+
+
+@override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class UploadMarksTests(TestCase):
+    def setUp(self):
+        self.class_obj = make_class(200)
+        self.subject = Subject.objects.create(
+            class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3, faculty="X"
+        )
+
+    def upload(self, rows):
+        queued = self.client.post("/api/upload_marks_subject/", {
+            "subject_id": self.subject.id,
+            "file": make_sheet(rows),
+        }).json()
+        return self.client.get("/api/upload_status/", {"job_id": queued["job_id"]}).json()
+
+    def sheet_rows(self, n):
+        return [[i, f"1MSA{i:04d}", f"Student {i}", 30, 35, 20, 20, 22, None] for i in range(1, n + 1)]
+
+    def test_saves_and_computes_totals(self):
+        rows = self.sheet_rows(2) + [[3, "UNKNOWN", "Nobody", 10, 10, 10, 10, 10, None]]
+        data = self.upload(rows)
+        self.assertEqual(data["saved_rows"], 2)
+        self.assertEqual(len(data["errors"]), 1)
+        # best two (35, 30) -> 32.5/40*25 = 20.3125, asg 42/50*25 = 21 -> ceil 42
+        self.assertEqual(Marks.objects.get(student__usn="1MSA0001").total, 42)
+
+    def test_reupload_updates_in_place(self):
+        self.upload(self.sheet_rows(5))
+        rows = self.sheet_rows(5)
+        rows[0][3:8] = [40, 40, 40, 25, 25]
+        data = self.upload(rows)
+        self.assertEqual(data["saved_rows"], 5)
+        self.assertEqual(Marks.objects.count(), 5)
+        self.assertEqual(Marks.objects.get(student__usn="1MSA0001").total, 50)
+
+    def test_query_count_constant_as_sheet_grows(self):
+        self.upload(self.sheet_rows(1))  # creates the Course
+        counts = []
+        for n in (10, 200):
+            Marks.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                self.upload(self.sheet_rows(n))
+            counts.append(len(ctx.captured_queries))
+        # 20x the rows only adds the extra INSERT batches SQLite's parameter limit forces
+        self.assertLessEqual(counts[1], counts[0] + 2)
+        self.assertLess(counts[1], 20)
+        # and again when every row is an update rather than an insert
+        with CaptureQueriesContext(connection) as ctx:
+            self.upload(self.sheet_rows(200))
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_repeated_usn_across_chunks_keeps_last_row(self):
+        rows = self.sheet_rows(3) + [[1, "1MSA0001", "Student 1", 40, 40, 40, 25, 25, None]]
+        with mock.patch("core.workbook.CHUNK_ROWS", 2):
+            data = self.upload(rows)
+        self.assertEqual(data["saved_rows"], 4)
+        self.assertEqual(Marks.objects.count(), 3)
+        self.assertEqual(Marks.objects.get(student__usn="1MSA0001").total, 50)
+
+    def test_unreadable_file_fails_job(self):
+        queued = self.client.post("/api/upload_marks_subject/", {
+            "subject_id": self.subject.id,
+            "file": SimpleUploadedFile("marks.xlsx", b"not a workbook"),
+        }).json()
+        data = self.client.get("/api/upload_status/", {"job_id": queued["job_id"]}).json()
+        self.assertEqual(data["status"], "failed")
+        self.assertIn("Failed to read Excel file", data["errors"][0])
+
+    def test_failed_save_fails_job(self):
+        with mock.patch("core.ingest._write_chunk", side_effect=RuntimeError("boom")):
+            data = self.upload(self.sheet_rows(3))
+        self.assertEqual(data["status"], "failed")
+        self.assertEqual(data["saved_rows"], 0)
+        self.assertEqual(data["errors"], ["Failed saving marks: boom"])
+        self.assertEqual(Marks.objects.count(), 0)
+
+    def test_jobs_of_gone_workers_are_failed(self):
+        course = Course.objects.create(class_info=self.class_obj, course_name="DBMS")
+        gone = subprocess.Popen([sys.executable, "-c", "pass"])
+        gone.wait()
+
+        def job(worker, status="running"):
+            return UploadJob.objects.create(class_info=self.class_obj, course=course, file_path="/nonexistent.xlsx",
+                                            worker=worker, status=status, started_at=timezone.now())
+
+        host = socket.gethostname()
+        lost = job(f"{host}:{gone.pid}")
+        elsewhere = job(f"{host}:{os.getppid()}")  # another live process, e.g. a sibling gunicorn worker
+        unknown = job("other-host:1")
+
+        data = self.client.get("/api/upload_status/", {"job_id": lost.id}).json()
+        self.assertEqual(data["status"], "failed")
+        self.assertEqual(data["errors"], [STALE_ERROR])
+
+        self.assertEqual(expire_stale_jobs(), 0)
+        UploadJob.objects.filter(id=unknown.id).update(
+            started_at=timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_TIMEOUT_SECONDS + 60))
+        self.assertEqual(expire_stale_jobs(), 1)
+        self.assertEqual(UploadJob.objects.get(id=elsewhere.id).status, "running")
+
+    def test_expired_job_is_not_run_or_overwritten(self):
+        course = Course.objects.create(class_info=self.class_obj, course_name="DBMS")
+        expired = UploadJob.objects.create(class_info=self.class_obj, course=course, file_path="/nonexistent.xlsx",
+                                           status="failed", errors=[STALE_ERROR])
+        self.assertEqual(run_upload_job(expired.id).status, "failed")
+
+        path = os.path.join(tempfile.gettempdir(), "expired-while-running.csv")
+        with open(path, "w") as f:
+            f.write("SL No,USN,Name,IA1\n1,1MSA0001,Student 1,30\n")
+        running = UploadJob.objects.create(class_info=self.class_obj, course=course, file_path=path)
+
+        def fail_meanwhile(*args, **kwargs):
+            UploadJob.objects.filter(id=running.id).update(status="failed", errors=[STALE_ERROR])
+            return 1, []
+
+        with mock.patch("core.jobs.ingest_marks", side_effect=fail_meanwhile):
+            run_upload_job(running.id)
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.errors), ("failed", [STALE_ERROR]))
+
+
+@override_settings(UPLOAD_JOB_WORKERS=1, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class UploadJobPoolTests(TransactionTestCase):
+    def test_upload_returns_job_and_completes_in_background(self):
+        class_obj = make_class(5)
+        subject = Subject.objects.create(class_info=class_obj, subject="OS", subcode="CS52", credits=3)
+        rows = [[i, f"1MSA{i:04d}", f"Student {i}", 30, 35, 20, 20, 22, None] for i in range(1, 6)]
+
+        res = self.client.post("/api/upload_marks_subject/", {"subject_id": subject.id, "file": make_sheet(rows)})
+        self.assertEqual(res.status_code, 202)
+        job_id = res.json()["job_id"]
+
+        deadline = time.time() + 10
+        data = {}
+        while time.time() < deadline:
+            data = self.client.get("/api/upload_status/", {"job_id": job_id}).json()
+            if data["status"] in ("saved", "failed"):
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(data["status"], "saved")
+        self.assertEqual(data["rows_parsed"], 5)
+        self.assertEqual(data["saved_rows"], 5)
+        self.assertIsNotNone(data["elapsed"])
+        self.assertEqual(Marks.objects.count(), 5)
+        self.assertFalse(os.path.exists(UploadJob.objects.get(id=job_id).file_path))
+
+class GradingEngineTests(TestCase):
+    def random_rows(self, n, seed):
+        rng = random.Random(seed)
+        limits = {"ia1": 40, "ia2": 40, "ia3": 40, "asg1": 25, "asg2": 25, "lab_cie": 15, "lab_test": 10}
+
+        def cell(key):
+            r = rng.random()
+            if r < 0.15:
+                return None
+            if r < 0.2:
+                return float(limits[key])
+            return round(rng.uniform(0, limits[key]) * 2) / 2  # half marks
+        return [{key: cell(key) for key in COMPONENTS} for _ in range(n)]
+
+    def test_parity_with_scalar_logic(self):
+        for credits in (1, 2, 3, 4):
+            rows = self.random_rows(2000, seed=credits)
+            columns = {key: [row[key] for row in rows] for key in COMPONENTS}
+            totals = compute_totals(columns, credits)
+            expected = [compute_total(credits=credits, **row) for row in rows]
+            self.assertEqual(list(totals), expected)
+
+    def test_missing_columns_count_as_blank(self):
+        totals = compute_totals({"ia1": [40.0], "ia2": [40.0], "asg1": [25.0], "asg2": [25.0]}, 3)
+        self.assertEqual(list(totals), [50.0])
+        self.assertEqual(list(compute_totals({}, 4)), [])
+
+    def test_template_formulas(self):
+        self.assertEqual(
+            excel_total_formula(4, 2),
+            "=CEILING( ( (LARGE(D2:F2,1)+LARGE(D2:F2,2))/2 )/40*15 + ( (G2+H2)/2 )/25*10 + (I2+J2), 1)",
+        )
+        self.assertEqual(
+            excel_total_formula(3, 7),
+            "=CEILING( ( (LARGE(D7:F7,1)+LARGE(D7:F7,2))/2 )/40*25 + (G7+H7)/50*25, 1)",
+        )
+
+class RecomputeTotalsTests(TestCase):
+    def setUp(self):
+        self.class_obj = make_class(3)
+        self.course = Course.objects.create(class_info=self.class_obj, course_name="DBMS", sub_code="CS51", credits=3)
+        for s in Student.objects.all():
+            Marks.objects.create(
+                student=s, class_info=self.class_obj, course=self.course,
+                ia1=40, ia2=40, ia3=0, asg1=25, asg2=25, lab_cie=0, lab_test=0, total=50,
+            )
+        # a row with only a sheet total is left alone
+        Marks.objects.filter(student__sl_no=3).delete()
+        ingest_marks(self.class_obj, self.course, [
+            ["SL No", "USN", "Name", "IA1", "IA2", "IA3", "ASG1", "ASG2", "Total CIE (50)"],
+            [3, "1MSA0003", "Student 3", None, None, None, None, None, 33],
+        ], credits=3)
+
+    def test_recompute_after_credit_change(self):
+        Course.objects.filter(id=self.course.id).update(credits=4)
+        res = self.client.post("/api/recompute_totals/", {"course_id": self.course.id},
+                               content_type="application/json").json()
+        self.assertEqual(res["rows"], 3)
+        self.assertEqual(res["updated"], 2)
+        # 4 credits: 15 + 10 + no lab
+        self.assertEqual(Marks.objects.get(student__sl_no=1).total, 25)
+        self.assertEqual(Marks.objects.get(student__sl_no=3).total, 33)
+
+    def test_scope_required(self):
+        res = self.client.post("/api/recompute_totals/", {}, content_type="application/json")
+        self.assertEqual(res.status_code, 400)
+
+class TemplateDownloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_obj = make_class(3)
+        self.subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=4)
+
+    def download(self, **headers):
+        return self.client.get("/api/download_subject_template/", {"subject_id": self.subject.id}, **headers)
+
+    def test_template_contents(self):
+        res = self.download()
+        ws = load_workbook(BytesIO(res.content)).active
+        rows = list(ws.iter_rows(values_only=True))
+        self.assertEqual(rows[0][-1], "Total CIE (50)")
+        self.assertEqual(len(rows[0]), 11)
+        self.assertEqual(rows[1][:3], (1, "1MSA0001", "Student 1"))
+        self.assertEqual(rows[1][10], excel_total_formula(4, 2))
+        self.assertEqual(len(rows), 4)
+
+    def test_etag_and_invalidation(self):
+        first = self.download()
+        etag = first["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.client.post("/api/upload_students/", {
+            "branch": "CSE", "semester": "5", "section": "A",
+            "students": [{"sl": 1, "usn": "1MSA0001", "name": "Renamed"}],
+        }, content_type="application/json")
+        fresh = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertNotEqual(fresh["ETag"], etag)
+        rows = list(load_workbook(BytesIO(fresh.content)).active.iter_rows(values_only=True))
+        self.assertEqual(rows[1][2], "Renamed")
+
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        self.class_obj = make_class(3)
+        self.course = Course.objects.create(class_info=self.class_obj, course_name="DBMS", credits=3)
+        self.student = Student.objects.first()
+
+    def assertUsesIndex(self, qs, index=None):
+        plan = qs.explain()
+        self.assertNotRegex(plan, r"SCAN core_(student|marks)\b", plan)
+        self.assertIn("USING", plan)
+        if index:
+            self.assertIn(index, plan)
+
+    def test_hot_lookups_use_indexes(self):
+        # student_check / student_subjects / get_student_summary
+        self.assertUsesIndex(Student.objects.filter(usn="1MSA0001"), "student_usn_idx")
+        self.assertUsesIndex(Marks.objects.filter(student=self.student))
+        self.assertUsesIndex(Marks.objects.filter(student=self.student, course_id=self.course.id),
+                             "(student_id=? AND course_id=?)")
+        # uploads
+        self.assertUsesIndex(Student.objects.filter(class_info=self.class_obj, usn="1MSA0001"))
+        # get_uploaded_marks / get_course_marks / delete_uploaded_marks
+        self.assertUsesIndex(Marks.objects.filter(course=self.course, class_info=self.class_obj))
+        self.assertUsesIndex(Marks.objects.filter(course=self.course))
+
+class StudentTranscriptTests(TestCase):
+    def setUp(self):
+        student_cache.clear()
+        self.class_obj = make_class(2)
+        student = Student.objects.get(usn="1MSA0001")
+        for i, credits in enumerate((3, 4, 2)):
+            course = Course.objects.create(class_info=self.class_obj, course_name=f"Course {i}",
+                                           sub_code=f"C{i}", credits=credits)
+            Marks.objects.create(student=student, class_info=self.class_obj, course=course,
+                                 ia1=30, ia2=32, ia3=20, asg1=20, asg2=22, total=40 + i)
+
+    def test_constant_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/student/transcript/", {"usn": "1MSA0001"}).json()
+        self.assertEqual(len(ctx.captured_queries), 2)  # class versions + transcript
+        self.assertEqual(data["student"]["usn"], "1MSA0001")
+        self.assertEqual(data["student"]["section"], "A")
+        self.assertEqual([c["total"] for c in data["courses"]], [40, 41, 42])
+        self.assertEqual(data["courses"][1]["credits"], 4)
+
+    def test_student_without_marks_and_unknown(self):
+        data = self.client.get("/api/student/transcript/", {"usn": "1MSA0002"}).json()
+        self.assertEqual(data["courses"], [])
+        self.assertEqual(data["student"]["name"], "Student 2")
+        res = self.client.get("/api/student/transcript/", {"usn": "NOPE"})
+        self.assertEqual(res.status_code, 404)
+
+class UploadOverviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for section in ("A", "B"):
+            class_obj = make_class(4, section=section)
+            students = list(Student.objects.filter(class_info=class_obj).order_by("sl_no"))
+            for i in range(3):
+                course = Course.objects.create(class_info=class_obj, course_name=f"Course {i}", credits=3)
+                # course i has marks for the first i+1 students (course 0 -> 1 student)
+                for j, s in enumerate(students[:i + 1]):
+                    Marks.objects.create(student=s, class_info=class_obj, course=course, total=30 + j)
+            Course.objects.create(class_info=class_obj, course_name="Empty", credits=3)
+
+    def test_class_overview_single_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/get_uploaded_marks/",
+                                   {"branch": "CSE", "semester": "5", "section": "A"}).json()
+        self.assertEqual(len(ctx.captured_queries), 2)  # ClassInfo lookup + overview
+        uploads = data["uploads"]
+        self.assertEqual([u["student_count"] for u in uploads], [1, 2, 3])
+        last = uploads[-1]
+        self.assertEqual((last["min_total"], last["max_total"], last["avg_total"]), (30, 32, 31))
+        self.assertEqual((last["roster_size"], last["missing_count"]), (4, 1))
+
+    def test_department_overview(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/department_uploads/").json()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual([c["section"] for c in data["classes"]], ["A", "B"])
+        self.assertEqual(len(data["classes"][1]["uploads"]), 3)
+
+@override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class CourseStatsTests(TestCase):
+    def setUp(self):
+        self.class_obj = make_class(30)
+        self.subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3)
+        self.rng = random.Random(7)
+
+    def upload(self, n, **extra):
+        rows = [[i, f"1MSA{i:04d}", "", self.rng.randint(0, 40), self.rng.randint(0, 40),
+                 self.rng.randint(0, 40), self.rng.randint(0, 25), self.rng.randint(0, 25), None]
+                for i in range(1, n + 1)]
+        self.client.post("/api/upload_marks_subject/", {"subject_id": self.subject.id,
+                                                        "file": make_sheet(rows), **extra})
+        return Course.objects.get(class_info=self.class_obj)
+
+    def assertConsistent(self, course):
+        stats = CourseStats.objects.get(course=course)
+        full = compute_course_stats([course.id]).get(course.id)
+        totals = full.added if full else []
+        self.assertEqual(stats.count, len(totals))
+        self.assertAlmostEqual(stats.total_sum, sum(totals))
+        self.assertAlmostEqual(stats.total_sumsq, sum(t * t for t in totals))
+        self.assertEqual(stats.min_total, min(totals) if totals else None)
+        self.assertEqual(stats.max_total, max(totals) if totals else None)
+        self.assertEqual(stats.histogram, full.histogram if full else [0] * 10)
+
+    def test_incremental_stats_match_full_recompute(self):
+        course = self.upload(20)
+        self.assertConsistent(course)
+        course = self.upload(30)  # 20 updates + 10 inserts
+        self.assertConsistent(course)
+        course = self.upload(10, credits="4")  # scheme change recomputes the other 20 rows
+        self.assertConsistent(course)
+
+        data = self.client.get("/api/course_stats/", {"course_id": course.id}).json()
+        self.assertEqual(data["count"], 30)
+        self.assertEqual(sum(b["count"] for b in data["histogram"]), 30)
+
+        self.client.post("/api/delete_uploaded_marks/", {"course_id": course.id}, content_type="application/json")
+        self.assertConsistent(course)
+
+    def test_rebuild_repairs_drift(self):
+        course = self.upload(10)
+        CourseStats.objects.filter(course=course).update(count=99, min_total=-1)
+        rebuild_course_stats()
+        self.assertConsistent(course)
+
+    def test_missing_row_is_built_from_existing_marks(self):
+        course = self.upload(20)
+        CourseStats.objects.filter(course=course).delete()  # marks saved before CourseStats existed
+        course = self.upload(25)
+        self.assertConsistent(course)
+        self.assertEqual(CourseStats.objects.get(course=course).count, 25)
+
+@override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_obj = make_class(5)
+        self.params = {"branch": "CSE", "semester": "5", "section": "A"}
+
+    def test_hit_then_invalidated_by_write(self):
+        first = self.client.get("/api/get_students/", self.params)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get("/api/get_students/", self.params)
+        self.assertEqual(len(ctx.captured_queries), 1)  # class + version lookup only
+        self.assertEqual(first.content, second.content)
+
+        not_modified = self.client.get("/api/get_students/", self.params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.client.post("/api/create_subject/", {**self.params, "subject": "OS", "subcode": "CS52",
+                                                  "credits": 3}, content_type="application/json")
+        subjects = self.client.get("/api/list_subjects/", self.params).json()
+        self.assertEqual(subjects["count"], 1)
+        # unrelated endpoint was invalidated too; roster content is unchanged
+        again = self.client.get("/api/get_students/", self.params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 200)
+
+        counters = self.client.get("/api/cache_stats/").json()
+        self.assertGreaterEqual(counters["hits"], 1)
+        self.assertGreaterEqual(counters["not_modified"], 1)
+
+    def test_marks_upload_invalidates_course_marks(self):
+        subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3)
+        rows = [[1, "1MSA0001", "", 30, 30, 30, 20, 20, None]]
+        self.client.post("/api/upload_marks_subject/", {"subject_id": subject.id, "file": make_sheet(rows)})
+        course = Course.objects.get()
+        before = self.client.get("/api/get_course_marks/", {"course_id": course.id}).json()
+        self.assertEqual(len(before["marks"]), 1)
+
+        rows.append([2, "1MSA0002", "", 40, 40, 40, 25, 25, None])
+        self.client.post("/api/upload_marks_subject/", {"subject_id": subject.id, "file": make_sheet(rows)})
+        after = self.client.get("/api/get_course_marks/", {"course_id": course.id}).json()
+        self.assertEqual(len(after["marks"]), 2)
+
+class RosterSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_obj = make_class(200)
+        self.course = Course.objects.create(class_info=self.class_obj, course_name="DBMS", credits=3)
+        Marks.objects.bulk_create([
+            Marks(student=s, class_info=self.class_obj, course=self.course, total=40)
+            for s in Student.objects.all()
+        ])
+        rebuild_course_stats()
+        self.roster = [{"sl": s.sl_no, "usn": s.usn, "name": s.name}
+                       for s in Student.objects.order_by("sl_no")]
+
+    def save(self, roster):
+        return self.client.post("/api/upload_students/", {
+            "branch": "CSE", "semester": "5", "section": "A", "students": roster,
+        }, content_type="application/json").json()
+
+    def test_one_edit_keeps_ids_and_marks(self):
+        ids = set(Student.objects.values_list("id", flat=True))
+        self.roster[10]["name"] = "Fixed Name"
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.save(self.roster)
+        self.assertLess(len(ctx.captured_queries), 12)
+        self.assertEqual(data["summary"], {"added": 0, "updated": 1, "removed": 0, "unchanged": 199})
+        self.assertEqual(set(Student.objects.values_list("id", flat=True)), ids)
+        self.assertEqual(Marks.objects.count(), 200)
+        self.assertEqual(Student.objects.get(usn="1MSA0011").name, "Fixed Name")
+
+    def test_add_and_remove(self):
+        roster = self.roster[1:] + [{"sl": 201, "usn": "1MSA0201", "name": "New"}]
+        data = self.save(roster)
+        self.assertEqual(data["summary"], {"added": 1, "updated": 0, "removed": 1, "unchanged": 199})
+        self.assertEqual(Marks.objects.count(), 199)
+        self.assertEqual(CourseStats.objects.get(course=self.course).count, 199)
+
+    def test_resave_unchanged_is_a_no_op(self):
+        version = ClassInfo.objects.get().data_version
+        data = self.save(self.roster)
+        self.assertEqual(data["summary"]["unchanged"], 200)
+        self.assertEqual(ClassInfo.objects.get().data_version, version)
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def csv_file(self, lines):
+        return SimpleUploadedFile("roster.csv", "\n".join(lines).encode(), content_type="text/csv")
+
+    def test_import_creates_classes_and_students(self):
+        make_class(1, section="A")  # existing class with 1MSA0001
+        lines = ["Branch,Sem,Section,SL No,USN,Name"]
+        for section in ("A", "B", "C"):
+            lines += [f"CSE,5,{section},{i},1MS{section}{i:04d},Student {section}{i}" for i in range(1, 101)]
+        lines += ["CSE,5,A,1,1MSB0001,Dup", ",5,A,2,1MSX0002,No branch"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.post("/api/import_roster/", {"file": self.csv_file(lines)}).json()
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        self.assertEqual(data["reject_count"], 2)
+        by_section = {c["section"]: c for c in data["classes"]}
+        self.assertEqual(by_section["A"]["added"], 99)
+        self.assertEqual(by_section["A"]["updated"], 1)  # name changed
+        self.assertEqual(by_section["C"]["added"], 100)
+        self.assertEqual(ClassInfo.objects.count(), 3)
+        self.assertEqual(Student.objects.count(), 300)
+
+    def test_missing_columns(self):
+        res = self.client.post("/api/import_roster/", {"file": self.csv_file(["usn,name", "1,2"])})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("branch", res.json()["error"])
+
+    def test_xlsx_import(self):
+        sheet = make_sheet([["ISE", 3, "A", 1, "1IS0001", "Someone"]],
+                           headers=["Branch", "Semester", "Section", "Sl", "USN", "Name"])
+        data = self.client.post("/api/import_roster/", {"file": sheet}).json()
+        self.assertEqual(data["classes"][0]["added"], 1)
+        self.assertTrue(Student.objects.filter(usn="1IS0001", class_info__semester="3").exists())
+
+
+
+class MarksExportTests(TestCase):
+    def setUp(self):
+        for section in ("A", "B"):
+            class_obj = make_class(3, section=section)
+            course = Course.objects.create(class_info=class_obj, course_name="DBMS", sub_code="CS51", credits=3)
+            for s in Student.objects.filter(class_info=class_obj):
+                Marks.objects.create(student=s, class_info=class_obj, course=course, ia1=20, total=30 + s.sl_no)
+
+    def test_csv_streams_with_filters(self):
+        res = self.client.get("/api/export_marks/", {"section": "B"})
+        self.assertTrue(res.streaming)
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["Branch", "Semester", "Section"])
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[1].split(",")[8], "1MSB0001")
+        self.assertEqual(lines[3].split(",")[-1], "33.0")
+
+    def test_xlsx_export(self):
+        res = self.client.get("/api/export_marks/", {"format": "xlsx"})
+        ws = load_workbook(BytesIO(b"".join(res.streaming_content))).active
+        rows = list(ws.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual([r[2] for r in rows[1:]], ["A"] * 3 + ["B"] * 3)
+
+    def test_bad_format(self):
+        self.assertEqual(self.client.get("/api/export_marks/", {"format": "pdf"}).status_code, 400)
+
+
+class ListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_obj = make_class(5)
+        Student.objects.create(class_info=self.class_obj, sl_no=None, usn="1MSA9999", name="Late Entry")
+        self.course = Course.objects.create(class_info=self.class_obj, course_name="DBMS", sub_code="CS51", credits=4)
+        Marks.objects.bulk_create([
+            Marks(student=s, class_info=self.class_obj, course=self.course, ia1=10 + i, total=20 + i)
+            for i, s in enumerate(Student.objects.order_by("id"))
+        ])
+
+    def marks(self, **params):
+        return self.client.get("/api/get_course_marks/", {"course_id": self.course.id, **params})
+
+    def test_course_marks_keyset_pages(self):
+        full = self.marks().json()
+        self.assertEqual(full["credits"], 4)
+        self.assertNotIn("credits", full["marks"][0])
+        self.assertEqual(full["marks"][0]["usn"], "1MSA9999")  # NULL sl_no first
+
+        usns, cursor = [], None
+        while True:
+            params = {"limit": 4, "fields": "usn,total"}
+            if cursor:
+                params["cursor"] = cursor
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.marks(**params).json()
+            self.assertNotIn("ia1", ctx.captured_queries[-1]["sql"])
+            self.assertEqual({k for row in data["marks"] for k in row}, {"usn", "total"})
+            usns += [row["usn"] for row in data["marks"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(usns, [row["usn"] for row in full["marks"]])
+
+    def test_course_marks_stream_and_errors(self):
+        with mock.patch("core.listing.STREAM_CHUNK", 4):
+            res = self.marks(stream=1)
+            self.assertTrue(res.streaming)
+            self.assertEqual(json.loads(b"".join(res.streaming_content)), self.marks().json())
+        self.assertEqual(self.marks(fields="usn,credits").status_code, 400)
+        self.assertEqual(self.marks(limit=0).status_code, 400)
+        self.assertEqual(self.marks(limit=2, cursor="nope").status_code, 400)
+
+    async def test_student_list_pages_and_stream(self):
+        params = {"branch": "CSE", "semester": "5", "section": "A"}
+        first = (await self.async_client.get("/api/get_students/", {**params, "limit": 4})).json()
+        rest = (await self.async_client.get("/api/get_students/",
+                                            {**params, "limit": 4, "cursor": first["next_cursor"]})).json()
+        self.assertEqual([s["sl"] for s in first["students"] + rest["students"]], [None, 1, 2, 3, 4, 5])
+        self.assertIsNone(rest["next_cursor"])
+
+        with override_settings(ASGI_MODE=True):
+            res = await self.async_client.get("/api/get_students/", {**params, "stream": 1, "fields": "usn"})
+        self.assertTrue(res.is_async)
+        body = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(json.loads(body)["students"][1], {"usn": "1MSA0001"})
+
+    def test_student_list_streams_sync_under_wsgi(self):
+        params = {"branch": "CSE", "semester": "5", "section": "A", "stream": 1, "fields": "usn"}
+        with mock.patch("core.listing.STREAM_CHUNK", 4):
+            res = self.client.get("/api/get_students/", params)
+            self.assertFalse(res.is_async)
+            body = b"".join(res.streaming_content)
+        self.assertEqual(json.loads(body)["students"][1], {"usn": "1MSA0001"})
+
+
+class ClassResultMatrixTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_matrix_cache()
+        self.class_obj = make_class(4)
+        self.students = list(Student.objects.filter(class_info=self.class_obj).order_by("sl_no"))
+        self.courses = [Course.objects.create(class_info=self.class_obj, course_name=f"Course {i}",
+                                              sub_code=f"CS5{i}", credits=3) for i in range(5)]
+        for i, course in enumerate(self.courses):
+            # student 4 has no marks at all; course i skips student i
+            for j, s in enumerate(self.students[:3]):
+                if i != j:
+                    Marks.objects.create(student=s, class_info=self.class_obj, course=course,
+                                         ia1=10 + j, total=20 + i + j)
+        self.params = {"branch": "CSE", "semester": "5", "section": "A"}
+
+    def test_matrix_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/class_results/", self.params).json()
+        self.assertEqual(len(ctx.captured_queries), 3)  # class + courses + roster/marks join
+        self.assertEqual([c["subcode"] for c in data["courses"]], ["CS50", "CS51", "CS52", "CS53", "CS54"])
+        self.assertEqual(data["students"][0]["marks"], [None, 21, 22, 23, 24])
+        self.assertEqual(data["students"][3]["marks"], [None] * 5)
+
+        data = self.client.get("/api/class_results/", {**self.params, "components": "1"}).json()
+        self.assertEqual(data["fields"][-1], "total")
+        self.assertEqual(data["students"][1]["marks"][0][0], 11)
+
+    def test_rebuilt_after_write(self):
+        self.client.get("/api/class_results/", self.params)
+        self.client.post("/api/delete_uploaded_marks/", {"course_id": self.courses[1].id},
+                         content_type="application/json")
+        data = self.client.get("/api/class_results/", self.params).json()
+        self.assertEqual(data["students"][0]["marks"][1], None)
+
+    def test_workbook_export(self):
+        res = self.client.get("/api/class_results/export/", self.params)
+        rows = list(load_workbook(BytesIO(res.content)).active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][:4], ("SL No", "USN", "Name", "CS50"))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[2][3:], (21, None, 23, 24, 25))
+
+
+class SgpaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_a = make_class(2, section="A")
+        self.class_b = make_class(1, section="B")
+        self.courses = [
+            Course.objects.create(class_info=self.class_a, course_name="DBMS", sub_code="CS51", credits=4),
+            Course.objects.create(class_info=self.class_a, course_name="CN", sub_code="CS52", credits=3),
+        ]
+        s1, s2 = Student.objects.filter(class_info=self.class_a).order_by("sl_no")
+        Marks.objects.create(student=s1, class_info=self.class_a, course=self.courses[0], total=46)  # 92% O
+        Marks.objects.create(student=s1, class_info=self.class_a, course=self.courses[1], total=36)  # 72% A
+        Marks.objects.create(student=s2, class_info=self.class_a, course=self.courses[0], total=15)  # 30% F
+        Marks.objects.create(student=s2, class_info=self.class_a, course=self.courses[1], total=None)
+        self.params = {"branch": "CSE", "semester": "5"}
+
+    def test_grades_and_sgpa(self):
+        students = self.client.get("/api/sgpa/", {**self.params, "section": "A"}).json()["students"]
+        first, second = students
+        self.assertEqual([g["grade"] for g in first["grades"]], ["O", "A"])
+        self.assertEqual(first["sgpa"], round((10 * 4 + 8 * 3) / 7, 2))
+        self.assertEqual((first["credits"], first["credits_earned"]), (7, 7))
+        self.assertEqual((second["sgpa"], second["credits_earned"], second["incomplete"]), (0, 0, True))
+
+    def test_custom_scale_and_cache(self):
+        with override_settings(GRADE_SCALE=[(0, "F", 0), (50, "P", 5)]):
+            first = self.client.get("/api/sgpa/", self.params).json()["students"][0]
+            self.assertEqual(first["sgpa"], 5)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get("/api/sgpa/", self.params)
+            self.assertEqual(len(ctx.captured_queries), 1)  # class versions only
+
+        Marks.objects.filter(course=self.courses[1]).update(total=50)
+        bump_class_version(self.class_a.id)
+        first = self.client.get("/api/sgpa/", self.params).json()["students"][0]
+        self.assertEqual(first["grades"][1]["grade"], "O")
+
+    def test_export_and_validation(self):
+        res = self.client.get("/api/sgpa/", {**self.params, "format": "xlsx"})
+        wb = load_workbook(BytesIO(res.content))
+        self.assertEqual(wb.sheetnames, ["SGPA", "Grades"])
+        self.assertEqual(wb["Grades"].max_row, 5)
+        self.assertEqual(self.client.get("/api/sgpa/", {"branch": "CSE"}).status_code, 400)
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.class_obj = make_class(5)
+        students = list(Student.objects.filter(class_info=self.class_obj).order_by("sl_no"))
+        self.course = Course.objects.create(class_info=self.class_obj, course_name="DBMS", credits=3)
+        other = Course.objects.create(class_info=self.class_obj, course_name="CN", credits=3)
+        for s, total in zip(students, [40, 30, 40, 20, None]):
+            Marks.objects.create(student=s, class_info=self.class_obj, course=self.course, total=total)
+        for s, total in zip(students, [20, 50, 30, 20]):
+            Marks.objects.create(student=s, class_info=self.class_obj, course=other, total=total)
+
+    def test_course_ranks_with_ties(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/course_analytics/", {"course_id": self.course.id}).json()
+        self.assertLessEqual(len(ctx.captured_queries), 3)
+        ranking = data["ranking"]
+        self.assertEqual([(r["usn"], r["rank"]) for r in ranking],
+                         [("1MSA0001", 1), ("1MSA0003", 1), ("1MSA0002", 3), ("1MSA0004", 4)])
+        self.assertEqual([r["percentile"] for r in ranking], [66.7, 66.7, 33.3, 0.0])
+        self.assertEqual((data["count"], data["unranked"], data["mean"]), (4, 1, 32.5))
+        self.assertEqual(ranking[0]["z_score"], round(7.5 / data["std"], 2))
+        self.assertEqual(data["histogram"][8]["count"], 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/course_analytics/", {"course_id": self.course.id})
+        self.assertEqual(len(ctx.captured_queries), 1)  # course lookup, body from cache
+
+    def test_class_ranks_on_mean_total(self):
+        data = self.client.get("/api/class_analytics/",
+                               {"branch": "CSE", "semester": "5", "section": "A"}).json()
+        # means: 30, 40, 35, 20, student 5 has no marks
+        self.assertEqual([r["usn"] for r in data["ranking"]], ["1MSA0002", "1MSA0003", "1MSA0001", "1MSA0004"])
+        self.assertEqual(data["unranked"], 1)
+
+
+class SqliteConnectionTests(TransactionTestCase):
+    def test_pragmas_applied_to_new_connections(self):
+        values = pragma_values(connection)
+        self.assertEqual(values["busy_timeout"], settings.SQLITE_PRAGMAS["busy_timeout"])
+        self.assertEqual(values["synchronous"], 1)  # NORMAL
+        self.assertEqual(values["cache_size"], settings.SQLITE_PRAGMAS["cache_size"])
+
+    def test_atomic_blocks_take_write_lock_up_front(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                ClassInfo.objects.create(branch="CSE", semester="5", section="A")
+        self.assertEqual(ctx.captured_queries[0]["sql"], "BEGIN IMMEDIATE")
+
+
+class ReadOnlyDatabaseTests(TransactionTestCase):
+    def wrapper(self, alias, name):
+        return DatabaseWrapper({**connections[alias].settings_dict, "NAME": name}, alias)
+
+    def test_router_sends_view_reads_to_read_alias(self):
+        with mock.patch.dict(connections["readonly"].settings_dict, NAME="file:live.sqlite3?mode=ro"):
+            self.assertEqual(Student.objects.all().db, "default")
+            with read_only_context():
+                self.assertEqual(Student.objects.all().db, "readonly")
+                self.assertEqual(router.db_for_write(Student), "default")
+                with transaction.atomic():
+                    self.assertEqual(Student.objects.all().db, "default")  # sees its own writes
+        with read_only_context():
+            self.assertEqual(Student.objects.all().db, "default")  # test mirror is the same database
+
+    def test_reads_do_not_wait_for_bulk_upload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "live.sqlite3")
+            writer = self.wrapper("default", path)
+            reader = self.wrapper("readonly", f"file:{path}?mode=ro")
+            try:
+                w = writer.cursor()
+                w.execute("CREATE TABLE marks (id INTEGER PRIMARY KEY, total REAL)")
+                w.execute("INSERT INTO marks (total) VALUES (40)")
+                r = reader.cursor()
+                r.execute("PRAGMA query_only")
+                self.assertEqual(r.fetchone()[0], 1)
+
+                w.execute("BEGIN IMMEDIATE")  # an upload holding the write lock
+                w.executemany("INSERT INTO marks (total) VALUES (%s)", [(i % 50,) for i in range(20000)])
+                start = time.perf_counter()
+                r.execute("SELECT COUNT(*) FROM marks")
+                self.assertEqual(r.fetchone()[0], 1)
+                self.assertLess(time.perf_counter() - start, 0.5)  # busy_timeout is 5 s
+                with self.assertRaises(OperationalError):
+                    r.execute("INSERT INTO marks (total) VALUES (1)")
+                w.execute("COMMIT")
+
+                r.execute("SELECT COUNT(*) FROM marks")
+                self.assertEqual(r.fetchone()[0], 20001)
+
+                snap = os.path.join(tmp, "snapshot.sqlite3")
+                snapshot_database(path, snap)
+                frozen = self.wrapper("readonly", f"file:{snap}?mode=ro&immutable=1")
+                try:
+                    c = frozen.cursor()
+                    c.execute("SELECT COUNT(*) FROM marks")
+                    self.assertEqual(c.fetchone()[0], 20001)
+                finally:
+                    frozen.close()
+            finally:
+                reader.close()
+                writer.close()
+
+
+@override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class TeacherReadsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        student_cache.clear()
+        self.class_obj = make_class(2)
+        self.subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3)
+        self.client.post("/api/upload_marks_subject/", {"subject_id": self.subject.id, "file": make_sheet(
+            [[1, "1MSA0001", "", 10, 30, 30, 20, 20, None]])})
+        self.course = Course.objects.get(class_info=self.class_obj)
+
+    def test_teacher_pages_never_read_the_snapshot(self):
+        cls = {"branch": "CSE", "semester": "5", "section": "A"}
+        # route as a snapshot deployment would (the test's own atomic block would keep reads on
+        # default); this TestCase refuses every query sent to "readonly"
+        routed = lambda: "readonly" if routers._read_only.get() else "default"
+        with mock.patch("core.routers.read_alias", routed):
+            for url, params in [
+                    ("/api/list_subjects/", cls),
+                    ("/api/get_students/", cls),
+                    ("/api/get_students/", {**cls, "stream": 1}),
+                    ("/api/download_subject_template/", {"subject_id": self.subject.id}),
+                    ("/api/get_uploaded_marks/", cls),
+                    ("/api/get_course_marks/", {"course_id": self.course.id}),
+            ]:
+                res = self.client.get(url, params)
+                self.assertEqual(res.status_code, 200, url)
+                if res.streaming:
+                    b"".join(res.streaming_content)
+
+            with self.assertRaisesMessage(AssertionError, "'readonly' are not allowed"):
+                self.client.get("/api/student/transcript/", {"usn": "1MSA0001"})
+
+
+class ApiBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        student_cache.clear()
+        clear_matrix_cache()
+
+    def test_seed_department(self):
+        counts = seed_department(semesters=2, sections=2, students=5, courses=3)
+        self.assertEqual(counts, {"classes": 4, "students": 20, "courses": 12, "marks": 60})
+        self.assertEqual(CourseStats.objects.filter(count=5).count(), 12)
+        with self.assertRaises(ValueError):
+            seed_department(semesters=1, sections=1)
+
+    def test_endpoints_within_query_budgets(self):
+        seed_department(sections=2, students=30, courses=4)
+        report = run_benchmark(repeat=2)
+        self.assertEqual(len(report["endpoints"]), len(ENDPOINTS))
+        self.assertEqual(report["failed"], [])
+        self.assertEqual(report["over_budget"], [])
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        with override_settings(METRICS_DB=os.path.join(self.tmp.name, "earlier.sqlite3")):
+            metrics.flush()  # counts left by other tests
+        self.settings_override = override_settings(METRICS_DB=os.path.join(self.tmp.name, "metrics.sqlite3"))
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        make_class(3)
+
+    def test_counts_requests_and_queries(self):
+        for _ in range(3):
+            self.client.get("/api/get_students/", {"branch": "CSE", "semester": "5", "section": "A"})
+        # another worker's counts, already in the shared store
+        metrics.observe("get_student_list", 200, 0.2, 5, 0.01, 100)
+        metrics.flush()
+
+        text = self.client.get("/metrics/").content.decode()
+        self.assertIn("# TYPE marks_portal_request_duration_seconds histogram", text)
+        self.assertIn('marks_portal_requests_total{view="get_student_list",status="2xx"} 4', text)
+        self.assertIn('marks_portal_request_duration_seconds_count{view="get_student_list"} 4', text)
+        queries = re.search(r'marks_portal_sql_queries_total\{view="get_student_list"\} (\d+)', text)
+        self.assertGreater(int(queries.group(1)), 0)
+
+    async def test_counts_queries_of_async_views(self):
+        student_cache.clear()
+        await self.async_client.get("/api/student_subjects/", {"usn": "1MSA0001"})
+        metrics.flush()
+        text = metrics.render()
+        count = re.search(r'marks_portal_sql_queries_total\{view="student_subjects"\} (\d+)', text)
+        self.assertGreater(int(count.group(1)), 0)
+
+    def test_slow_request_log(self):
+        with override_settings(METRICS_SLOW_MS=0), self.assertLogs("core.slow_requests", "WARNING") as logs:
+            self.client.get("/api/get_students/", {"branch": "CSE", "semester": "5", "section": "A"})
+        self.assertIn("core_classinfo", logs.output[0])
+
+
+class StudentCacheTests(TestCase):
+    def setUp(self):
+        student_cache.clear()
+        self.class_obj = make_class(2)
+        self.subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3)
+
+    def upload(self, ia1):
+        self.client.post("/api/upload_marks_subject/", {"subject_id": self.subject.id, "file": make_sheet(
+            [[1, "1MSA0001", "", ia1, 30, 30, 20, 20, None]])})
+
+    @override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+    def test_hits_and_invalidation_on_upload(self):
+        self.upload(10)
+        course_id = Course.objects.get(class_info=self.class_obj).id
+        self.client.get("/api/student_subjects/", {"usn": "1MSA0001"})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post("/api/student_check/", {"usn": "1MSA0001"}, content_type="application/json")
+            summary = self.client.get("/api/student/summary/", {"usn": "1MSA0001", "subject_id": course_id}).json()
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(summary["summary"]["ia1"], 10)
+
+        self.upload(40)
+        summary = self.client.get("/api/student/summary/", {"usn": "1MSA0001", "subject_id": course_id}).json()
+        self.assertEqual(summary["summary"]["ia1"], 40)
+        stats = self.client.get("/api/cache_stats/").json()["student_cache"]
+        self.assertEqual((stats["misses"], stats["hits"], stats["invalidated"]), (2, 2, 1))
+
+    @override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+    def test_usn_in_two_classes_reads_one_student(self):
+        self.upload(10)
+        other = make_class(1, semester="6")
+        subject = Subject.objects.create(class_info=other, subject="OS", subcode="CS61", credits=3)
+        self.client.post("/api/upload_marks_subject/", {"subject_id": subject.id, "file": make_sheet(
+            [[1, "1MSA0001", "", 25, 30, 30, 20, 20, None]])})
+
+        data = self.client.get("/api/student/transcript/", {"usn": "1MSA0001"}).json()
+        self.assertEqual(data["student"]["semester"], "5")
+        self.assertEqual([c["subject"] for c in data["courses"]], ["DBMS"])
+        self.upload(40)
+        data = self.client.get("/api/student/transcript/", {"usn": "1MSA0001"}).json()
+        self.assertEqual(data["courses"][0]["ia1"], 40)
+
+    @override_settings(STUDENT_CACHE_SIZE=2)
+    def test_lru_eviction_and_unknown_usn(self):
+        for usn in ("1MSA0001", "1MSA0002", "NOPE", "1MSA0001"):
+            self.client.get("/api/student/transcript/", {"usn": usn})
+        stats = student_cache.stats()
+        self.assertEqual((stats["misses"], stats["evictions"], stats["size"]), (4, 2, 2))
+        self.assertEqual(self.client.get("/api/student/transcript/", {"usn": "NOPE"}).status_code, 404)
+        self.assertEqual(student_cache.stats()["hits"], 1)
+
+    def test_single_flight(self):
+        calls = []
+        release = threading.Event()
+
+        def slow_loader(usn):
+            calls.append(usn)
+            release.wait(2)
+            return (1, {"student": {"usn": usn}, "courses": []})
+
+        cache_ = StudentCache(loader=slow_loader, versions=lambda: {1: 0})
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache_.get("1MSA0001"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(cache_.stats()["coalesced"], 7)
+
+
+@override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        student_cache.clear()
+        self.class_obj = make_class(3)
+        self.subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3)
+        self.client.post("/api/upload_marks_subject/", {"subject_id": self.subject.id, "file": make_sheet(
+            [[1, "1MSA0001", "", 10, 30, 30, 20, 20, None]])})
+
+    async def test_concurrent_student_requests_load_once(self):
+        responses = await asyncio.gather(*(
+            self.async_client.post("/api/student_check/", {"usn": "1MSA0001"}, content_type="application/json")
+            for _ in range(20)
+        ))
+        self.assertEqual({r.status_code for r in responses}, {200})
+        self.assertEqual(responses[0].json()["student_name"], "Student 1")
+        stats = student_cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"] + stats["coalesced"], 19)
+
+        subjects = await self.async_client.get("/api/student_subjects/", {"usn": "1MSA0001"})
+        self.assertEqual([s["subcode"] for s in subjects.json()["subjects"]], ["CS51"])
+        missing = await self.async_client.get("/api/student/transcript/", {"usn": "NOPE"})
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_class_listings_are_cached(self):
+        params = {"branch": "CSE", "semester": "5", "section": "A"}
+        students = await self.async_client.get("/api/get_students/", params)
+        self.assertEqual([s["usn"] for s in students.json()["students"]], ["1MSA0001", "1MSA0002", "1MSA0003"])
+        subjects = await self.async_client.get("/api/list_subjects/", params)
+        self.assertEqual(subjects.json()["count"], 1)
+        again = await self.async_client.get("/api/list_subjects/", params, headers={"If-None-Match": subjects["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_async_benchmark(self):
+        report = run_async_benchmark(concurrency=(1, 20), visits=10)
+        self.assertEqual([lvl["failed"] for lvl in report["levels"]], [0, 0])
+        self.assertEqual(report["levels"][1]["peak_in_flight"], 20)
+
+
+@override_settings(UPLOAD_JOB_WORKERS=0, UPLOAD_JOB_DIR=tempfile.gettempdir())
+class PublishResultsTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.settings_override = override_settings(PUBLISH_DIR=tmp.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.class_obj = make_class(3)
+        self.subject = Subject.objects.create(class_info=self.class_obj, subject="DBMS", subcode="CS51", credits=3)
+        self.upload(10)
+
+    def upload(self, ia1):
+        self.client.post("/api/upload_marks_subject/", {"subject_id": self.subject.id, "file": make_sheet(
+            [[1, "1MSA0001", "", ia1, 30, 30, 20, 20, None], [2, "1MSA0002", "", 20, 30, 30, 20, 20, None]])})
+
+    def publish(self):
+        return self.client.post("/api/publish_results/", {"branch": "CSE", "semester": "5"},
+                                content_type="application/json").json()
+
+    def read(self, usn):
+        pointer = self.client.get(f"/results/students/{file_key(usn)}.json")
+        doc = self.client.get(json.loads(b"".join(pointer.streaming_content))["doc"])
+        self.assertIn("immutable", doc["Cache-Control"])
+        return json.loads(b"".join(doc.streaming_content))
+
+    def test_publish_and_serve_without_queries(self):
+        self.assertEqual(self.publish()["written"], 3)
+        with CaptureQueriesContext(connection) as ctx:
+            doc = self.read("1MSA0001")
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(doc["courses"][0]["ia1"], 10)
+        self.assertEqual(doc, self.client.get("/api/student/transcript/", {"usn": "1MSA0001"}).json())
+        self.assertEqual(self.client.get("/results/students/NOPE.json").status_code, 404)
+
+    def test_incremental_republish(self):
+        self.publish()
+        self.assertEqual(self.publish(), {"status": "success", "classes": 1, "written": 0, "unchanged": 3,
+                                          "removed": 0, "skipped_classes": 1})
+        self.upload(35)  # only 1MSA0001 changes
+        result = self.publish()
+        self.assertEqual((result["written"], result["unchanged"]), (1, 2))
+        self.assertEqual(self.read("1MSA0001")["courses"][0]["ia1"], 35)
+
+        res = self.client.post("/api/publish_results/", {"branch": "CSE", "semester": "5", "unpublish": True},
+                               content_type="application/json").json()
+        self.assertEqual(res["removed"], 3)
+        self.assertEqual(self.client.get(f"/results/students/{file_key('1MSA0001')}.json").status_code, 404)
+
+    def test_usns_never_share_files(self):
+        self.assertNotEqual(file_key("AB.1"), file_key("AB_1"))
+        # the same USN in another class gets its own document; the pointer stays with the first student
+        other = make_class(1, semester="6")
+        subject = Subject.objects.create(class_info=other, subject="OS", subcode="CS61", credits=3)
+        self.client.post("/api/upload_marks_subject/", {"subject_id": subject.id, "file": make_sheet(
+            [[1, "1MSA0001", "", 25, 30, 30, 20, 20, None]])})
+        self.assertEqual(self.client.post("/api/publish_results/", {"branch": "CSE", "semester": "6"},
+                                          content_type="application/json").json()["written"], 1)
+        self.assertEqual(self.client.get(f"/results/students/{file_key('1MSA0001')}.json").status_code, 404)
+        self.publish()
+        self.assertEqual(self.read("1MSA0001"), self.client.get("/api/student/transcript/", {"usn": "1MSA0001"}).json())
+        self.assertEqual(self.read("1MSA0001")["courses"][0]["subject"], "DBMS")
@@ -0,0 +1,123 @@
+# core/transcript.py
+"""
+Student transcript: every course with component marks and totals for a USN.
+
+Built from one values() query over Marks joined to Student, ClassInfo and
+Course; a second query is only needed for a student with no marks yet.
+A USN is only unique within a class; like the student views always have, the
+transcript is that of the first Student row with the USN, so its marks all
+come from one class.
+load_student() also returns the student's class id, which the per-USN cache
+(core/student_cache.py) uses for invalidation. aload_student() is the same
+with the async ORM, for the ASGI student views.
+"""
+from .models import Student, Marks
+
+MARK_KEYS = ["ia1", "ia2", "ia3", "asg1", "asg2", "lab_cie", "lab_test", "total"]
+
+_FIELDS = [
+    "student__class_info_id", "student__name", "student__usn",
+    "student__class_info__branch", "student__class_info__semester", "student__class_info__section",
+    "course_id", "course__course_name", "course__sub_code", "course__credits", "course__faculty",
+] + MARK_KEYS
+
+
+def _student_info(name, usn, branch, semester, section):
+    return {"name": name, "usn": usn, "branch": branch, "semester": semester, "section": section}
+
+
+def build_transcript(usn):
+    """Transcript dict for a USN, or None if no such student."""
+    loaded = load_student(usn)
+    return loaded[1] if loaded else None
+
+
+def _marks_rows(usn):
+    student_id = Student.objects.filter(usn=usn).order_by("id").values("id")[:1]
+    return (
+        Marks.objects.filter(student_id=student_id, course__isnull=False)
+        .order_by("course__course_name")
+        .values_list(*_FIELDS)
+    )
+
+
+def _student_row(usn):
+    return Student.objects.filter(usn=usn).order_by("id").values_list(
+        "class_info_id", "name", "usn", "class_info__branch", "class_info__semester", "class_info__section",
+    )
+
+
+def load_student(usn):
+    """(class id, transcript dict) for a USN, or None if no such student."""
+    rows = list(_marks_rows(usn))
+    return _assemble(rows, None if rows else _student_row(usn).first())
+
+
+async def aload_student(usn):
+    """load_student() with the async ORM."""
+    rows = [r async for r in _marks_rows(usn)]
+    return _assemble(rows, None if rows else await _student_row(usn).afirst())
+
+
+def _assemble(rows, student_row):
+    if rows:
+        class_id = rows[0][0]
+        student = _student_info(*rows[0][1:6])
+    elif student_row is None:
+        return None
+    else:
+        class_id = student_row[0]
+        student = _student_info(*student_row[1:])
+
+    courses = []
+    for r in rows:
+        course = {
+            "subject_id": r[6],
+            "subject": r[7],
+            "subcode": r[8] or "",
+            "credits": r[9],
+            "faculty": r[10] or "",
+        }
+        course.update(zip(MARK_KEYS, r[11:]))
+        courses.append(course)
+
+    return class_id, {"student": student, "courses": courses}
+
+
+_CLASS_FIELDS = [
+    "class_info_id", "name", "usn", "class_info__branch", "class_info__semester", "class_info__section",
+    "marks__course_id", "marks__course__course_name", "marks__course__sub_code", "marks__course__credits",
+    "marks__course__faculty",
+] + ["marks__" + k for k in MARK_KEYS]
+
+
+def class_transcripts(class_ids):
+    """
+    Yield (class id, usn, transcript dict) for every student of the classes,
+    from one query over the rosters LEFT JOINed to Marks and Course.
+    """
+    rows = (
+        Student.objects.filter(class_info_id__in=class_ids)
+        .order_by("class_info_id", "usn", "id", "marks__course__course_name")
+        .values_list(*_CLASS_FIELDS)
+        .iterator(chunk_size=2000)
+    )
+    current = None
+    for r in rows:
+        if current is None or current[1] != r[2] or current[0] != r[0]:
+            if current is not None:
+                yield current
+            current = (r[0], r[2], {"student": _student_info(*r[1:6]), "courses": []})
+        if r[6] is None:
+            continue  # no marks yet
+        course = {
+            "subject_id": r[6],
+            "subject": r[7],
+            "subcode": r[8] or "",
+            "credits": r[9],
+            "faculty": r[10] or "",
+        }
+        course.update(zip(MARK_KEYS, r[11:]))
+        current[2]["courses"].append(course)
+    if current is not None:
+        yield current
@@ -23,16 +23,32 @@ urlpatterns = [
     path("api/list_subjects/", views.list_subjects),
     path("api/download_subject_template/", views.download_template_for_subject),
     path("api/upload_marks_subject/", views.upload_marks_for_subject),
+    path("api/upload_status/", views.upload_status),
     path("api/student_check/", views.student_check),
     path("api/student_subjects/", views.student_subjects),
 
     path("api/get_students/", views.get_student_list),
     path("api/upload_students/", views.upload_student_list),
+    path("api/import_roster/", views.import_department_roster),
     path("api/get_uploaded_marks/", views.get_uploaded_marks),
+    path("api/department_uploads/", views.get_department_uploads),
+    path("api/export_marks/", views.export_marks),
+    path("api/class_results/", views.get_class_results),
+    path("api/class_results/export/", views.export_class_results),
+    path("api/sgpa/", views.get_sgpa),
+    path("api/course_analytics/", views.get_course_analytics),
+    path("api/class_analytics/", views.get_class_analytics),
     path("api/get_course_marks/", views.get_course_marks),
+    path("api/course_stats/", views.get_course_stats),
+    path("api/cache_stats/", views.get_cache_stats),
+    path("metrics/", views.metrics, name="metrics"),
     path("api/delete_uploaded_marks/", views.delete_uploaded_marks),
+    path("api/recompute_totals/", views.recompute_course_totals),
+    path("api/publish_results/", views.publish_results),
+    path("results/<path:path>", views.published_results),
 
     # student endpoints
    
     path("api/student/summary/", views.get_student_summary),
+    path("api/student/transcript/", views.student_transcript),
 ]
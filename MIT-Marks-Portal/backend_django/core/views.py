@@ -1,16 +1,40 @@
 # core/views.py
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, FileResponse
 from django.views.decorators.csrf import csrf_exempt
-
-from .models import ClassInfo, Student, Subject, Course, Marks
+from django.views.static import serve
+
+from .models import ClassInfo, Student, Subject, Course, CourseStats, Marks, UploadJob
+from .analytics import course_analytics, class_analytics
+from .export import export_rows, iter_csv, xlsx_tempfile
+from .jobs import current_worker, submit_upload_job, job_status, expire_stale_jobs
+from .listing import parse_listing, page, apage, iter_json, aiter_json
+from .matrix import get_matrix, matrix_workbook
+from .metrics import render as render_metrics
+from .overview import upload_overview, department_overview
+from .publish import HASHED_NAME, publish_classes, unpublish_classes
+from .recompute import recompute_totals, marks_in_scope
+from .response_cache import cached_json_response, acached_json_response, bump_class_version, cache_counters
+from .roster import sync_roster, import_rosters
+from .routers import read_only_database
+from .sgpa import semester_results, results_workbook
+from .sheet_template import get_template, template_etag, bump_roster_version
+from .stats import clear_course_stats, stats_summary
+from .student_cache import aget_student, student_cache
+from .workbook import spool_upload, open_upload_rows
 
 import json
-import openpyxl
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, Border, Side
-from openpyxl.utils import get_column_letter
-from math import ceil
+
+# output key -> ORM field for the fields= projection of the list endpoints
+STUDENT_FIELDS = {"sl": "sl_no", "usn": "usn", "name": "name"}
+MARK_FIELDS = {
+    "usn": "student__usn", "name": "student__name",
+    "ia1": "ia1", "ia2": "ia2", "ia3": "ia3", "asg1": "asg1", "asg2": "asg2",
+    "lab_cie": "lab_cie", "lab_test": "lab_test", "total": "total",
+}
 
 # -------------------------
 # PAGE RENDER VIEWS
@@ -93,11 +117,13 @@ def create_subject(request):
         credits=credits,
         faculty=faculty
     )
+    bump_roster_version(class_obj.id)
+    bump_class_version(class_obj.id)
 
     return JsonResponse({"status": "success", "subject_id": new_sub.id})
 
 
-def list_subjects(request):
+async def list_subjects(request):
     branch = request.GET.get("branch")
     semester = request.GET.get("semester")
     section = request.GET.get("section")
@@ -106,24 +132,26 @@ def list_subjects(request):
         return JsonResponse({"subjects": [], "error": "Missing parameters"})
 
     try:
-        class_obj = ClassInfo.objects.get(branch=branch, semester=semester, section=section)
+        class_obj = await ClassInfo.objects.aget(branch=branch, semester=semester, section=section)
     except ClassInfo.DoesNotExist:
         # Class doesn't exist yet, return empty list
         return JsonResponse({"subjects": [], "message": "Class not found. Please add students first."})
 
-    subjects = Subject.objects.filter(class_info=class_obj).order_by('subject')
-
-    out = []
-    for s in subjects:
-        out.append({
-            "id": s.id,
-            "subject": s.subject,
-            "subcode": s.subcode,
-            "credits": s.credits,
-            "faculty": s.faculty
-        })
+    async def build():
+        subjects = Subject.objects.filter(class_info=class_obj).order_by('subject')
+
+        out = []
+        async for s in subjects:
+            out.append({
+                "id": s.id,
+                "subject": s.subject,
+                "subcode": s.subcode,
+                "credits": s.credits,
+                "faculty": s.faculty
+            })
+        return {"subjects": out, "count": len(out)}
 
-    return JsonResponse({"subjects": out, "count": len(out)})
+    return await acached_json_response(request, class_obj, "list_subjects", build)
 
 
 # -------------------------
@@ -139,102 +167,22 @@ def download_template_for_subject(request):
     """
     subject_id = request.GET.get("subject_id")
     try:
-        sub = Subject.objects.get(id=subject_id)
-    except Subject.DoesNotExist:
+        sub = Subject.objects.select_related("class_info").get(id=subject_id)
+    except (Subject.DoesNotExist, ValueError):
         return JsonResponse({"error": "Subject not found"}, status=404)
 
-    class_obj = sub.class_info
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Template"
-
-    if int(sub.credits or 0) == 4:
-        headers = ["SL No", "USN", "Name", "IA1", "IA2", "IA3",
-                   "ASG1", "ASG2", "Lab CIE", "Lab Test", "Total CIE (50)"]
-    else:
-        headers = ["SL No", "USN", "Name", "IA1", "IA2", "IA3",
-                   "ASG1", "ASG2", "Total CIE (50)"]
-    ws.append(headers)
-
-    # style header
-    header_font = Font(bold=True)
-    for col_idx, h in enumerate(headers, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=h)
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    # Fetch students for class
-    students = Student.objects.filter(class_info=class_obj).order_by("sl_no")
-
-    # Build formula template depending on credits
-    if int(sub.credits or 0) == 4:
-        # 4-credit: IA(15) + Asg(10) + Lab(25) = 50 (columns D-J, total in K)
-        formula_template = (
-            "=CEILING( ( (LARGE(D{r}:F{r},1)+LARGE(D{r}:F{r},2))/2 )/40*15"
-            " + ( (G{r}+H{r})/2 )/25*10"
-            " + (I{r}+J{r}), 1)"
-        )
-    else:
-        # 3/2/1-credit: IA(25) + Asg(25) = 50 (columns D-H, total in I)
-        formula_template = (
-            "=CEILING( ( (LARGE(D{r}:F{r},1)+LARGE(D{r}:F{r},2))/2 )/40*25"
-            " + (G{r}+H{r})/50*25, 1)"
-        )
-
-    # write rows
-    for idx, s in enumerate(students, start=2):
-        ws.cell(row=idx, column=1, value=s.sl_no)
-        ws.cell(row=idx, column=2, value=s.usn)
-        name_cell = ws.cell(row=idx, column=3, value=s.name)
-        name_cell.alignment = Alignment(wrap_text=True)
-        if int(sub.credits or 0) == 4:
-            # blank cells for marks D..J (4-credit has lab columns)
-            for col in range(4, 11):
-                ws.cell(row=idx, column=col, value="")
-            # put formula in Total column (column 11)
-            ws.cell(row=idx, column=11, value=formula_template.format(r=idx))
-        else:
-            # blank cells for marks D..H (3/2/1-credit no lab columns)
-            for col in range(4, 9):
-                ws.cell(row=idx, column=col, value="")
-            # put formula in Total column (column 9)
-            ws.cell(row=idx, column=9, value=formula_template.format(r=idx))
-
-    # adjust column widths (wider for name)
-    if int(sub.credits or 0) == 4:
-        col_widths = {
-            1: 6,   # SL No
-            2: 12,  # USN
-            3: 28,  # Name
-            4: 8,  # IA1
-            5: 8,  # IA2
-            6: 8,  # IA3
-            7: 8,  # ASG1
-            8: 8,  # ASG2
-            9: 10, # Lab CIE
-            10: 10,# Lab Test
-            11: 12 # Total
-        }
-    else:
-        col_widths = {
-            1: 6,   # SL No
-            2: 12,  # USN
-            3: 28,  # Name
-            4: 8,  # IA1
-            5: 8,  # IA2
-            6: 8,  # IA3
-            7: 8,  # ASG1
-            8: 8,  # ASG2
-            9: 12  # Total
-        }
-    for col_idx, width in col_widths.items():
-        ws.column_dimensions[get_column_letter(col_idx)].width = width
+    # served from cache until the roster, subjects or credits change
+    etag = template_etag(sub)
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponse(status=304)
+        response["ETag"] = etag
+        return response
 
     file_name = f"{sub.subject}_template.xlsx"
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    response = HttpResponse(get_template(sub), content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
     response["Content-Disposition"] = f'attachment; filename="{file_name}"'
-    wb.save(response)
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
     return response
 
 
@@ -252,7 +200,9 @@ def upload_marks_for_subject(request):
     Behavior:
       - find Subject by id
       - find or create Course for the same class_info with the subject name (so Marks.course can reference it)
-      - parse sheet rows, calculate total (if missing) and save into Marks (student, class_info, course)
+      - store the file and queue an UploadJob that parses sheet rows, calculates total (if missing)
+        and saves into Marks (student, class_info, course)
+      - returns {"status": "queued", "job_id": ...}; poll /api/upload_status/?job_id= for the result
     """
     if request.method != "POST":
         return JsonResponse({"error": "POST only"}, status=400)
@@ -279,6 +229,7 @@ def upload_marks_for_subject(request):
 
     # if teacher_name provided, update course faculty; if credits_override provided, update course credits
     updated = False
+    credits_changed = False
     if teacher_name and course_obj.faculty != teacher_name:
         course_obj.faculty = teacher_name
         updated = True
@@ -288,185 +239,120 @@ def upload_marks_for_subject(request):
             if course_obj.credits != cval:
                 course_obj.credits = cval
                 updated = True
+                credits_changed = True
         except:
             pass
     if updated:
         course_obj.save()
+        bump_class_version(class_obj.id)
+    if credits_changed:
+        # rows missing from this sheet must follow the new scheme too
+        recompute_totals(marks_in_scope(course_id=course_obj.id))
+
+    credits_for_calc = course_obj.credits or subject.credits or (int(credits_override) if credits_override else 3)
+
+    # persist the file and hand it to the worker pool; the page polls upload_status
+    file_path = spool_upload(file, dir=settings.UPLOAD_JOB_DIR)
+    job = UploadJob.objects.create(
+        class_info=class_obj,
+        course=course_obj,
+        credits=int(credits_for_calc),
+        file_path=file_path,
+        worker=current_worker(),
+    )
+    submit_upload_job(job)
+
+    return JsonResponse({"status": "queued", "job_id": job.id}, status=202)
 
-    # load workbook
-    try:
-        wb = openpyxl.load_workbook(file, data_only=False)
-    except Exception as e:
-        return JsonResponse({"error": f"Failed to read Excel file: {str(e)}"}, status=400)
 
-    sheet = wb.active
+def upload_status(request):
+    """Progress of a queued marks upload (see core/jobs.py)"""
+    job_id = request.GET.get("job_id")
+    if not job_id:
+        return JsonResponse({"error": "job_id required"}, status=400)
 
-    # build header mapping
-    headers = []
     try:
-        headers = [str(h.value).lower().strip() if h.value is not None else "" for h in sheet[1]]
-    except Exception:
-        return JsonResponse({"error": "Invalid sheet header row"}, status=400)
-
-    def get_index(names):
-        for name in names:
-            try:
-                if name in headers:
-                    return headers.index(name)
-            except Exception:
-                continue
-        return None
+        job = UploadJob.objects.get(id=job_id)
+    except (UploadJob.DoesNotExist, ValueError):
+        return JsonResponse({"error": "Upload job not found"}, status=404)
 
-    i_usn = get_index(["usn", "u s n", "usn "])
-    i_ia1 = get_index(["ia1 (40)", "ia1", "ia 1", "ia1 ( 40 )"])
-    i_ia2 = get_index(["ia2 (40)", "ia2", "ia 2"])
-    i_ia3 = get_index(["ia3 (40)", "ia3", "ia 3"])
-    i_asg1 = get_index(["asg1 (25)", "asg1 (20)", "asg1", "asg 1"])
-    i_asg2 = get_index(["asg2 (25)", "asg2 (20)", "asg2", "asg 2"])
-    i_labcie = get_index(["lab cie", "lab cie (15)", "lab_cie"])
-    i_labtest = get_index(["lab test", "lab test (10)", "lab_test"])
-    i_total = get_index(["total cie", "total cie (50)", "total", "total cie ( 50 )"])
-
-    # row loop
-    saved = 0
-    errors = []
-    credits_for_calc = course_obj.credits or subject.credits or (int(credits_override) if credits_override else 3)
+    if job.status in ("queued", "running") and expire_stale_jobs(UploadJob.objects.filter(id=job.id)):
+        job.refresh_from_db()
 
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        # read usn and skip empty rows
-        usn = None
-        if i_usn is not None and i_usn < len(row):
-            usn = row[i_usn]
-        # if usn not provided, try column 2 as fallback
-        if not usn and len(row) >= 2:
-            usn = row[1]
+    return JsonResponse(job_status(job))
 
-        if not usn:
-            continue
-        usn = str(usn).strip()
 
-        # find student in that class
-        try:
-            student = Student.objects.get(usn=usn, class_info=class_obj)
-        except Student.DoesNotExist:
-            # skip rows whose USN not found (optionally collect)
-            errors.append(f"Student with USN {usn} not found in class {class_obj}.")
-            continue
-
-        def val(i):
-            try:
-                if i is None: 
-                    return None
-                if i >= len(row): 
-                    return None
-                v = row[i]
-                if v in ("", None):
-                    return None
-                return float(v)
-            except Exception:
-                return None
-
-        v_ia1 = val(i_ia1)
-        v_ia2 = val(i_ia2)
-        v_ia3 = val(i_ia3)
-        v_asg1 = val(i_asg1)
-        v_asg2 = val(i_asg2)
-        v_labcie = val(i_labcie) or 0
-        v_labtest = val(i_labtest) or 0
-        v_total = val(i_total)
-
-        # If total is not provided in sheet, compute it using same logic as template formulas
-        if v_total is None:
-            # prepare internals list
-            internals = [x for x in (v_ia1, v_ia2, v_ia3) if x is not None]
-            # need at least two internals to compute best-two avg; if less, treat missing as 0 (you may change)
-            if len(internals) < 2:
-                # set missing internals to 0 if needed to compute
-                while len(internals) < 2:
-                    internals.append(0.0)
-            # sort descending and pick top2
-            internals_sorted = sorted(internals, reverse=True)
-            best2_avg = (internals_sorted[0] + internals_sorted[1]) / 2.0
-
-            asg_avg = None
-            if v_asg1 is not None and v_asg2 is not None:
-                asg_avg = (v_asg1 + v_asg2) / 2.0
-            elif v_asg1 is not None:
-                asg_avg = v_asg1
-            elif v_asg2 is not None:
-                asg_avg = v_asg2
-            else:
-                asg_avg = 0.0
-
-            if int(credits_for_calc) == 4:
-                # 4-credit: IA(15) + Asg(10) + Lab(25) = 50
-                internal15 = (best2_avg / 40.0) * 15.0
-                assign10 = (asg_avg / 25.0) * 10.0
-                lab_total = (v_labcie or 0) + (v_labtest or 0)
-                total_calc = internal15 + assign10 + lab_total
-                v_total = ceil(total_calc)
-            else:
-                # 3/2/1-credit: IA(25) + Asg(25) = 50
-                internal25 = (best2_avg / 40.0) * 25.0
-                assign_sum = (v_asg1 or 0) + (v_asg2 or 0)
-                assign25 = (assign_sum / 50.0) * 25.0  # Scale from 50 to 25
-                total_calc = internal25 + assign25
-                v_total = ceil(total_calc)
-        # else: if total provided, accept as float
-        else:
-            try:
-                v_total = float(v_total)
-            except:
-                v_total = None
-
-        # Save/Update Marks object for this student + course
-        # Marks has fields: student, class_info, course, ia1, ia2, ia3, asg1, asg2, lab_cie, lab_test, total
+# -------------------------
+# RECOMPUTE TOTALS
+# -------------------------
+@csrf_exempt
+def recompute_course_totals(request):
+    """
+    Rebuild Marks.total with each course's current credits.
+    JSON body: {"course_id": ..} or {"branch", "semester", "section"} or {"all": true}
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST only"}, status=400)
+
+    data = json.loads(request.body or "{}")
+    course_id = data.get("course_id")
+    branch = data.get("branch")
+    semester = data.get("semester")
+    section = data.get("section")
+
+    if course_id:
+        if not Course.objects.filter(id=course_id).exists():
+            return JsonResponse({"error": "Course not found"}, status=404)
+        qs = marks_in_scope(course_id=course_id)
+    elif branch and semester and section:
         try:
-            obj, created = Marks.objects.update_or_create(
-                student=student,
-                class_info=class_obj,
-                course=course_obj,
-                defaults={
-                    "ia1": v_ia1,
-                    "ia2": v_ia2,
-                    "ia3": v_ia3,
-                    "asg1": v_asg1,
-                    "asg2": v_asg2,
-                    "lab_cie": v_labcie,
-                    "lab_test": v_labtest,
-                    "total": v_total
-                }
-            )
-            saved += 1
-        except Exception as e:
-            errors.append(f"Failed saving marks for {usn}: {str(e)}")
-
-    result = {"status": "saved", "saved_rows": saved}
-    if errors:
-        result["errors"] = errors[:20]  # don't return too big list
+            class_obj = ClassInfo.objects.get(branch=branch, semester=semester, section=section)
+        except ClassInfo.DoesNotExist:
+            return JsonResponse({"error": "Class not found"}, status=404)
+        qs = marks_in_scope(class_info=class_obj)
+    elif data.get("all"):
+        qs = marks_in_scope()
+    else:
+        return JsonResponse({"error": "course_id, class or all required"}, status=400)
 
-    return JsonResponse(result)
+    result = recompute_totals(qs)
+    return JsonResponse({"status": "success", **result})
 
 
 # -------------------------
 # STUDENT LIST
 # -------------------------
-def get_student_list(request):
+async def get_student_list(request):
     branch = request.GET.get("branch")
     semester = request.GET.get("semester")
     section = request.GET.get("section")
 
     try:
-        class_obj = ClassInfo.objects.get(branch=branch, semester=semester, section=section)
+        fields, limit, cursor = parse_listing(request, STUDENT_FIELDS)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        class_obj = await ClassInfo.objects.aget(branch=branch, semester=semester, section=section)
     except ClassInfo.DoesNotExist:
         return JsonResponse({"students": []})
 
-    students = [
-        {"sl": s.sl_no, "usn": s.usn, "name": s.name}
-        for s in class_obj.students.all().order_by("sl_no")
-    ]
+    students = Student.objects.filter(class_info=class_obj)
+    if limit is None and request.GET.get("stream"):
+        # the body is read by the server after the view returns: an async
+        # iterator under ASGI, a sync one for WSGI workers (which would buffer an async one)
+        stream = aiter_json if settings.ASGI_MODE else iter_json
+        return StreamingHttpResponse(stream({}, "students", students, fields, "sl_no", "id"),
+                                     content_type="application/json")
 
-    return JsonResponse({"students": students})
+    # only the requested columns, one page at a time when limit= is given (core/listing.py)
+    async def build():
+        rows, next_cursor = await apage(students, fields, "sl_no", "id", cursor, limit)
+        if limit is None:
+            return {"students": rows}
+        return {"students": rows, "next_cursor": next_cursor}
+
+    return await acached_json_response(request, class_obj, "get_students", build)
 
 
 # -------------------------
@@ -489,102 +375,140 @@ def upload_student_list(request):
         section=section
     )
 
-    Student.objects.filter(class_info=class_obj).delete()
+    # diff against the current roster by USN; unchanged students keep their ids and marks
+    summary = sync_roster(class_obj, students)
 
-    for s in students:
-        Student.objects.create(
-            class_info=class_obj,
-            sl_no=s["sl"],
-            usn=s["usn"],
-            name=s["name"]
-        )
+    return JsonResponse({"status": "success", "summary": summary})
 
-    return JsonResponse({"status": "success"})
+
+# -------------------------
+# DEPARTMENT ROSTER IMPORT
+# -------------------------
+@csrf_exempt
+def import_department_roster(request):
+    """
+    Expects form-data "file": .xlsx or .csv with branch, semester, section, sl, usn, name columns
+    covering any number of classes. Missing classes are created; students are added or updated.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST only"}, status=400)
+
+    file = request.FILES.get("file")
+    if not file:
+        return JsonResponse({"error": "file required"}, status=400)
+
+    try:
+        with open_upload_rows(file) as rows:
+            result = import_rosters(rows)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"error": f"Failed to read file: {str(e)}"}, status=400)
+
+    return JsonResponse({"status": "success", **result})
 
 
 # -------------------------
 # STUDENT SUMMARY
 # -------------------------
-def get_student_summary(request):
+@read_only_database
+async def get_student_summary(request):
     usn = request.GET.get("usn")
     subject_id = request.GET.get("subject_id")
 
     if not usn or not subject_id:
         return JsonResponse({"error": "USN and subject_id required"}, status=400)
 
-    try:
-        stu = Student.objects.get(usn=usn)
-    except Student.DoesNotExist:
+    # served from the per-USN result-day cache (core/student_cache.py)
+    transcript = await aget_student(usn.strip())
+    if transcript is None:
         return JsonResponse({"error": "Student not found"}, status=404)
 
-    try:
-        marks = Marks.objects.get(student=stu, course__id=subject_id)
-    except Marks.DoesNotExist:
+    course = next((c for c in transcript["courses"] if str(c["subject_id"]) == str(subject_id)), None)
+    if course is None:
         return JsonResponse({"error": "Marks not found for this subject"}, status=404)
 
-    course = marks.course
+    stu = transcript["student"]
 
     return JsonResponse({
         "status": "success",
         "summary": {
-            "name": stu.name,
-            "usn": stu.usn,
-            "semester": stu.class_info.semester,
-            "section": stu.class_info.section,
-            "subject": course.course_name,
-            "sub_code": course.sub_code,
-            "faculty": course.faculty,
-            "credits": course.credits,
-
-            "ia1": marks.ia1,
-            "ia2": marks.ia2,
-            "ia3": marks.ia3,
-            "asg1": marks.asg1,
-            "asg2": marks.asg2,
-            "lab_cie": marks.lab_cie,
-            "lab_test": marks.lab_test,
-            "total": marks.total
+            "name": stu["name"],
+            "usn": stu["usn"],
+            "semester": stu["semester"],
+            "section": stu["section"],
+            "subject": course["subject"],
+            "sub_code": course["subcode"],
+            "faculty": course["faculty"],
+            "credits": course["credits"],
+
+            "ia1": course["ia1"],
+            "ia2": course["ia2"],
+            "ia3": course["ia3"],
+            "asg1": course["asg1"],
+            "asg2": course["asg2"],
+            "lab_cie": course["lab_cie"],
+            "lab_test": course["lab_test"],
+            "total": course["total"]
         }
     })
 
 # -------------------------
 # STUDENT LOGIN CHECK
 # -------------------------
+@markcoroutinefunction  # csrf_exempt() returns a plain function on Django 4.2
 @csrf_exempt
-def student_check(request):
+@read_only_database
+async def student_check(request):
     data = json.loads(request.body)
     usn = data.get("usn")
 
-    student = Student.objects.filter(usn=usn).first()
-    if not student:
+    transcript = await aget_student(str(usn).strip()) if usn else None
+    if not transcript:
         return JsonResponse({"error": "USN not found"}, status=404)
 
-    return JsonResponse({"status": "ok", "student_name": student.name})
-def student_subjects(request):
+    return JsonResponse({"status": "ok", "student_name": transcript["student"]["name"]})
+@read_only_database
+async def student_subjects(request):
     usn = request.GET.get("usn")
     if not usn:
         return JsonResponse({"status": "error", "error": "USN required"}, status=400)
 
-    student = Student.objects.filter(usn=usn).first()
-    if not student:
+    transcript = await aget_student(usn.strip())
+    if not transcript:
         return JsonResponse({"status": "error", "error": "Student not found"}, status=404)
 
-    marks = Marks.objects.filter(student=student)
-
     subject_list = []
-    for m in marks:
+    for c in transcript["courses"]:
         subject_list.append({
-            "subject_id": m.course.id if m.course else None,
-            "subject": m.course.course_name if m.course else "",
-            "subcode": m.course.sub_code if m.course else "",
-            "credits": m.course.credits if m.course else "",
-            "faculty": m.course.faculty if m.course else "",
+            "subject_id": c["subject_id"],
+            "subject": c["subject"],
+            "subcode": c["subcode"],
+            "credits": c["credits"],
+            "faculty": c["faculty"],
             "has_marks": True
         })
 
     return JsonResponse({"status": "success", "subjects": subject_list})
 
 
+# -------------------------
+# STUDENT TRANSCRIPT
+# -------------------------
+@read_only_database
+async def student_transcript(request):
+    """Every course, component marks and totals for a USN in one response"""
+    usn = request.GET.get("usn")
+    if not usn:
+        return JsonResponse({"status": "error", "error": "USN required"}, status=400)
+
+    transcript = await aget_student(usn.strip())
+    if transcript is None:
+        return JsonResponse({"status": "error", "error": "Student not found"}, status=404)
+
+    return JsonResponse({"status": "success", **transcript})
+
+
 # -------------------------
 # GET UPLOADED MARKS LIST
 # -------------------------
@@ -602,29 +526,120 @@ def get_uploaded_marks(request):
     except ClassInfo.DoesNotExist:
         return JsonResponse({"uploads": []})
 
-    # Get all courses for this specific class that have marks
-    courses = Course.objects.filter(class_info=class_obj)
-    
-    uploads = []
-    for course in courses:
-        # Count marks for this course in this specific class
-        student_count = Marks.objects.filter(
-            course=course,
-            class_info=class_obj
-        ).count()
-        
-        # Only include if there are marks uploaded
-        if student_count > 0:
-            uploads.append({
-                "course_id": course.id,
-                "subject": course.course_name,
-                "subcode": course.sub_code or "",
-                "credits": course.credits,
-                "faculty": course.faculty or "",
-                "student_count": student_count
-            })
+    # every course of the class with its marks aggregates, in one query
+    def build():
+        return {"uploads": upload_overview(Course.objects.filter(class_info=class_obj))}
+
+    return cached_json_response(request, class_obj, "get_uploaded_marks", build)
+
 
-    return JsonResponse({"uploads": uploads})
+@read_only_database
+def get_department_uploads(request):
+    """Upload overview for all classes (optionally filtered by branch/semester) in one call"""
+    branch = request.GET.get("branch")
+    semester = request.GET.get("semester")
+
+    classes = department_overview(branch=branch, semester=semester)
+    return JsonResponse({"classes": classes, "count": len(classes)})
+
+
+# -------------------------
+# CLASS RESULT MATRIX
+# -------------------------
+def _result_class(request):
+    try:
+        return ClassInfo.objects.get(
+            branch=request.GET.get("branch"),
+            semester=request.GET.get("semester"),
+            section=request.GET.get("section"),
+        )
+    except ClassInfo.DoesNotExist:
+        return None
+
+
+@read_only_database
+def get_class_results(request):
+    """Every student of a class against every course total (components=1 adds IA/ASG/lab columns)"""
+    class_obj = _result_class(request)
+    if class_obj is None:
+        return JsonResponse({"error": "Class not found"}, status=404)
+    components = request.GET.get("components") == "1"
+
+    def build():
+        return get_matrix(class_obj).to_dict(components)
+
+    return cached_json_response(request, class_obj, "get_class_results", build)
+
+
+@read_only_database
+def export_class_results(request):
+    """Class result matrix as one workbook"""
+    class_obj = _result_class(request)
+    if class_obj is None:
+        return JsonResponse({"error": "Class not found"}, status=404)
+    components = request.GET.get("components") == "1"
+
+    data = matrix_workbook(class_obj, get_matrix(class_obj), components)
+    file_name = f"results_{class_obj.branch}_{class_obj.semester}{class_obj.section}.xlsx"
+    response = HttpResponse(data, content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+    return response
+
+
+# -------------------------
+# GRADES / SGPA
+# -------------------------
+@read_only_database
+def get_sgpa(request):
+    """Letter grades and SGPA for a branch/semester (optionally one section); format=xlsx exports them"""
+    branch = request.GET.get("branch")
+    semester = request.GET.get("semester")
+    section = request.GET.get("section")
+
+    if not branch or not semester:
+        return JsonResponse({"error": "branch and semester required"}, status=400)
+
+    result = semester_results(branch, semester, section)
+
+    if request.GET.get("format") == "xlsx":
+        parts = [branch, semester] + ([section] if section else [])
+        file_name = "sgpa_" + "_".join(parts) + ".xlsx"
+        response = HttpResponse(results_workbook(result), content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+        return response
+
+    return JsonResponse(result)
+
+
+# -------------------------
+# EXPORT MARKS (DEPARTMENT)
+# -------------------------
+@read_only_database
+def export_marks(request):
+    """Stream marks of every class (optionally one branch/semester/section) as csv or xlsx"""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in ("csv", "xlsx"):
+        return JsonResponse({"error": "format must be csv or xlsx"}, status=400)
+
+    rows = export_rows(
+        branch=request.GET.get("branch"),
+        semester=request.GET.get("semester"),
+        section=request.GET.get("section"),
+    )
+    parts = [request.GET.get(k) for k in ("branch", "semester", "section") if request.GET.get(k)]
+    file_name = "_".join(["marks"] + parts) + "." + fmt
+
+    if fmt == "csv":
+        response = StreamingHttpResponse(iter_csv(rows), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{file_name}"'
+        return response
+
+    return FileResponse(
+        xlsx_tempfile(rows),
+        as_attachment=True,
+        filename=file_name,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 
 # -------------------------
@@ -638,35 +653,150 @@ def get_course_marks(request):
         return JsonResponse({"error": "course_id required"}, status=400)
 
     try:
-        course = Course.objects.get(id=course_id)
-    except Course.DoesNotExist:
+        fields, limit, cursor = parse_listing(request, MARK_FIELDS)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        course = Course.objects.select_related("class_info").get(id=course_id)
+    except (Course.DoesNotExist, ValueError):
         return JsonResponse({"error": "Course not found"}, status=404)
 
-    # Get all marks for this course
-    marks = Marks.objects.filter(course=course).select_related('student').order_by('student__sl_no')
-
-    marks_list = []
-    for m in marks:
-        marks_list.append({
-            "usn": m.student.usn,
-            "name": m.student.name,
-            "ia1": m.ia1,
-            "ia2": m.ia2,
-            "ia3": m.ia3,
-            "asg1": m.asg1,
-            "asg2": m.asg2,
-            "lab_cie": m.lab_cie,
-            "lab_test": m.lab_test,
-            "total": m.total,
-            "credits": course.credits
-        })
+    # credits are the same for every row: sent once, not per mark
+    head = {"status": "success", "course_name": course.course_name, "credits": course.credits}
+    marks = Marks.objects.filter(course=course)
+    if limit is None and request.GET.get("stream"):
+        return StreamingHttpResponse(iter_json(head, "marks", marks, fields, "student__sl_no", "id"),
+                                     content_type="application/json")
 
-    return JsonResponse({
-        "status": "success",
-        "marks": marks_list,
-        "course_name": course.course_name,
-        "credits": course.credits
-    })
+    def build():
+        rows, next_cursor = page(marks, fields, "student__sl_no", "id", cursor, limit)
+        if limit is None:
+            return {**head, "marks": rows}
+        return {**head, "marks": rows, "next_cursor": next_cursor}
+
+    return cached_json_response(request, course.class_info, "get_course_marks", build)
+
+
+# -------------------------
+# COURSE STATS
+# -------------------------
+@read_only_database
+def get_course_stats(request):
+    """Count, mean, std, min/max, pass count and histogram of totals for a course"""
+    course_id = request.GET.get("course_id")
+
+    if not course_id:
+        return JsonResponse({"error": "course_id required"}, status=400)
+
+    try:
+        course = Course.objects.select_related("stats").get(id=course_id)
+    except (Course.DoesNotExist, ValueError):
+        return JsonResponse({"error": "Course not found"}, status=404)
+
+    try:
+        stats = course.stats
+    except CourseStats.DoesNotExist:
+        stats = CourseStats(course=course)
+
+    return JsonResponse({"status": "success", "course_name": course.course_name, **stats_summary(stats)})
+
+
+# -------------------------
+# RANK / PERCENTILE ANALYTICS
+# -------------------------
+@read_only_database
+def get_course_analytics(request):
+    """Rank list with percentile and z-score, plus distribution, of a course's totals"""
+    course_id = request.GET.get("course_id")
+
+    if not course_id:
+        return JsonResponse({"error": "course_id required"}, status=400)
+
+    try:
+        course = Course.objects.select_related("class_info").get(id=course_id)
+    except (Course.DoesNotExist, ValueError):
+        return JsonResponse({"error": "Course not found"}, status=404)
+
+    def build():
+        return {"status": "success", "course_name": course.course_name, **course_analytics(course)}
+
+    return cached_json_response(request, course.class_info, "get_course_analytics", build)
+
+
+@read_only_database
+def get_class_analytics(request):
+    """Rank list of a class on each student's mean total over its courses"""
+    class_obj = _result_class(request)
+    if class_obj is None:
+        return JsonResponse({"error": "Class not found"}, status=404)
+
+    def build():
+        return {"status": "success", **class_analytics(class_obj)}
+
+    return cached_json_response(request, class_obj, "get_class_analytics", build)
+
+
+# -------------------------
+# RESPONSE CACHE COUNTERS
+# -------------------------
+def get_cache_stats(request):
+    """Hit/miss/304 counters of the per-class response cache and the per-USN student cache (this worker process)"""
+    return JsonResponse({"status": "success", **cache_counters(), "student_cache": student_cache.stats()})
+
+
+# -------------------------
+# PUBLISH RESULTS
+# -------------------------
+@csrf_exempt
+def publish_results(request):
+    """
+    Expects JSON {branch, semester, section (optional), unpublish (optional)}.
+    Writes per-student result documents under PUBLISH_DIR (see core/publish.py).
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST only"}, status=400)
+
+    data = json.loads(request.body)
+    branch = data.get("branch")
+    semester = data.get("semester")
+    section = data.get("section")
+
+    if not branch or not semester:
+        return JsonResponse({"error": "branch and semester required"}, status=400)
+
+    classes = ClassInfo.objects.filter(branch=branch, semester=semester)
+    if section:
+        classes = classes.filter(section=section)
+    if not classes:
+        return JsonResponse({"error": "Class not found"}, status=404)
+
+    if data.get("unpublish"):
+        return JsonResponse({"status": "success", "removed": unpublish_classes(classes)})
+
+    return JsonResponse({"status": "success", **publish_classes(classes, force=bool(data.get("force")))})
+
+
+def published_results(request, path):
+    """
+    Published result files; no database access. Hashed documents are cached forever.
+    Django's serve() is not built for production traffic: in production the
+    front web server or CDN should serve PUBLISH_DIR under PUBLISH_URL itself.
+    """
+    response = serve(request, path, document_root=settings.PUBLISH_DIR)
+    if HASHED_NAME.search(path):
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response["Cache-Control"] = f"public, max-age={settings.PUBLISH_POINTER_MAX_AGE}"
+    return response
+
+
+# -------------------------
+# PROMETHEUS METRICS
+# -------------------------
+def metrics(request):
+    """Request latency / SQL metrics of all workers (see core/metrics.py)"""
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # -------------------------
@@ -690,7 +820,10 @@ def delete_uploaded_marks(request):
         return JsonResponse({"error": "Course not found"}, status=404)
 
     # Delete all marks for this course
-    deleted_count = Marks.objects.filter(course=course).delete()[0]
+    with transaction.atomic():
+        deleted_count = Marks.objects.filter(course=course).delete()[0]
+        clear_course_stats(course.id)
+        bump_class_version(course.class_info_id)
 
     return JsonResponse({
         "status": "success",
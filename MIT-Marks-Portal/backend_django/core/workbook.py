@@ -0,0 +1,76 @@
+# core/workbook.py
+"""
+Streaming reader for uploaded spreadsheets.
+
+The upload is spooled to a temp file and opened in openpyxl's read-only mode,
+so rows are parsed lazily from the zip instead of building every cell object.
+data_only=True returns the value Excel cached for formula cells (e.g. the
+template's "Total CIE (50)" column); cells never calculated come back as None.
+.csv uploads are streamed through the csv module with the same row interface.
+"""
+import csv
+import os
+import tempfile
+from contextlib import contextmanager
+from itertools import islice
+
+import openpyxl
+
+CHUNK_ROWS = 500
+
+
+def upload_suffix(uploaded_file):
+    name = getattr(uploaded_file, "name", "") or ""
+    return ".csv" if name.lower().endswith(".csv") else ".xlsx"
+
+
+def spool_upload(uploaded_file, dir=None):
+    """Copy an uploaded file to a named temp file (in `dir` if given) and return its path."""
+    if dir is not None:
+        os.makedirs(dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=upload_suffix(uploaded_file), dir=dir)
+    with os.fdopen(fd, "wb") as out:
+        if hasattr(uploaded_file, "chunks"):
+            for chunk in uploaded_file.chunks():
+                out.write(chunk)
+        else:
+            uploaded_file.seek(0)
+            out.write(uploaded_file.read())
+    return path
+
+
+@contextmanager
+def open_sheet_rows(path):
+    """Yield an iterator over the active sheet's rows (or a CSV's rows) as tuples of values."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield (tuple(row) for row in csv.reader(f))
+        return
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+@contextmanager
+def open_upload_rows(uploaded_file):
+    """Spool an upload and stream its rows; the temp file is removed on exit."""
+    path = spool_upload(uploaded_file)
+    try:
+        with open_sheet_rows(path) as rows:
+            yield rows
+    finally:
+        os.remove(path)
+
+
+def iter_chunks(rows, size=None):
+    """Group an iterator of rows into lists of at most `size` rows (CHUNK_ROWS by default)."""
+    size = size or CHUNK_ROWS
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk